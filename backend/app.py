@@ -7,16 +7,16 @@ Provides endpoints for purchase analysis and memory synchronization.
 import os
 import json
 import shutil
+import asyncio
 from typing import Optional, List, Any, Dict
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import httpx
-from google.oauth2 import service_account
 import google.auth.transport.requests
 
-from memory import MemoryEngine
+from memory import MemoryEngine, load_service_account_credentials
 from inference_engine import ImpulseInferenceEngine
 
 # Load environment variables from .env file
@@ -41,8 +41,9 @@ app.add_middleware(
 )
 
 # Initialize Memory Engine
-MEMORY_DIR = os.path.join(os.path.dirname(__file__), "memory_store")
-CHROMA_DIR = os.path.join(os.path.dirname(__file__), "memory_store")
+# Memory files and the Chroma index share one directory (MEMORY_STORE_DIR overrides it)
+MEMORY_DIR = os.getenv("MEMORY_STORE_DIR") or os.path.join(os.path.dirname(__file__), "memory_store")
+CHROMA_DIR = MEMORY_DIR
 VERTEX_SERVICE_ACCOUNT_PATH = os.getenv("VERTEX_SERVICE_ACCOUNT_PATH")
 
 # Make service account path optional - will use fallback if not set
@@ -70,6 +71,16 @@ if VERTEX_SERVICE_ACCOUNT_PATH and os.path.exists(VERTEX_SERVICE_ACCOUNT_PATH):
     except Exception as e:
         print(f"Warning: Could not initialize memory engine: {e}")
 
+
+def get_memory_engine() -> Optional[MemoryEngine]:
+    """
+    FastAPI dependency returning the shared MemoryEngine (None if unavailable).
+
+    Endpoints take the engine through this dependency so tests can inject a
+    stand-in via app.dependency_overrides instead of mutating the singleton.
+    """
+    return memory_engine
+
 # Default baseline for users without calibration (used by Fast Brain)
 # Larger std = less trigger-happy: need bigger deviation from mean to drive high likelihood
 DEFAULT_BASELINE = {
@@ -139,6 +150,22 @@ class AnalyzeResponse(BaseModel):
     memory_update: Optional[str] = Field(None, description="Memory update markdown string if applicable")
 
 
+# Largest batch /analyze-batch accepts in one request
+MAX_ANALYZE_BATCH = 32
+
+
+class AnalyzeBatchRequest(BaseModel):
+    """Request model for /analyze-batch endpoint."""
+    requests: List[AnalyzeRequest] = Field(
+        ..., min_length=1, max_length=MAX_ANALYZE_BATCH, description="Purchases to analyze"
+    )
+
+
+class AnalyzeBatchResponse(BaseModel):
+    """Response model for /analyze-batch endpoint."""
+    results: List[AnalyzeResponse] = Field(..., description="One analysis per request, in request order")
+
+
 class SyncMemoryResponse(BaseModel):
     """Response model for /sync-memory endpoint."""
     status: str = Field(..., description="Status of the operation")
@@ -212,19 +239,22 @@ async def startup_event():
 
 
 @app.get("/")
-async def root():
+async def root(memory_engine: Optional[MemoryEngine] = Depends(get_memory_engine)):
     """Root endpoint."""
     return {
         "message": "ImpulseGuard API",
         "version": "2.1.0",
-        "endpoints": ["/pipeline-analyze", "/analyze", "/sync-memory", "/consolidate-memory", "/gemini-analyze"],
+        "endpoints": ["/pipeline-analyze", "/analyze", "/analyze-batch", "/sync-memory", "/consolidate-memory", "/gemini-analyze"],
         "fast_brain_available": fast_brain is not None,
         "slow_brain_available": memory_engine is not None
     }
 
 
 @app.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_purchase(request: AnalyzeRequest) -> AnalyzeResponse:
+async def analyze_purchase(
+    request: AnalyzeRequest,
+    memory_engine: Optional[MemoryEngine] = Depends(get_memory_engine)
+) -> AnalyzeResponse:
     """
     Analyze a purchase decision using RAG and Vertex AI reasoning.
     
@@ -285,8 +315,34 @@ async def analyze_purchase(request: AnalyzeRequest) -> AnalyzeResponse:
         )
 
 
+@app.post("/analyze-batch", response_model=AnalyzeBatchResponse)
+async def analyze_purchase_batch(
+    request: AnalyzeBatchRequest,
+    memory_engine: Optional[MemoryEngine] = Depends(get_memory_engine)
+) -> AnalyzeBatchResponse:
+    """
+    Analyze several purchases in one HTTP round trip.
+    
+    Each item goes through the same path as /analyze (including its
+    Fast Brain fallback on errors), and the items run concurrently; the
+    engine serializes their memory updates per file.
+    
+    Args:
+        request: Batch of analysis requests
+        
+    Returns:
+        Analysis responses in request order
+    """
+    results = await asyncio.gather(*(
+        analyze_purchase(item, memory_engine) for item in request.requests
+    ))
+    return AnalyzeBatchResponse(results=results)
+
+
 @app.post("/sync-memory", response_model=SyncMemoryResponse)
-async def sync_memory() -> SyncMemoryResponse:
+async def sync_memory(
+    memory_engine: Optional[MemoryEngine] = Depends(get_memory_engine)
+) -> SyncMemoryResponse:
     """
     Force re-indexing of all Markdown memory files.
     
@@ -520,7 +576,10 @@ async def update_memory_file_with_content(file_name: str, new_content: str, memo
 
 
 @app.post("/update-preferences", response_model=UpdatePreferencesResponse)
-async def update_preferences(request: UpdatePreferencesRequest) -> UpdatePreferencesResponse:
+async def update_preferences(
+    request: UpdatePreferencesRequest,
+    memory_engine: Optional[MemoryEngine] = Depends(get_memory_engine)
+) -> UpdatePreferencesResponse:
     """
     Update user preferences in memory files.
     
@@ -698,7 +757,9 @@ MEMORY_TEMPLATES = {
 
 
 @app.post("/reset-memory", response_model=ResetMemoryResponse)
-async def reset_memory() -> ResetMemoryResponse:
+async def reset_memory(
+    memory_engine: Optional[MemoryEngine] = Depends(get_memory_engine)
+) -> ResetMemoryResponse:
     """
     Reset all memory files to their template state.
     
@@ -793,7 +854,7 @@ async def reset_memory() -> ResetMemoryResponse:
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(memory_engine: Optional[MemoryEngine] = Depends(get_memory_engine)):
     """Health check endpoint."""
     return {
         "status": "healthy",
@@ -812,7 +873,9 @@ class ConsolidateMemoryResponse(BaseModel):
 
 
 @app.post("/consolidate-memory", response_model=ConsolidateMemoryResponse)
-async def consolidate_memory() -> ConsolidateMemoryResponse:
+async def consolidate_memory(
+    memory_engine: Optional[MemoryEngine] = Depends(get_memory_engine)
+) -> ConsolidateMemoryResponse:
     """
     Consolidate memory files that have grown too large.
 
@@ -858,7 +921,10 @@ async def consolidate_memory() -> ConsolidateMemoryResponse:
 # ===================== PIPELINE ANALYZE ENDPOINT =====================
 
 @app.post("/pipeline-analyze", response_model=PipelineResponse)
-async def pipeline_analyze(request: PipelineRequest) -> PipelineResponse:
+async def pipeline_analyze(
+    request: PipelineRequest,
+    memory_engine: Optional[MemoryEngine] = Depends(get_memory_engine)
+) -> PipelineResponse:
     """
     Full pipeline analysis: Fast Brain (Bayesian) -> Slow Brain (RAG + Vertex AI).
     
@@ -1053,7 +1119,7 @@ class GeminiClient:
         if not os.path.exists(self.service_account_path):
             raise FileNotFoundError(f"Service account not found: {self.service_account_path}")
         
-        self.credentials = service_account.Credentials.from_service_account_file(
+        self.credentials = load_service_account_credentials(
             self.service_account_path,
             scopes=['https://www.googleapis.com/auth/generative-language']
         )
@@ -7,11 +7,18 @@ across test_api.py and test_e2e.py.
 
 import os
 import json
-import tempfile
 import shutil
+import tempfile
+from types import MappingProxyType, SimpleNamespace
 
 import pytest
-from unittest.mock import patch, Mock
+from hypothesis import is_hypothesis_test, settings
+from unittest.mock import Mock, patch
+
+try:
+    import uvloop  # ships with uvicorn[standard]; unavailable on Windows
+except ImportError:
+    uvloop = None
 
 # ── Create mock service account JSON once at module level ────────────────
 
@@ -41,29 +48,268 @@ MOCK_SERVICE_ACCOUNT_PATH = _temp_service_account.name
 # Set env var BEFORE any test module imports app
 os.environ["VERTEX_SERVICE_ACCOUNT_PATH"] = MOCK_SERVICE_ACCOUNT_PATH
 
-# Patch credentials at module level so app.py / memory.py never hit real GCP
-_mock_credentials = Mock()
-_mock_credentials.valid = True
-_mock_credentials.token = "mock_access_token"
+# Likewise point app's memory store (Markdown files and Chroma index) at a
+# temp directory, so importing app never touches the tracked
+# backend/memory_store. Each pytest-xdist worker imports conftest itself and
+# so gets its own directory.
+_MEMORY_FILES = ("Goals.md", "Budget.md", "State.md", "Behavior.md")
+
+MEMORY_STORE_DIR = tempfile.mkdtemp(prefix="impulseguard-memory-")
+for _fname in _MEMORY_FILES:
+    with open(os.path.join(MEMORY_STORE_DIR, _fname), "w") as _f:
+        _f.write(f"# {_fname}\nplaceholder\n")
+os.environ["MEMORY_STORE_DIR"] = MEMORY_STORE_DIR
+
+# Patch credentials for the whole run so app.py / memory.py never hit real GCP.
+# pytest_configure runs before collection imports app; pytest_unconfigure stops
+# the patch (and removes the temp file) so it never outlives the session.
+_CREDENTIALS_PATCHER = pytest.StashKey()
+
+# The one stand-in credentials object every credential mock returns
+MOCK_CREDENTIALS = SimpleNamespace(valid=True, token="mock_access_token")
+
+
+def pytest_configure(config):
+    patcher = patch(
+        "google.oauth2.service_account.Credentials.from_service_account_file",
+        return_value=MOCK_CREDENTIALS,
+    )
+    patcher.start()
+    config.stash[_CREDENTIALS_PATCHER] = patcher
 
-_patcher = patch(
-    "google.oauth2.service_account.Credentials.from_service_account_file"
-)
-_mock_creds_func = _patcher.start()
-_mock_creds_func.return_value = _mock_credentials
+
+def pytest_unconfigure(config):
+    patcher = config.stash.get(_CREDENTIALS_PATCHER, None)
+    if patcher is not None:
+        patcher.stop()
+    if os.path.exists(MOCK_SERVICE_ACCOUNT_PATH):
+        os.remove(MOCK_SERVICE_ACCOUNT_PATH)
+    shutil.rmtree(MEMORY_STORE_DIR, ignore_errors=True)
+
+
+# ── Hypothesis fuzz tests ────────────────────────────────────────────────
+# Every @given test is marked "fuzz" so a fast PR run can skip them with
+# -m "not fuzz". HYPOTHESIS_PROFILE=ci|nightly scales the example budget;
+# a test that pins its own max_examples ignores the profile, so only
+# exhaustive ones (e.g. the 24 hours of the day) should.
+
+settings.register_profile("ci", max_examples=50)
+settings.register_profile("nightly", max_examples=2000)
+settings.load_profile(os.getenv("HYPOTHESIS_PROFILE", "default"))
+
+
+def pytest_collection_modifyitems(items):
+    # Checked directly: -m deselection can run before Hypothesis adds its own marker
+    for item in items:
+        if isinstance(item, pytest.Function) and is_hypothesis_test(item.obj):
+            item.add_marker(pytest.mark.fuzz)
 
 
 # ── Shared fixtures ──────────────────────────────────────────────────────
 
+def pytest_asyncio_loop_factories(config, item):
+    """Run async tests on uvloop where available (one session-scoped loop, see pytest.ini)."""
+    if uvloop is not None:
+        return {"uvloop": uvloop.new_event_loop}
+    return None
+
+
+@pytest.fixture(autouse=True)
+def _clear_credentials_cache():
+    """Empty memory's process-wide credentials cache around every test.
+
+    Otherwise whatever a credential patch returned first stays cached for
+    its (path, mtime) and leaks into later tests that patch differently.
+    """
+    import memory
+
+    memory._cached_credentials.cache_clear()
+    yield
+    memory._cached_credentials.cache_clear()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _mock_reindex():
+    """Replace app.memory_engine.reindex_memory with a no-op for the whole run.
+
+    Tests never want a real ChromaDB reindex; tests that need a failing
+    reindex still patch it themselves.
+    """
+    import app as app_module
+
+    engine = app_module.memory_engine
+    if engine is None:
+        yield
+        return
+
+    async def _reindex(*args, **kwargs):
+        return True
+
+    original = engine.reindex_memory
+    engine.reindex_memory = _reindex
+    yield
+    engine.reindex_memory = original
+
+
+def _mock_chroma_client():
+    """Stand-in for chromadb.PersistentClient with an empty collection."""
+    client = Mock()
+    client.get_or_create_collection.return_value.count.return_value = 0
+    return client
+
+
+@pytest.fixture(scope="session")
+def chroma_client_stub():
+    """Factory for stand-in chromadb.PersistentClient objects (empty collection)."""
+    return _mock_chroma_client
+
+
+@pytest.fixture(scope="session")
+def service_account_path():
+    """Path of the mock service account JSON created for the session."""
+    return MOCK_SERVICE_ACCOUNT_PATH
+
 
 @pytest.fixture
-def temp_dirs():
+def mock_chroma(monkeypatch):
+    """Skip the embedded Chroma startup for tests that never touch the index."""
+    client = _mock_chroma_client()
+    monkeypatch.setattr("chromadb.PersistentClient", lambda *args, **kwargs: client)
+    return client.get_or_create_collection.return_value
+
+
+@pytest.fixture(scope="session")
+def pure_engine(tmp_path_factory):
+    """One MemoryEngine for tests of its pure helpers (chunking, routing, counting).
+
+    Those helpers never read or write the memory/Chroma directories, so
+    building a single engine per session on a stub Chroma client is enough.
+    """
+    from memory import MemoryEngine
+
+    with patch("chromadb.PersistentClient", return_value=_mock_chroma_client()):
+        return MemoryEngine(
+            memory_dir=str(tmp_path_factory.mktemp("pure-mem")),
+            chroma_persist_dir=str(tmp_path_factory.mktemp("pure-chroma")),
+            service_account_path=MOCK_SERVICE_ACCOUNT_PATH,
+        )
+
+
+_PIPELINE_REQUEST_BASE = MappingProxyType({
+    "product": "Test Widget",
+    "cost": 49.99,
+    "website": "amazon.com",
+    "time_to_cart": 20.0,
+    "time_on_site": 90.0,
+    "click_count": 6,
+    "peak_scroll_velocity": 800.0,
+    "system_hour": 14,
+})
+
+
+@pytest.fixture
+def pipeline_request():
+    """Factory building a valid /pipeline-analyze request body with sensible defaults."""
+    def make(**overrides):
+        return _PIPELINE_REQUEST_BASE | overrides
+    return make
+
+
+@pytest.fixture
+def override_engine():
+    """
+    Inject a stand-in memory engine through app.dependency_overrides.
+
+    Returns an installer taking the engine object (or None); the override is
+    removed on teardown, so the shared MemoryEngine is never mutated.
+    """
+    from app import app, get_memory_engine
+
+    def install(engine):
+        app.dependency_overrides[get_memory_engine] = lambda: engine
+
+    yield install
+    app.dependency_overrides.pop(get_memory_engine, None)
+
+
+# Fields every Slow Brain stub returns unchanged
+_BASE_MOCK_RESPONSE = MappingProxyType({
+    "confidence": 0.8,
+    "reasoning": "mock",
+    "memory_update": None,
+})
+
+
+class _SlowBrainStubEngine:
+    """Stand-in engine: a stubbed analyze_purchase, everything else from the shared engine."""
+
+    def __init__(self, engine, analyze_purchase):
+        self._engine = engine
+        self.analyze_purchase = analyze_purchase
+
+    def __getattr__(self, name):
+        return getattr(self._engine, name)
+
+
+@pytest.fixture
+def analyze_mock(override_engine):
+    """Factory installing a Slow Brain stub engine through app.dependency_overrides.
+
+    ``make(score=0.4)`` returns a fixed impulse score; ``make(passthrough=True)``
+    echoes the Fast Brain score back. Other engine calls (sync, reset, ...)
+    reach the shared MemoryEngine, which is never mutated; the override is
+    removed at test teardown.
+    """
+    import app as app_module
+
+    def make(score=None, action="MIRROR", passthrough=False):
+        async def mock(p_impulse_fast, purchase_data):
+            return {
+                **_BASE_MOCK_RESPONSE,
+                "impulse_score": p_impulse_fast if passthrough else score,
+                "intervention_action": action,
+            }
+
+        override_engine(_SlowBrainStubEngine(app_module.memory_engine, mock))
+        return mock
+    return make
+
+
+@pytest.fixture
+def temp_dirs(tmp_path_factory):
     """Create temporary directories for testing memory and ChromaDB."""
-    memory_dir = tempfile.mkdtemp()
-    chroma_dir = tempfile.mkdtemp()
-    yield memory_dir, chroma_dir
-    shutil.rmtree(memory_dir, ignore_errors=True)
-    shutil.rmtree(chroma_dir, ignore_errors=True)
+    return str(tmp_path_factory.mktemp("memory")), str(tmp_path_factory.mktemp("chroma"))
+
+
+_SAMPLE_MEMORY_FILES = MappingProxyType({
+    "Goals.md": """# Long-term Goals
+
+## Financial Goals
+- Save $5000 for emergency fund
+
+## Personal Goals
+- Reduce impulse purchases
+""",
+    "Budget.md": """# Budget Constraints
+
+## Monthly Spending Limits
+- Discretionary: $500/month
+
+## Current Month
+- Spent: $0
+""",
+    "State.md": """# Current State
+
+## Account Balance
+- [Not recorded yet]
+""",
+    # Default target for memory updates
+    "Behavior.md": """# Behavioral Patterns
+
+## Observed Behaviors
+- [No patterns recorded yet]
+""",
+})
 
 
 @pytest.fixture
@@ -71,9 +317,9 @@ def sample_markdown_files(temp_dirs):
     """Create sample Markdown files in the temp memory directory."""
     memory_dir, _ = temp_dirs
 
-    for filename in ["Goals.md", "Budget.md", "State.md", "Behavior.md"]:
+    for filename, content in _SAMPLE_MEMORY_FILES.items():
         with open(os.path.join(memory_dir, filename), "w") as f:
-            f.write(f"# {filename.replace('.md', '')}\n\nInitial content\n")
+            f.write(content)
 
     return memory_dir
 
@@ -84,10 +330,7 @@ def mock_env_vars(monkeypatch):
     monkeypatch.setenv("VERTEX_SERVICE_ACCOUNT_PATH", MOCK_SERVICE_ACCOUNT_PATH)
 
     with patch(
-        "google.oauth2.service_account.Credentials.from_service_account_file"
-    ) as mock_creds:
-        mock_credentials = Mock()
-        mock_credentials.valid = True
-        mock_credentials.token = "mock_access_token"
-        mock_creds.return_value = mock_credentials
+        "google.oauth2.service_account.Credentials.from_service_account_file",
+        return_value=MOCK_CREDENTIALS,
+    ):
         yield
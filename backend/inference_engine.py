@@ -7,10 +7,27 @@ data with real-time browser telemetry using Bayesian inference.
 """
 
 import numpy as np
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import json
 
 
+def _late_night_multiplier(hour: float) -> float:
+    """Linear interpolation: 1.0x at 1 AM, 1.5x at 3 AM, 1.0x at 5 AM; 1.0x otherwise."""
+    if 1 <= hour <= 5:
+        return 1.0 + 0.5 * (1 - abs(hour - 3) / 2)
+    return 1.0
+
+
+# Late night multiplier for each whole hour 0-23, precomputed at import
+_LATE_NIGHT_MULTIPLIERS = tuple(_late_night_multiplier(hour) for hour in range(24))
+
+
+def _clamp_unit(values: np.ndarray) -> np.ndarray:
+    """Elementwise max(0.0, min(1.0, v)), including its NaN behavior (NaN -> 1.0)."""
+    values = np.where(values < 1.0, values, 1.0)
+    return np.where(values > 0.0, values, 0.0)
+
+
 class ImpulseInferenceEngine:
     """
     Bayesian Inference Engine for calculating impulse buy probability.
@@ -120,6 +137,9 @@ class ImpulseInferenceEngine:
         'nonprofit': 0.5
     }
     
+    # Max distinct website names memoized per engine by _get_website_risk_factor
+    WEBSITE_RISK_CACHE_SIZE = 256
+    
     def __init__(self, baseline_data: Dict[str, Any], prior_p: float = 0.2):
         """
         Initialize the inference engine with user-specific baselines.
@@ -152,22 +172,37 @@ class ImpulseInferenceEngine:
             ttc = baseline_data['time_to_cart']
             if 'mean' not in ttc or 'std' not in ttc:
                 raise ValueError("Baseline time_to_cart must contain 'mean' and 'std'")
+
+        # Baseline statistics for the z-scored features (in Z_SCORE_FEATURES order),
+        # precomputed so every z-score is one vectorized NumPy operation
+        self._z_mean = np.array(
+            [baseline_data[key]['mean'] for key in self.Z_SCORE_FEATURES], dtype=float
+        )
+        z_std = np.array(
+            [baseline_data[key]['std'] for key in self.Z_SCORE_FEATURES], dtype=float
+        )
+        self._z_zero_std = z_std == 0
+        self._z_std = np.where(self._z_zero_std, 1.0, z_std)
+        
+        # Memoized website risk factors; the same few domains recur on every event
+        self._website_risk_cache: Dict[str, float] = {}
     
-    def _calculate_z_score(self, value: float, mean: float, std: float) -> float:
+    # Baseline features whose z-scores are computed together by _calculate_z_scores
+    Z_SCORE_FEATURES = ('scroll_velocity', 'click_rate')
+
+    def _calculate_z_scores(self, values) -> np.ndarray:
         """
-        Calculate Z-score for a value relative to baseline.
+        Vectorized Z-scores for the Z_SCORE_FEATURES baselines.
         
         Args:
-            value: Current measurement
-            mean: Baseline mean
-            std: Baseline standard deviation
+            values: Current measurements, in Z_SCORE_FEATURES order along the
+                last axis; leading axes batch several measurements at once
             
         Returns:
-            Z-score (standard deviations from mean)
+            Array of Z-scores (0.0 wherever the baseline std is zero)
         """
-        if std == 0:
-            return 0.0  # Avoid division by zero
-        return (value - mean) / std
+        z_scores = (np.asarray(values, dtype=float) - self._z_mean) / self._z_std
+        return np.where(self._z_zero_std, 0.0, z_scores)
     
     # Cap per-feature likelihood so no single feature can saturate the combined score
     LIKELIHOOD_MIN = 0.05
@@ -182,6 +217,15 @@ class ImpulseInferenceEngine:
             k = self.SIGMOID_K
         raw = 1.0 / (1.0 + np.exp(-k * z_score))
         return float(np.clip(raw, self.LIKELIHOOD_MIN, self.LIKELIHOOD_MAX))
+
+    def _sigmoid_likelihoods(self, z_scores: np.ndarray, k: Optional[float] = None) -> np.ndarray:
+        """
+        Vectorized _sigmoid_likelihood over an array of Z-scores.
+        """
+        if k is None:
+            k = self.SIGMOID_K
+        raw = 1.0 / (1.0 + np.exp(-k * z_scores))
+        return np.clip(raw, self.LIKELIHOOD_MIN, self.LIKELIHOOD_MAX)
     
     def _get_late_night_multiplier(self, hour: int) -> float:
         """
@@ -193,10 +237,9 @@ class ImpulseInferenceEngine:
         Returns:
             Multiplier (1.0-1.5x), peaks at 3 AM
         """
-        if 1 <= hour <= 5:
-            # Linear interpolation: 1.0x at 1 AM, 1.5x at 3 AM, 1.0x at 5 AM
-            return 1.0 + 0.5 * (1 - abs(hour - 3) / 2)
-        return 1.0
+        if isinstance(hour, int) and 0 <= hour < 24:
+            return _LATE_NIGHT_MULTIPLIERS[hour]
+        return _late_night_multiplier(hour)
     
     def _get_website_risk_factor(self, website_name: str) -> float:
         """
@@ -208,6 +251,15 @@ class ImpulseInferenceEngine:
         Returns:
             Risk factor multiplier (0.5-2.0x)
         """
+        factor = self._website_risk_cache.get(website_name)
+        if factor is None:
+            factor = self._lookup_website_risk_factor(website_name)
+            if len(self._website_risk_cache) < self.WEBSITE_RISK_CACHE_SIZE:
+                self._website_risk_cache[website_name] = factor
+        return factor
+    
+    def _lookup_website_risk_factor(self, website_name: str) -> float:
+        """Uncached keyword match behind _get_website_risk_factor."""
         website_lower = website_name.lower()
         
         # Check for exact matches first
@@ -255,6 +307,14 @@ class ImpulseInferenceEngine:
         # Inverse: lower normalized TTC = higher likelihood
         return 1.0 - normalized_ttc
     
+    def _calculate_ttc_likelihoods(self, times_to_cart: np.ndarray) -> np.ndarray:
+        """
+        Vectorized _calculate_ttc_likelihood over an array of TTCs.
+        """
+        normalized_ttc = times_to_cart / 300.0
+        normalized_ttc = np.where(1.0 < normalized_ttc, 1.0, normalized_ttc)
+        return np.where(times_to_cart <= 0, 1.0, 1.0 - normalized_ttc)
+    
     def calculate_p_impulse(self, current_data: Dict[str, Any]) -> float:
         """
         Calculate the probability that user is in an impulse buy state.
@@ -286,40 +346,19 @@ class ImpulseInferenceEngine:
         website_name = current_data.get('website_name', '')
 
         # BIOMETRICS_DISABLED: HR and RR z-scores no longer calculated
-        # # Calculate Z-scores for HR, RR, Scroll Velocity
-        # hr_z = self._calculate_z_score(
-        #     hr,
-        #     self.baseline_data['heart_rate']['mean'],
-        #     self.baseline_data['heart_rate']['std']
-        # )
-        # rr_z = self._calculate_z_score(
-        #     rr,
-        #     self.baseline_data['respiration_rate']['mean'],
-        #     self.baseline_data['respiration_rate']['std']
-        # )
-        scroll_z = self._calculate_z_score(
-            scroll_velocity,
-            self.baseline_data['scroll_velocity']['mean'],
-            self.baseline_data['scroll_velocity']['std']
-        )
+        # (re-enable by adding 'heart_rate' and 'respiration_rate' to Z_SCORE_FEATURES)
+        # Scroll velocity and click rate Z-scores in one vectorized step
+        z_scores = self._calculate_z_scores([scroll_velocity, click_rate])
 
         # Map Z-scores to likelihoods using sigmoid
         # BIOMETRICS_DISABLED: HR and RR likelihoods no longer calculated
         # hr_likelihood = self._sigmoid_likelihood(hr_z)
         # rr_likelihood = self._sigmoid_likelihood(rr_z)
-        scroll_likelihood = self._sigmoid_likelihood(scroll_z)
+        scroll_likelihood, click_likelihood = self._sigmoid_likelihoods(z_scores).tolist()
         
         # Emotion arousal is already in [0, 1], use directly
         arousal_likelihood = arousal
         
-        # Click rate: calculate Z-score and map to likelihood
-        click_z = self._calculate_z_score(
-            click_rate,
-            self.baseline_data['click_rate']['mean'],
-            self.baseline_data['click_rate']['std']
-        )
-        click_likelihood = self._sigmoid_likelihood(click_z)
-        
         # TTC likelihood (inverse: lower TTC = higher likelihood)
         ttc_likelihood = self._calculate_ttc_likelihood(time_to_cart)
         
@@ -460,30 +499,16 @@ class ImpulseInferenceEngine:
 
         # Calculate Z-scores
         # BIOMETRICS_DISABLED: HR and RR z-scores no longer calculated
-        # hr_z = self._calculate_z_score(
-        #     hr, self.baseline_data['heart_rate']['mean'],
-        #     self.baseline_data['heart_rate']['std']
-        # )
-        # rr_z = self._calculate_z_score(
-        #     rr, self.baseline_data['respiration_rate']['mean'],
-        #     self.baseline_data['respiration_rate']['std']
-        # )
-        scroll_z = self._calculate_z_score(
-            scroll_velocity, self.baseline_data['scroll_velocity']['mean'],
-            self.baseline_data['scroll_velocity']['std']
-        )
-        click_z = self._calculate_z_score(
-            click_rate, self.baseline_data['click_rate']['mean'],
-            self.baseline_data['click_rate']['std']
-        )
+        # (re-enable by adding 'heart_rate' and 'respiration_rate' to Z_SCORE_FEATURES)
+        z_scores = self._calculate_z_scores([scroll_velocity, click_rate])
+        scroll_z, click_z = z_scores.tolist()
 
         # Calculate likelihoods
         # BIOMETRICS_DISABLED: HR and RR likelihoods no longer calculated
         # hr_likelihood = self._sigmoid_likelihood(hr_z)
         # rr_likelihood = self._sigmoid_likelihood(rr_z)
-        scroll_likelihood = self._sigmoid_likelihood(scroll_z)
+        scroll_likelihood, click_likelihood = self._sigmoid_likelihoods(z_scores).tolist()
         arousal_likelihood = arousal
-        click_likelihood = self._sigmoid_likelihood(click_z)
         if 'time_to_cart' in self.baseline_data:
             ttc_mean = self.baseline_data['time_to_cart']['mean']
             ttc_std = self.baseline_data['time_to_cart']['std']
@@ -548,3 +573,118 @@ class ImpulseInferenceEngine:
                 'validation': validation
             }
         }
+    
+    def get_structured_output_batch(self, current_datas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Get structured output for many inputs at once.
+        
+        Z-scores, likelihoods, contributions and the Bayesian update run as
+        NumPy operations over the whole batch; each result equals
+        get_structured_output() on the same input.
+        
+        Args:
+            current_datas: Current data dictionaries
+            
+        Returns:
+            One get_structured_output() dict per input, in order
+        """
+        if not current_datas:
+            return []
+        
+        # Stack the numeric inputs column-wise (defaults as in calculate_p_impulse)
+        arousal = np.array([d.get('emotion_arousal', 0.0) for d in current_datas], dtype=float)
+        features = np.array(
+            [[d.get('scroll_velocity_peak', 0.0), d.get('click_rate', 0.0)] for d in current_datas],
+            dtype=float
+        )
+        time_to_cart = np.array(
+            [d.get('time_to_cart', float('inf')) for d in current_datas], dtype=float
+        )
+        hours = [d.get('system_time', 12) for d in current_datas]
+        website_names = [d.get('website_name', '') for d in current_datas]
+        
+        # Z-scores and likelihoods, one row per input
+        z_scores = self._calculate_z_scores(features)
+        likelihoods = self._sigmoid_likelihoods(z_scores)
+        scroll_likelihood, click_likelihood = likelihoods[:, 0], likelihoods[:, 1]
+        ttc_heuristic_likelihood = self._calculate_ttc_likelihoods(time_to_cart)
+        
+        # Context multipliers are table/keyword lookups
+        late_night_mult = np.array([self._get_late_night_multiplier(h) for h in hours], dtype=float)
+        website_risk = np.array([self._get_website_risk_factor(w) for w in website_names], dtype=float)
+        
+        # p_impulse exactly as calculate_p_impulse computes it
+        weighted_p = (
+            self.WEIGHTS['scroll_velocity'] * scroll_likelihood +
+            self.WEIGHTS['emotion_arousal'] * arousal +
+            self.WEIGHTS['click_rate'] * click_likelihood +
+            self.WEIGHTS['time_to_cart'] * ttc_heuristic_likelihood
+        )
+        adjusted_p = _clamp_unit(weighted_p * late_night_mult * website_risk)
+        numerator = adjusted_p * self.prior_p
+        denominator = adjusted_p * self.prior_p + (1 - adjusted_p) * (1 - self.prior_p)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p_impulse = np.where(denominator == 0, 0.0, _clamp_unit(numerator / denominator))
+        
+        # TTC likelihood for contributions: baseline z-score when available
+        if 'time_to_cart' in self.baseline_data:
+            ttc_mean = self.baseline_data['time_to_cart']['mean']
+            ttc_std = self.baseline_data['time_to_cart']['std']
+            if ttc_std:
+                ttc_z = (ttc_mean - time_to_cart) / ttc_std
+            else:
+                ttc_z = np.zeros_like(time_to_cart)
+            ttc_likelihood = self._sigmoid_likelihoods(ttc_z)
+        else:
+            ttc_z = None
+            ttc_likelihood = ttc_heuristic_likelihood
+        
+        contributions = {
+            'scroll_velocity': self.WEIGHTS['scroll_velocity'] * scroll_likelihood,
+            'emotion_arousal': self.WEIGHTS['emotion_arousal'] * arousal,
+            'click_rate': self.WEIGHTS['click_rate'] * click_likelihood,
+            'time_to_cart': self.WEIGHTS['time_to_cart'] * ttc_likelihood
+        }
+        
+        # Back to Python floats for the per-input dicts
+        z_rows = z_scores.tolist()
+        scroll_likelihood, click_likelihood = scroll_likelihood.tolist(), click_likelihood.tolist()
+        arousal = arousal.tolist()
+        ttc_z = ttc_z.tolist() if ttc_z is not None else None
+        ttc_likelihood = ttc_likelihood.tolist()
+        contribution_rows = [
+            dict(zip(contributions, row))
+            for row in zip(*(values.tolist() for values in contributions.values()))
+        ]
+        
+        outputs = []
+        for i, current_data in enumerate(current_datas):
+            p = float(p_impulse[i])
+            row_contributions = contribution_rows[i]
+            scroll_z, click_z = z_rows[i]
+            outputs.append({
+                'p_impulse': p,
+                'dominant_trigger': max(row_contributions, key=row_contributions.get),
+                'logic_summary': {
+                    'z_scores': {
+                        'scroll_velocity': scroll_z,
+                        'click_rate': click_z,
+                        **({'time_to_cart': ttc_z[i]} if ttc_z is not None else {})
+                    },
+                    'likelihoods': {
+                        'scroll_velocity': scroll_likelihood[i],
+                        'emotion_arousal': arousal[i],
+                        'click_rate': click_likelihood[i],
+                        'time_to_cart': ttc_likelihood[i]
+                    },
+                    'weighted_contributions': row_contributions,
+                    'context_factors': {
+                        'late_night_multiplier': float(late_night_mult[i]),
+                        'website_risk_factor': float(website_risk[i]),
+                        'system_time': hours[i],
+                        'website_name': website_names[i]
+                    },
+                    'validation': self.validate_logic(current_data, p)
+                }
+            })
+        return outputs
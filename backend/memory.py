@@ -7,19 +7,77 @@ and implements self-refining memory updates.
 """
 
 import os
+import re
 import json
 import shutil
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Awaitable, NamedTuple
 from datetime import datetime
+from functools import lru_cache
 import asyncio
 
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
 import httpx
 from google.oauth2 import service_account
 import google.auth.transport.requests
 
 
+class Chunk(NamedTuple):
+    """One embeddable slice of a memory file, as produced by _chunk_markdown."""
+    content: str
+    file: str
+    section: str
+
+
+@lru_cache(maxsize=4)
+def _cached_credentials(path: str, scopes: tuple, mtime: float):
+    """Parse a service account file once per (path, scopes, mtime)."""
+    return service_account.Credentials.from_service_account_file(path, scopes=list(scopes))
+
+
+def load_service_account_credentials(path: str, scopes: List[str]):
+    """
+    Load service account credentials, sharing one object per file and scope set.
+    
+    Callers that load the same key with the same scopes (MemoryEngine and the
+    app's GeminiClient) get the same Credentials, so the OAuth token is
+    refreshed once and reused until it expires. Keyed on the file's mtime so
+    a replaced key file is picked up.
+    
+    Args:
+        path: Path to the service account JSON file
+        scopes: OAuth scopes to request
+        
+    Returns:
+        google.oauth2.service_account.Credentials
+    """
+    return _cached_credentials(path, tuple(scopes), os.path.getmtime(path))
+
+
+@lru_cache(maxsize=1)
+def _onnx_embedder() -> ONNXMiniLM_L6_V2:
+    """The process-wide ONNX MiniLM embedder (model weights load on first use)."""
+    return ONNXMiniLM_L6_V2()
+
+
+class _SharedDefaultEmbeddingFunction(DefaultEmbeddingFunction):
+    """
+    Chroma's default embedding function, backed by one shared ONNX model.
+    
+    The stock DefaultEmbeddingFunction builds a fresh ONNXMiniLM_L6_V2 (and so
+    reloads the model) on every call. This subclass keeps the "default" name,
+    so existing persisted collections open without an embedding-function conflict.
+    """
+    
+    def __call__(self, input):
+        return _onnx_embedder()(input)
+
+
+_EMBEDDING_FUNCTION = _SharedDefaultEmbeddingFunction()
+
+
 class MemoryEngine:
     """
     Memory engine that manages RAG retrieval, Vertex AI (Gemini) reasoning via REST API
@@ -185,13 +243,13 @@ Set to null if no new patterns emerge or this matches existing behavior."""
         # Try generative-language scope first, fallback to cloud-platform
         try:
             try:
-                self.credentials = service_account.Credentials.from_service_account_file(
+                self.credentials = load_service_account_credentials(
                     service_account_path,
                     scopes=['https://www.googleapis.com/auth/generative-language']
                 )
             except:
                 # Fallback to cloud-platform scope
-                self.credentials = service_account.Credentials.from_service_account_file(
+                self.credentials = load_service_account_credentials(
                     service_account_path,
                     scopes=['https://www.googleapis.com/auth/cloud-platform']
                 )
@@ -208,7 +266,8 @@ Set to null if no new patterns emerge or this matches existing behavior."""
         # Create or get collection
         self.collection = self.chroma_client.get_or_create_collection(
             name="impulseguard_memory",
-            metadata={"hnsw:space": "cosine"}
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=_EMBEDDING_FUNCTION
         )
         
         # Track if memory has been indexed
@@ -216,6 +275,10 @@ Set to null if no new patterns emerge or this matches existing behavior."""
         
         # Track chunk IDs for upsert operations
         self._chunk_ids = {}  # Maps (file_name, section) -> list of chunk IDs
+        
+        # One lock per memory file, so concurrent updates (e.g. the items of one
+        # /analyze-batch request) never interleave their read-modify-write
+        self._file_locks: Dict[str, asyncio.Lock] = {}
     
     def _get_access_token(self) -> str:
         """
@@ -237,13 +300,20 @@ Set to null if no new patterns emerge or this matches existing behavior."""
         except Exception as e:
             raise Exception(f"Failed to get access token: {e}")
     
-    async def _call_gemini_api(self, prompt: str, system_instruction: Optional[str] = None) -> Dict[str, Any]:
+    async def _call_gemini_api(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        *,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep
+    ) -> Dict[str, Any]:
         """
         Call Vertex AI (Gemini) API via REST with OAuth2 authentication and exponential backoff retry logic.
         
         Args:
             prompt: User prompt text
             system_instruction: Optional system instruction (defaults to class constant)
+            sleep: Coroutine used for backoff waits (tests pass a no-op)
             
         Returns:
             Parsed JSON response from Vertex AI
@@ -284,7 +354,7 @@ Set to null if no new patterns emerge or this matches existing behavior."""
                     if response.status_code == 429:
                         retry_after = int(response.headers.get('Retry-After', delay * 2))
                         print(f"Rate limited (429). Waiting {retry_after}s before retry...")
-                        await asyncio.sleep(retry_after)
+                        await sleep(retry_after)
                         continue  # Retry the request
                     
                     # Check for specific error codes and provide helpful messages
@@ -349,7 +419,7 @@ Set to null if no new patterns emerge or this matches existing behavior."""
                 except (httpx.HTTPError, httpx.RequestError, ValueError, json.JSONDecodeError, Exception) as e:
                     last_exception = e
                     if attempt < len(delays) - 1:
-                        await asyncio.sleep(delay)
+                        await sleep(delay)
                     else:
                         raise last_exception
         
@@ -357,8 +427,10 @@ Set to null if no new patterns emerge or this matches existing behavior."""
     
     # Maximum characters per chunk to prevent oversized embeddings
     MAX_CHUNK_SIZE = 500
+    # Markdown section header: any line starting with '#'
+    _HEADER_RE = re.compile(r'^#.*$', re.MULTILINE)
 
-    def _chunk_markdown(self, content: str, file_name: str) -> List[Dict[str, Any]]:
+    def _chunk_markdown(self, content: str, file_name: str) -> List[Chunk]:
         """
         Split Markdown content into embeddable chunks.
 
@@ -370,12 +442,9 @@ Set to null if no new patterns emerge or this matches existing behavior."""
             file_name: Name of the source file
 
         Returns:
-            List of chunk dictionaries with content and metadata
+            List of Chunk tuples (content, file, section)
         """
         chunks = []
-        lines = content.split('\n')
-        current_chunk = []
-        current_section = "Introduction"
 
         def add_chunk(text: str, section: str):
             """Add chunk, splitting if it exceeds MAX_CHUNK_SIZE."""
@@ -384,11 +453,7 @@ Set to null if no new patterns emerge or this matches existing behavior."""
                 return
 
             if len(text) <= self.MAX_CHUNK_SIZE:
-                chunks.append({
-                    'content': text,
-                    'file': file_name,
-                    'section': section
-                })
+                chunks.append(Chunk(text, file_name, section))
             else:
                 # Split large chunks by lines, respecting MAX_CHUNK_SIZE
                 chunk_lines = text.split('\n')
@@ -399,11 +464,9 @@ Set to null if no new patterns emerge or this matches existing behavior."""
                 for line in chunk_lines:
                     line_len = len(line) + 1  # +1 for newline
                     if sub_chunk_len + line_len > self.MAX_CHUNK_SIZE and sub_chunk:
-                        chunks.append({
-                            'content': '\n'.join(sub_chunk).strip(),
-                            'file': file_name,
-                            'section': f"{section} (part {part_num})"
-                        })
+                        chunks.append(Chunk(
+                            '\n'.join(sub_chunk).strip(), file_name, f"{section} (part {part_num})"
+                        ))
                         sub_chunk = []
                         sub_chunk_len = 0
                         part_num += 1
@@ -411,28 +474,22 @@ Set to null if no new patterns emerge or this matches existing behavior."""
                     sub_chunk_len += line_len
 
                 if sub_chunk:
-                    chunks.append({
-                        'content': '\n'.join(sub_chunk).strip(),
-                        'file': file_name,
-                        'section': f"{section} (part {part_num})" if part_num > 1 else section
-                    })
-
-        for line in lines:
-            # Detect section headers
-            if line.startswith('#'):
-                # Save previous chunk if it has content
-                if current_chunk:
-                    add_chunk('\n'.join(current_chunk), current_section)
-                    current_chunk = []
-
-                # Extract section name
-                current_section = line.lstrip('#').strip()
-            else:
-                current_chunk.append(line)
+                    chunks.append(Chunk(
+                        '\n'.join(sub_chunk).strip(),
+                        file_name,
+                        f"{section} (part {part_num})" if part_num > 1 else section
+                    ))
+
+        # One regex scan finds every header line; each section's body is the
+        # slice between its header and the next (text before the first is the intro)
+        section_start = 0
+        current_section = "Introduction"
+        for header in self._HEADER_RE.finditer(content):
+            add_chunk(content[section_start:header.start()], current_section)
+            current_section = header.group().lstrip('#').strip()
+            section_start = header.end()
 
-        # Add final chunk
-        if current_chunk:
-            add_chunk('\n'.join(current_chunk), current_section)
+        add_chunk(content[section_start:], current_section)
 
         return chunks
     
@@ -452,7 +509,8 @@ Set to null if no new patterns emerge or this matches existing behavior."""
             
             self.collection = self.chroma_client.create_collection(
                 name="impulseguard_memory",
-                metadata={"hnsw:space": "cosine"}
+                metadata={"hnsw:space": "cosine"},
+                embedding_function=_EMBEDDING_FUNCTION
             )
             
             # Reset chunk ID tracking
@@ -481,10 +539,10 @@ Set to null if no new patterns emerge or this matches existing behavior."""
                     chunk_id = f"{md_file}_{i}"
                     file_chunk_ids.append(chunk_id)
                     all_ids.append(chunk_id)
-                    all_chunks.append(chunk['content'])
+                    all_chunks.append(chunk.content)
                     all_metadatas.append({
-                        'file': chunk['file'],
-                        'section': chunk['section']
+                        'file': chunk.file,
+                        'section': chunk.section
                     })
                 
                 # Store chunk IDs for this file
@@ -505,6 +563,58 @@ Set to null if no new patterns emerge or this matches existing behavior."""
             print(f"Error reindexing memory: {e}")
             return False
     
+    def _read_full_file(self, filename: str, source: str) -> Optional[Dict[str, Any]]:
+        """
+        Read one whole memory file as a FULL FILE snippet.
+        
+        Opens the file directly (no separate exists() stat) and reads it in
+        one call; a missing file simply raises FileNotFoundError.
+        
+        Args:
+            filename: Memory file name relative to memory_dir
+            source: Snippet source label ('direct_read' or 'fallback_read')
+            
+        Returns:
+            Snippet dict, or None if the file is missing, unreadable or empty
+        """
+        filepath = os.path.join(self.memory_dir, filename)
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading {filename}: {e}")
+            return None
+        if not content:
+            return None
+        return {
+            'content': content,
+            'file': filename,
+            'section': 'FULL FILE',
+            'source': source
+        }
+    
+    async def _read_full_files(self, filenames: List[str], source: str) -> List[Dict[str, Any]]:
+        """
+        Read whole memory files concurrently, skipping missing or empty ones.
+        
+        Each read runs in a worker thread so the files are in flight together
+        instead of blocking the event loop one after another.
+        
+        Args:
+            filenames: Memory file names relative to memory_dir
+            source: Snippet source label ('direct_read' or 'fallback_read')
+            
+        Returns:
+            List of snippets in filenames order
+        """
+        results = await asyncio.gather(*(
+            asyncio.to_thread(self._read_full_file, filename, source)
+            for filename in filenames
+        ))
+        return [snippet for snippet in results if snippet is not None]
+    
     async def retrieve_context(self, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
         """
         Retrieve context from memory files using query-aware retrieval.
@@ -521,25 +631,13 @@ Set to null if no new patterns emerge or this matches existing behavior."""
         Returns:
             List of relevant snippets with metadata
         """
-        snippets = []
-
-        # Step 1: ALWAYS read Goals.md and Budget.md directly (critical context)
-        critical_files = ['Goals.md', 'Budget.md']
-        for filename in critical_files:
-            filepath = os.path.join(self.memory_dir, filename)
-            if os.path.exists(filepath):
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read().strip()
-                        if content:
-                            snippets.append({
-                                'content': content,
-                                'file': filename,
-                                'section': 'FULL FILE',
-                                'source': 'direct_read'
-                            })
-                except Exception as e:
-                    print(f"Error reading {filename}: {e}")
+        # Step 1: ALWAYS read Goals.md and Budget.md directly (critical context).
+        # Started as a task so the reads overlap with the similarity search,
+        # which runs in a worker thread below.
+        direct_reads = asyncio.create_task(
+            self._read_full_files(['Goals.md', 'Budget.md'], 'direct_read')
+        )
+        similar = []
 
         # Step 2: Use similarity search for Behavior.md and State.md chunks only
         try:
@@ -547,7 +645,9 @@ Set to null if no new patterns emerge or this matches existing behavior."""
                 await self.reindex_memory()
 
             # Query only Behavior.md and State.md chunks via similarity
-            results = self.collection.query(
+            # (off the event loop: embedding the query is CPU-bound)
+            results = await asyncio.to_thread(
+                self.collection.query,
                 query_texts=[query],
                 n_results=n_results,
                 where={"file": {"$in": ["Behavior.md", "State.md"]}}
@@ -561,27 +661,14 @@ Set to null if no new patterns emerge or this matches existing behavior."""
                         'section': results['metadatas'][0][i].get('section', 'unknown'),
                         'source': 'similarity_search'
                     }
-                    snippets.append(snippet)
+                    similar.append(snippet)
 
         except Exception as e:
             print(f"Error in similarity search: {e}")
             # Fallback: read Behavior.md and State.md directly if similarity fails
-            fallback_files = ['Behavior.md', 'State.md']
-            for filename in fallback_files:
-                filepath = os.path.join(self.memory_dir, filename)
-                if os.path.exists(filepath):
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            content = f.read().strip()
-                            if content:
-                                snippets.append({
-                                    'content': content,
-                                    'file': filename,
-                                    'section': 'FULL FILE',
-                                    'source': 'fallback_read'
-                                })
-                    except Exception as read_e:
-                        print(f"Error reading {filename}: {read_e}")
+            similar.extend(await self._read_full_files(['Behavior.md', 'State.md'], 'fallback_read'))
+
+        snippets = (await direct_reads) + similar
 
         print(f"[Memory] Retrieved context from {len(snippets)} sources")
         return snippets
@@ -717,6 +804,23 @@ Respond with JSON only:
                 'memory_update': None
             }
     
+    # Keyword routing for memory updates, checked in order; built once rather than per call
+    TARGET_FILE_KEYWORDS = (
+        # Goals.md - future-oriented
+        ('Goals.md', ('goal', 'objective', 'plan', 'aspiration', 'saving for', 'want to', 'aim to')),
+        # Budget.md - limits and violations
+        ('Budget.md', ('budget', 'limit', 'allowance', 'exceeded', 'over budget', 'monthly limit',
+                       'category limit')),
+        # State.md - current financial status
+        ('State.md', ('balance', 'account', 'income', 'savings', 'wealth', 'financial state',
+                      'net worth')),
+    )
+    # One compiled alternation per file, so each category is a single C-level scan
+    _TARGET_FILE_PATTERNS = tuple(
+        (target_file, re.compile('|'.join(map(re.escape, keywords))))
+        for target_file, keywords in TARGET_FILE_KEYWORDS
+    )
+
     def _determine_target_file(self, memory_update: str) -> str:
         """
         Determine which Markdown file should receive the memory update.
@@ -735,20 +839,9 @@ Respond with JSON only:
         """
         update_lower = memory_update.lower()
         
-        # Keywords for Goals.md - future-oriented
-        goal_keywords = ['goal', 'objective', 'plan', 'aspiration', 'saving for', 'want to', 'aim to']
-        if any(kw in update_lower for kw in goal_keywords):
-            return 'Goals.md'
-        
-        # Keywords for Budget.md - limits and violations
-        budget_keywords = ['budget', 'limit', 'allowance', 'exceeded', 'over budget', 'monthly limit', 'category limit']
-        if any(kw in update_lower for kw in budget_keywords):
-            return 'Budget.md'
-        
-        # Keywords for State.md - current financial status
-        state_keywords = ['balance', 'account', 'income', 'savings', 'wealth', 'financial state', 'net worth']
-        if any(kw in update_lower for kw in state_keywords):
-            return 'State.md'
+        for target_file, pattern in self._TARGET_FILE_PATTERNS:
+            if pattern.search(update_lower):
+                return target_file
         
         # Default: Behavior.md - preferences, patterns, habits
         # This includes: "comfortable spending", "tends to", "pattern of", "preference for"
@@ -902,6 +995,11 @@ The refined_content should be the complete file with consolidated observations,
             print(f"[Memory] Too many observations already ({behavior_count}), skipping append to prevent bloat")
             return current_content
     
+    _PLACEHOLDER = "[No patterns recorded yet]"
+    _BEHAVIOR_HEADER = "## Observed Behaviors"
+    # Start of the next '##' header line, other than a repeated Observed Behaviors header
+    _SECTION_END_RE = re.compile(r'^(?!.*## Observed Behaviors)##', re.MULTILINE)
+
     def _simple_append_update(self, current_content: str, new_observation: str, target_file: str) -> str:
         """
         Simple fallback method to append observation without Gemini refinement.
@@ -916,57 +1014,54 @@ The refined_content should be the complete file with consolidated observations,
             Updated content
         """
         # Handle placeholder case - replace it with first observation
-        if "[No patterns recorded yet]" in current_content:
+        if self._PLACEHOLDER in current_content:
             return current_content.replace(
-                "- [No patterns recorded yet]",
+                f"- {self._PLACEHOLDER}",
                 f"- {new_observation}"
             )
         
-        # Count existing observations
-        lines = current_content.split('\n')
-        behavior_count = 0
-        in_behavior_section = False
-        for line in lines:
-            if "## Observed Behaviors" in line:
-                in_behavior_section = True
-            elif line.startswith('##') and in_behavior_section:
-                break
-            elif in_behavior_section and line.strip().startswith('- ') and '[No patterns recorded yet]' not in line:
-                behavior_count += 1
+        header_pos = current_content.find(self._BEHAVIOR_HEADER)
+        if header_pos == -1:
+            return current_content + f"\n\n## Observed Behaviors\n- {new_observation}\n"
+        
+        # The new observation goes directly under the header line
+        insert_at = current_content.find('\n', header_pos)
+        if insert_at == -1:
+            insert_at = len(current_content)
+        
+        # Count existing observations up to the next '##' header
+        section_end = self._SECTION_END_RE.search(current_content, insert_at + 1)
+        section = current_content[insert_at:section_end.start() if section_end else len(current_content)]
+        behavior_count = sum(
+            1 for bullet in self._BULLET_RE.findall(section)
+            if self._BEHAVIOR_HEADER not in bullet
+        )
         
         # Only append if less than 5 observations
-        if behavior_count < 5:
-            if "## Observed Behaviors" in current_content:
-                # Find the section and append after it
-                lines = current_content.split('\n')
-                new_lines = []
-                appended = False
-                for i, line in enumerate(lines):
-                    new_lines.append(line)
-                    if "## Observed Behaviors" in line and not appended:
-                        # Append after the header
-                        new_lines.append(f"- {new_observation}")
-                        appended = True
-                return '\n'.join(new_lines)
-            else:
-                return current_content + f"\n\n## Observed Behaviors\n- {new_observation}\n"
-        else:
-            # Too many entries, return original
+        if behavior_count >= 5:
             return current_content
+        return current_content[:insert_at] + f"\n- {new_observation}" + current_content[insert_at:]
     
     # Threshold for when to use Gemini refinement vs simple append
     REFINEMENT_THRESHOLD = 7  # Use Gemini only when file has >7 observations
 
+    # A '- ' bullet line (group: the bullet with surrounding whitespace stripped)
+    _BULLET_RE = re.compile(r'^[^\S\n]*(- [^\n]*?\S)[^\S\n]*$', re.MULTILINE)
+    # Template placeholders that don't count as real observations
+    _PLACEHOLDER_RE = re.compile(r'\[No |\[AMOUNT\]|\[ \]')
+
     def _count_observations(self, content: str) -> int:
         """Count the number of observations/bullet points in a memory file."""
-        count = 0
-        for line in content.split('\n'):
-            line = line.strip()
-            # Count non-placeholder bullet points
-            if line.startswith('- ') and not any(p in line for p in ['[No ', '[AMOUNT]', '[ ]']):
-                count += 1
-        return count
+        # One regex scan for bullets, then skip non-placeholder ones
+        return sum(
+            1 for bullet in self._BULLET_RE.findall(content)
+            if not self._PLACEHOLDER_RE.search(bullet)
+        )
 
+    def _file_lock(self, file_name: str) -> asyncio.Lock:
+        """The lock serializing updates to one memory file."""
+        return self._file_locks.setdefault(file_name, asyncio.Lock())
+    
     async def apply_memory_update(self, memory_update: str) -> bool:
         """
         Apply memory update to the appropriate Markdown file and update ChromaDB.
@@ -1000,123 +1095,125 @@ The refined_content should be the complete file with consolidated observations,
                 except Exception as perm_error:
                     print(f"[Memory] Warning: Could not change file permissions: {perm_error}")
 
-            # Create backup
-            backup_path = f"{file_path}.backup"
-            shutil.copy2(file_path, backup_path)
+            # Held from backup to write so another update to this file can
+            # neither overwrite this one's observation nor touch its backup
+            async with self._file_lock(target_file):
+                # Create backup
+                backup_path = f"{file_path}.backup"
+                shutil.copy2(file_path, backup_path)
 
-            try:
-                # Read current content
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    current_content = f.read()
+                try:
+                    # Read current content
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        current_content = f.read()
 
-                print(f"[Memory] Applying memory update to {target_file}: {memory_update[:100]}...")
+                    print(f"[Memory] Applying memory update to {target_file}: {memory_update[:100]}...")
 
-                # Count observations to decide refinement strategy
-                observation_count = self._count_observations(current_content)
+                    # Count observations to decide refinement strategy
+                    observation_count = self._count_observations(current_content)
 
-                # Only use Gemini refinement if file has grown large (saves API calls)
-                if observation_count > self.REFINEMENT_THRESHOLD:
-                    print(f"[Memory] File has {observation_count} observations (>{self.REFINEMENT_THRESHOLD}), using Gemini refinement")
-                    try:
-                        refined_content = await self._refine_memory_content(
-                            current_content,
-                            memory_update,
-                            target_file
-                        )
+                    # Only use Gemini refinement if file has grown large (saves API calls)
+                    if observation_count > self.REFINEMENT_THRESHOLD:
+                        print(f"[Memory] File has {observation_count} observations (>{self.REFINEMENT_THRESHOLD}), using Gemini refinement")
+                        try:
+                            refined_content = await self._refine_memory_content(
+                                current_content,
+                                memory_update,
+                                target_file
+                            )
 
-                        # Verify content changed
-                        if refined_content.strip() == current_content.strip():
-                            print(f"[Memory] Warning: Refined content unchanged, using simple append fallback")
+                            # Verify content changed
+                            if refined_content.strip() == current_content.strip():
+                                print(f"[Memory] Warning: Refined content unchanged, using simple append fallback")
+                                refined_content = self._simple_append_update(current_content, memory_update, target_file)
+                        except Exception as refine_error:
+                            print(f"[Memory] Refinement failed: {refine_error}, using simple append fallback")
                             refined_content = self._simple_append_update(current_content, memory_update, target_file)
-                    except Exception as refine_error:
-                        print(f"[Memory] Refinement failed: {refine_error}, using simple append fallback")
+                    else:
+                        print(f"[Memory] File has {observation_count} observations (<={self.REFINEMENT_THRESHOLD}), using simple append")
                         refined_content = self._simple_append_update(current_content, memory_update, target_file)
-                else:
-                    print(f"[Memory] File has {observation_count} observations (<={self.REFINEMENT_THRESHOLD}), using simple append")
-                    refined_content = self._simple_append_update(current_content, memory_update, target_file)
                 
-                # Update last updated timestamp
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                import re
-                if "## Last Updated" in refined_content:
-                    refined_content = re.sub(
-                        r'## Last Updated\n- .*',
-                        f"## Last Updated\n- {timestamp}",
-                        refined_content
-                    )
-                else:
-                    refined_content += f"\n\n## Last Updated\n- {timestamp}"
+                    # Update last updated timestamp
+                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    if "## Last Updated" in refined_content:
+                        refined_content = re.sub(
+                            r'## Last Updated\n- .*',
+                            f"## Last Updated\n- {timestamp}",
+                            refined_content
+                        )
+                    else:
+                        refined_content += f"\n\n## Last Updated\n- {timestamp}"
                 
-                # Write refined content
-                print(f"[Memory] Writing updated content to {target_file} ({len(refined_content)} chars)")
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(refined_content)
+                    # Write refined content
+                    print(f"[Memory] Writing updated content to {target_file} ({len(refined_content)} chars)")
+                    with open(file_path, 'w', encoding='utf-8') as f:
+                        f.write(refined_content)
                 
-                # Verify file was written
-                if os.path.exists(file_path):
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        verify_content = f.read()
-                    if verify_content == refined_content:
-                        print(f"[Memory] Successfully wrote {target_file}")
+                    # Verify file was written
+                    if os.path.exists(file_path):
+                        with open(file_path, 'r', encoding='utf-8') as f:
+                            verify_content = f.read()
+                        if verify_content == refined_content:
+                            print(f"[Memory] Successfully wrote {target_file}")
+                        else:
+                            print(f"[Memory] Warning: File content mismatch after write!")
                     else:
-                        print(f"[Memory] Warning: File content mismatch after write!")
-                else:
-                    print(f"[Memory] Error: File {target_file} does not exist after write!")
+                        print(f"[Memory] Error: File {target_file} does not exist after write!")
                 
-                # Update ChromaDB using upsert
-                chunks = self._chunk_markdown(refined_content, target_file)
+                    # Update ChromaDB using upsert
+                    chunks = self._chunk_markdown(refined_content, target_file)
                 
-                # Get existing chunk IDs for this file
-                existing_ids = self._chunk_ids.get(target_file, [])
+                    # Get existing chunk IDs for this file
+                    existing_ids = self._chunk_ids.get(target_file, [])
                 
-                # Prepare upsert data
-                upsert_ids = []
-                upsert_documents = []
-                upsert_metadatas = []
+                    # Prepare upsert data
+                    upsert_ids = []
+                    upsert_documents = []
+                    upsert_metadatas = []
                 
-                for i, chunk in enumerate(chunks):
-                    chunk_id = f"{target_file}_{i}"
-                    upsert_ids.append(chunk_id)
-                    upsert_documents.append(chunk['content'])
-                    upsert_metadatas.append({
-                        'file': chunk['file'],
-                        'section': chunk['section']
-                    })
+                    for i, chunk in enumerate(chunks):
+                        chunk_id = f"{target_file}_{i}"
+                        upsert_ids.append(chunk_id)
+                        upsert_documents.append(chunk.content)
+                        upsert_metadatas.append({
+                            'file': chunk.file,
+                            'section': chunk.section
+                        })
                 
-                # Upsert to ChromaDB
-                if upsert_ids:
-                    try:
-                        # Ensure ChromaDB directory is writable
-                        if os.path.exists(self.chroma_persist_dir):
-                            os.chmod(self.chroma_persist_dir, 0o755)
+                    # Upsert to ChromaDB
+                    if upsert_ids:
+                        try:
+                            # Ensure ChromaDB directory is writable
+                            if os.path.exists(self.chroma_persist_dir):
+                                os.chmod(self.chroma_persist_dir, 0o755)
                         
-                        self.collection.upsert(
-                            ids=upsert_ids,
-                            documents=upsert_documents,
-                            metadatas=upsert_metadatas
-                        )
+                            self.collection.upsert(
+                                ids=upsert_ids,
+                                documents=upsert_documents,
+                                metadatas=upsert_metadatas
+                            )
                         
-                        # Update chunk ID tracking
-                        self._chunk_ids[target_file] = upsert_ids
-                        print(f"[Memory] Successfully updated ChromaDB for {target_file}")
-                    except Exception as chroma_error:
-                        print(f"[Memory] Warning: ChromaDB upsert failed: {chroma_error}")
-                        print(f"[Memory] File update succeeded, but ChromaDB not updated. Will reindex on next startup.")
-                        # Don't fail the entire operation - file was written successfully
+                            # Update chunk ID tracking
+                            self._chunk_ids[target_file] = upsert_ids
+                            print(f"[Memory] Successfully updated ChromaDB for {target_file}")
+                        except Exception as chroma_error:
+                            print(f"[Memory] Warning: ChromaDB upsert failed: {chroma_error}")
+                            print(f"[Memory] File update succeeded, but ChromaDB not updated. Will reindex on next startup.")
+                            # Don't fail the entire operation - file was written successfully
                 
-                # Remove backup on success
-                if os.path.exists(backup_path):
-                    os.remove(backup_path)
+                    # Remove backup on success
+                    if os.path.exists(backup_path):
+                        os.remove(backup_path)
                 
-                return True
+                    return True
                 
-            except Exception as e:
-                print(f"Error updating file {file_path}: {e}")
-                # Restore backup
-                if os.path.exists(backup_path):
-                    shutil.copy2(backup_path, file_path)
-                    os.remove(backup_path)
-                return False
+                except Exception as e:
+                    print(f"Error updating file {file_path}: {e}")
+                    # Restore backup
+                    if os.path.exists(backup_path):
+                        shutil.copy2(backup_path, file_path)
+                        os.remove(backup_path)
+                    return False
             
         except Exception as e:
             print(f"Error in apply_memory_update: {e}")
@@ -1195,7 +1292,6 @@ Return valid JSON with a "refined_content" field."""
                     if refined_content and refined_content.strip():
                         # Update timestamp
                         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        import re
                         if "## Last Updated" in refined_content:
                             refined_content = re.sub(
                                 r'## Last Updated\n- .*',
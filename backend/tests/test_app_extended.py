@@ -1,18 +1,20 @@
 """
 Extended unit and integration tests for app.py edge cases.
 
-Covers: PipelineRequest boundary values, /gemini-analyze, build_gemini_prompt,
+Covers: PipelineRequest boundary values, /analyze-batch, /gemini-analyze, build_gemini_prompt,
 /update-preferences edge cases, /reset-memory, /health, /consolidate-memory,
 and time_to_cart=null fallback behavior.
 """
 
 import os
-import json
+import functools
+import orjson
 import pytest
-from unittest.mock import patch, Mock, AsyncMock
+from types import SimpleNamespace
 from fastapi.testclient import TestClient
 
-from app import app, build_gemini_prompt, PurchaseAttempt, GeminiAnalyzeRequest
+import app as app_module
+from app import app, build_gemini_prompt, PurchaseAttempt, GeminiAnalyzeRequest, MAX_ANALYZE_BATCH
 
 
 @pytest.fixture
@@ -20,54 +22,65 @@ def client():
     return TestClient(app)
 
 
+def _null_app_attr(name):
+    """Set an app module global to None for one test, restoring it on teardown."""
+    original = getattr(app_module, name)
+    setattr(app_module, name, None)
+    yield
+    setattr(app_module, name, original)
+
+
+@pytest.fixture
+def null_gemini_client():
+    yield from _null_app_attr("gemini_client")
+
+
+@pytest.fixture
+def null_memory_engine(override_engine):
+    override_engine(None)
+
+
+async def _mock_brain(p_impulse_fast, purchase_data, *, impulse_score, intervention):
+    return {
+        "impulse_score": impulse_score,
+        "confidence": 0.7,
+        "reasoning": "Mock reasoning",
+        "intervention_action": intervention,
+        "memory_update": None,
+    }
+
+
+# Slow Brain result fields the batch tests don't vary
+_BASE_SLOW_RESULT = {
+    "confidence": 0.7,
+    "reasoning": "Mock reasoning",
+    "intervention_action": "NONE",
+    "memory_update": None,
+}
+
+
 def _mock_slow_brain(impulse_score=0.5, intervention="NONE"):
     """Helper to create a standard mock for memory_engine.analyze_purchase."""
-    from app import memory_engine
+    return functools.partial(_mock_brain, impulse_score=impulse_score, intervention=intervention)
 
-    orig = memory_engine.analyze_purchase
 
-    async def mock_analyze(p_impulse_fast, purchase_data):
-        return {
-            "impulse_score": impulse_score,
-            "confidence": 0.7,
-            "reasoning": "Mock reasoning",
-            "intervention_action": intervention,
-            "memory_update": None,
-        }
-
-    return orig, mock_analyze
+@pytest.fixture
+def patched_engine(override_engine):
+    """Install an engine whose analyze_purchase is the standard slow-brain mock."""
+    override_engine(SimpleNamespace(analyze_purchase=_mock_slow_brain()))
 
 
 # ── PipelineRequest boundary values ─────────────────────────────────────
 
 class TestPipelineBoundaryValues:
-    def test_system_hour_zero(self, client):
-        orig, mock = _mock_slow_brain()
-        from app import memory_engine
-        memory_engine.analyze_purchase = mock
-        try:
-            resp = client.post("/pipeline-analyze", json={
-                "product": "Test", "cost": 10.0, "website": "test.com",
-                "time_to_cart": 30.0, "time_on_site": 60.0,
-                "click_count": 1, "peak_scroll_velocity": 100.0, "system_hour": 0,
-            })
-            assert resp.status_code == 200
-        finally:
-            memory_engine.analyze_purchase = orig
-
-    def test_system_hour_23(self, client):
-        orig, mock = _mock_slow_brain()
-        from app import memory_engine
-        memory_engine.analyze_purchase = mock
-        try:
-            resp = client.post("/pipeline-analyze", json={
-                "product": "Test", "cost": 10.0, "website": "test.com",
-                "time_to_cart": 30.0, "time_on_site": 60.0,
-                "click_count": 1, "peak_scroll_velocity": 100.0, "system_hour": 23,
-            })
-            assert resp.status_code == 200
-        finally:
-            memory_engine.analyze_purchase = orig
+    @pytest.mark.parametrize("hour", [0, 23])
+    def test_system_hour_boundary(self, client, hour, patched_engine):
+        resp = client.post("/pipeline-analyze", json={
+            "product": "Test", "cost": 10.0, "website": "test.com",
+            "time_to_cart": 30.0, "time_on_site": 60.0,
+            "click_count": 1, "peak_scroll_velocity": 100.0, "system_hour": hour,
+        })
+        assert resp.status_code == 200
 
     def test_system_hour_24_rejected(self, client):
         resp = client.post("/pipeline-analyze", json={
@@ -77,19 +90,13 @@ class TestPipelineBoundaryValues:
         })
         assert resp.status_code == 422
 
-    def test_cost_zero(self, client):
-        orig, mock = _mock_slow_brain()
-        from app import memory_engine
-        memory_engine.analyze_purchase = mock
-        try:
-            resp = client.post("/pipeline-analyze", json={
-                "product": "Free Item", "cost": 0, "website": "test.com",
-                "time_to_cart": 30.0, "time_on_site": 60.0,
-                "click_count": 1, "peak_scroll_velocity": 100.0, "system_hour": 12,
-            })
-            assert resp.status_code == 200
-        finally:
-            memory_engine.analyze_purchase = orig
+    def test_cost_zero(self, client, patched_engine):
+        resp = client.post("/pipeline-analyze", json={
+            "product": "Free Item", "cost": 0, "website": "test.com",
+            "time_to_cart": 30.0, "time_on_site": 60.0,
+            "click_count": 1, "peak_scroll_velocity": 100.0, "system_hour": 12,
+        })
+        assert resp.status_code == 200
 
     def test_negative_cost_rejected(self, client):
         resp = client.post("/pipeline-analyze", json={
@@ -103,71 +110,49 @@ class TestPipelineBoundaryValues:
 # ── time_to_cart=null fallback behavior ─────────────────────────────────
 
 class TestTimeToCartNull:
-    def test_null_ttc_uses_time_on_site(self, client):
-        orig, mock = _mock_slow_brain()
-        from app import memory_engine
-        memory_engine.analyze_purchase = mock
-        try:
-            resp = client.post("/pipeline-analyze", json={
-                "product": "Widget", "cost": 25.0, "website": "test.com",
-                "time_to_cart": None, "time_on_site": 120.0,
-                "click_count": 5, "peak_scroll_velocity": 500.0, "system_hour": 12,
-            })
-            assert resp.status_code == 200
-            data = resp.json()
-            assert 0.0 <= data["p_impulse_fast"] <= 1.0
-        finally:
-            memory_engine.analyze_purchase = orig
-
-    def test_missing_ttc_field_uses_time_on_site(self, client):
-        orig, mock = _mock_slow_brain()
-        from app import memory_engine
-        memory_engine.analyze_purchase = mock
-        try:
-            resp = client.post("/pipeline-analyze", json={
-                "product": "Widget", "cost": 25.0, "website": "test.com",
-                "time_on_site": 120.0,
-                "click_count": 5, "peak_scroll_velocity": 500.0, "system_hour": 12,
-            })
-            assert resp.status_code == 200
-        finally:
-            memory_engine.analyze_purchase = orig
+    @pytest.mark.parametrize("ttc_field", [{"time_to_cart": None}, {}], ids=["null", "missing"])
+    def test_ttc_falls_back_to_time_on_site(self, client, ttc_field, patched_engine):
+        resp = client.post("/pipeline-analyze", json={
+            "product": "Widget", "cost": 25.0, "website": "test.com",
+            **ttc_field, "time_on_site": 120.0,
+            "click_count": 5, "peak_scroll_velocity": 500.0, "system_hour": 12,
+        })
+        assert resp.status_code == 200
+        data = orjson.loads(resp.content)
+        assert 0.0 <= data["p_impulse_fast"] <= 1.0
 
 
 # ── /gemini-analyze ─────────────────────────────────────────────────────
 
 class TestGeminiAnalyze:
-    def test_without_client_returns_fallback(self, client):
-        import app as app_module
-        original_client = app_module.gemini_client
-        app_module.gemini_client = None
-        try:
-            resp = client.post("/gemini-analyze", json={
-                "current_purchase": {
-                    "actionType": "add_to_cart",
-                    "productName": "Test Shoes",
-                    "priceValue": 99.99,
-                    "timeToCart": 15.0,
-                    "timeOnSite": 60.0,
-                    "domain": "amazon.com",
-                },
-            })
-            assert resp.status_code == 200
-            data = resp.json()
-            assert data["risk_level"] == "MEDIUM"
-            assert data["should_intervene"] is True
-            assert "unavailable" in data["reasoning"].lower() or "not configured" in data["personalized_message"].lower()
-        finally:
-            app_module.gemini_client = original_client
+    def test_without_client_returns_fallback(self, client, null_gemini_client):
+        resp = client.post("/gemini-analyze", json={
+            "current_purchase": {
+                "actionType": "add_to_cart",
+                "productName": "Test Shoes",
+                "priceValue": 99.99,
+                "timeToCart": 15.0,
+                "timeOnSite": 60.0,
+                "domain": "amazon.com",
+            },
+        })
+        assert resp.status_code == 200
+        data = orjson.loads(resp.content)
+        assert data["risk_level"] == "MEDIUM"
+        assert data["should_intervene"] is True
+        assert "unavailable" in data["reasoning"].lower() or "not configured" in data["personalized_message"].lower()
 
 
 # ── build_gemini_prompt ─────────────────────────────────────────────────
 
 class TestBuildGeminiPrompt:
-    def test_output_contains_product_info(self):
-        request = GeminiAnalyzeRequest(
-            current_purchase=PurchaseAttempt(
-                actionType="add_to_cart",
+    # Test data is trusted, so requests are built with model_construct() to
+    # skip pydantic validation.
+
+    def test_output_contains_product_info_and_risk_format(self):
+        request = GeminiAnalyzeRequest.model_construct(
+            current_purchase=PurchaseAttempt.model_construct(
+                actionType="buy_now",
                 productName="Wireless Headphones",
                 priceValue=129.99,
                 timeToCart=15.0,
@@ -184,32 +169,20 @@ class TestBuildGeminiPrompt:
         assert "amazon.com" in prompt
         assert "15.0s" in prompt
         assert "$500" in prompt
-
-    def test_output_contains_risk_format(self):
-        request = GeminiAnalyzeRequest(
-            current_purchase=PurchaseAttempt(
-                actionType="buy_now",
-                productName="Test",
-                priceValue=10.0,
-                timeToCart=5.0,
-                timeOnSite=30.0,
-            ),
-        )
-        prompt = build_gemini_prompt(request)
         assert "risk_level" in prompt
         assert "risk_score" in prompt
         assert "BUY NOW" in prompt
 
     def test_history_stats_calculated(self):
-        request = GeminiAnalyzeRequest(
-            current_purchase=PurchaseAttempt(
+        request = GeminiAnalyzeRequest.model_construct(
+            current_purchase=PurchaseAttempt.model_construct(
                 actionType="add_to_cart",
                 timeToCart=10.0,
                 timeOnSite=60.0,
             ),
             purchase_history=[
-                PurchaseAttempt(actionType="add_to_cart", priceValue=50.0, timeToCart=20.0, timeOnSite=60.0),
-                PurchaseAttempt(actionType="add_to_cart", priceValue=30.0, timeToCart=40.0, timeOnSite=90.0),
+                PurchaseAttempt.model_construct(actionType="add_to_cart", priceValue=50.0, timeToCart=20.0, timeOnSite=60.0),
+                PurchaseAttempt.model_construct(actionType="add_to_cart", priceValue=30.0, timeToCart=40.0, timeOnSite=90.0),
             ],
         )
         prompt = build_gemini_prompt(request)
@@ -220,7 +193,6 @@ class TestBuildGeminiPrompt:
 
 class TestUpdatePreferencesEdge:
     def test_missing_budget_file_returns_error(self, client):
-        import app as app_module
         original_dir = app_module.MEMORY_DIR
 
         # Point to empty temp dir
@@ -233,7 +205,7 @@ class TestUpdatePreferencesEdge:
                 "budget": 500.0, "threshold": 50.0, "sensitivity": "medium",
             })
             assert resp.status_code == 200
-            data = resp.json()
+            data = orjson.loads(resp.content)
             assert data["status"] == "error"
             assert data["budget_updated"] is False
         finally:
@@ -243,7 +215,6 @@ class TestUpdatePreferencesEdge:
 
     def test_zero_budget_zero_threshold_rejects(self, client):
         """Zero budget + zero threshold should still be accepted by API (validation is in popup.js)."""
-        import app as app_module
         os.makedirs(app_module.MEMORY_DIR, exist_ok=True)
         budget_path = os.path.join(app_module.MEMORY_DIR, "Budget.md")
         with open(budget_path, "w") as f:
@@ -259,41 +230,33 @@ class TestUpdatePreferencesEdge:
 # ── /reset-memory ───────────────────────────────────────────────────────
 
 class TestResetMemory:
-    def test_writes_all_templates(self, client):
-        import app as app_module
-        from app import memory_engine
-
+    def test_writes_all_templates(self, client, override_engine):
         os.makedirs(app_module.MEMORY_DIR, exist_ok=True)
         for fname in ["Goals.md", "Budget.md", "State.md", "Behavior.md"]:
             with open(os.path.join(app_module.MEMORY_DIR, fname), "w") as f:
                 f.write("dirty content\n")
 
-        orig_reindex = memory_engine.reindex_memory
-
         async def mock_reindex():
             return True
 
-        memory_engine.reindex_memory = mock_reindex
-        try:
-            resp = client.post("/reset-memory", json={})
-            assert resp.status_code == 200
-            data = resp.json()
-            assert data["files_reset"] == 4
+        override_engine(SimpleNamespace(reindex_memory=mock_reindex))
+        resp = client.post("/reset-memory", json={})
+        assert resp.status_code == 200
+        data = orjson.loads(resp.content)
+        assert data["files_reset"] == 4
 
-            # Verify each template was written
-            goals = open(os.path.join(app_module.MEMORY_DIR, "Goals.md")).read()
-            assert "Financial Goals" in goals
+        # Verify each template was written
+        goals = open(os.path.join(app_module.MEMORY_DIR, "Goals.md")).read()
+        assert "Financial Goals" in goals
 
-            budget = open(os.path.join(app_module.MEMORY_DIR, "Budget.md")).read()
-            assert "Monthly Spending Limits" in budget
+        budget = open(os.path.join(app_module.MEMORY_DIR, "Budget.md")).read()
+        assert "Monthly Spending Limits" in budget
 
-            state = open(os.path.join(app_module.MEMORY_DIR, "State.md")).read()
-            assert "Financial Overview" in state
+        state = open(os.path.join(app_module.MEMORY_DIR, "State.md")).read()
+        assert "Financial Overview" in state
 
-            behavior = open(os.path.join(app_module.MEMORY_DIR, "Behavior.md")).read()
-            assert "Observed Behaviors" in behavior
-        finally:
-            memory_engine.reindex_memory = orig_reindex
+        behavior = open(os.path.join(app_module.MEMORY_DIR, "Behavior.md")).read()
+        assert "Observed Behaviors" in behavior
 
 
 # ── /health ─────────────────────────────────────────────────────────────
@@ -302,7 +265,7 @@ class TestHealth:
     def test_health_fields(self, client):
         resp = client.get("/health")
         assert resp.status_code == 200
-        data = resp.json()
+        data = orjson.loads(resp.content)
         assert "status" in data
         assert data["status"] == "healthy"
         assert "memory_indexed" in data
@@ -313,24 +276,13 @@ class TestHealth:
 # ── /consolidate-memory ─────────────────────────────────────────────────
 
 class TestConsolidateMemory:
-    def test_no_engine_returns_error(self, client):
-        import app as app_module
-        original_engine = app_module.memory_engine
-        app_module.memory_engine = None
-        try:
-            resp = client.post("/consolidate-memory", json={})
-            assert resp.status_code == 200
-            data = resp.json()
-            assert data["status"] == "error"
-        finally:
-            app_module.memory_engine = original_engine
-
-    def test_success_path(self, client):
-        import app as app_module
-        from app import memory_engine
-
-        orig = memory_engine.consolidate_memory
+    def test_no_engine_returns_error(self, client, null_memory_engine):
+        resp = client.post("/consolidate-memory", json={})
+        assert resp.status_code == 200
+        data = orjson.loads(resp.content)
+        assert data["status"] == "error"
 
+    def test_success_path(self, client, override_engine):
         async def mock_consolidate():
             return {
                 "Goals.md": {"status": "skipped", "reason": "below thresholds"},
@@ -339,15 +291,49 @@ class TestConsolidateMemory:
                 "Behavior.md": {"status": "consolidated", "old_size": 3000, "new_size": 1000},
             }
 
-        memory_engine.consolidate_memory = mock_consolidate
-        try:
-            resp = client.post("/consolidate-memory", json={})
-            assert resp.status_code == 200
-            data = resp.json()
-            assert data["status"] == "success"
-            assert "Consolidated 1" in data["message"]
-        finally:
-            memory_engine.consolidate_memory = orig
+        override_engine(SimpleNamespace(consolidate_memory=mock_consolidate))
+        resp = client.post("/consolidate-memory", json={})
+        assert resp.status_code == 200
+        data = orjson.loads(resp.content)
+        assert data["status"] == "success"
+        assert "Consolidated 1" in data["message"]
+
+
+# ── /analyze-batch ──────────────────────────────────────────────────────
+
+def _analyze_item(p_impulse_fast):
+    return {"p_impulse_fast": p_impulse_fast, "product": "Widget", "cost": 20.0, "website": "amazon.com"}
+
+
+class TestAnalyzeBatch:
+    def test_results_in_request_order(self, client, override_engine):
+        async def echo(p_impulse_fast, purchase_data):
+            return {**_BASE_SLOW_RESULT, "impulse_score": p_impulse_fast}
+
+        override_engine(SimpleNamespace(analyze_purchase=echo))
+        scores = [0.1, 0.9, 0.4]
+        resp = client.post("/analyze-batch", json={"requests": [_analyze_item(p) for p in scores]})
+        assert resp.status_code == 200
+        results = orjson.loads(resp.content)["results"]
+        assert [r["impulse_score"] for r in results] == scores
+
+    def test_failing_item_falls_back_alone(self, client, override_engine):
+        async def flaky(p_impulse_fast, purchase_data):
+            if p_impulse_fast > 0.5:
+                raise RuntimeError("Gemini down")
+            return {**_BASE_SLOW_RESULT, "impulse_score": 0.2}
+
+        override_engine(SimpleNamespace(analyze_purchase=flaky))
+        resp = client.post("/analyze-batch", json={"requests": [_analyze_item(0.3), _analyze_item(0.8)]})
+        assert resp.status_code == 200
+        ok, fallback = orjson.loads(resp.content)["results"]
+        assert ok["confidence"] == 0.7
+        assert fallback["impulse_score"] == 0.8 and fallback["confidence"] == 0.3
+
+    @pytest.mark.parametrize("size", [0, MAX_ANALYZE_BATCH + 1])
+    def test_batch_size_bounds(self, client, size):
+        resp = client.post("/analyze-batch", json={"requests": [_analyze_item(0.5)] * size})
+        assert resp.status_code == 422
 
 
 # ── Root endpoint ───────────────────────────────────────────────────────
@@ -356,13 +342,14 @@ class TestRootEndpoint:
     def test_root_returns_version(self, client):
         resp = client.get("/")
         assert resp.status_code == 200
-        data = resp.json()
+        data = orjson.loads(resp.content)
         assert data["version"] == "2.1.0"
         assert "endpoints" in data
         assert "/pipeline-analyze" in data["endpoints"]
 
     def test_root_shows_brain_availability(self, client):
         resp = client.get("/")
-        data = resp.json()
+        assert resp.status_code == 200
+        data = orjson.loads(resp.content)
         assert "fast_brain_available" in data
         assert "slow_brain_available" in data
@@ -6,12 +6,14 @@ and always return bounded, well-typed responses.
 """
 
 import math
+from types import MappingProxyType, SimpleNamespace
+import orjson
 import pytest
 from hypothesis import given, settings, assume, HealthCheck
 from hypothesis import strategies as st
 from fastapi.testclient import TestClient
 
-from app import app
+from app import app, get_memory_engine
 
 
 @pytest.fixture
@@ -19,6 +21,56 @@ def client():
     return TestClient(app)
 
 
+# The constant Slow Brain result is prebuilt once and returned as-is; the app
+# only reads from it. The passthrough stub builds a fresh dict per call from a
+# read-only base, so results from different examples never alias.
+_MOCK_RESULT = {
+    "impulse_score": 0.5,
+    "confidence": 0.7,
+    "reasoning": "ok",
+    "intervention_action": "NONE",
+    "memory_update": None,
+}
+
+_PASSTHROUGH_RESULT = MappingProxyType({
+    "confidence": 0.7,
+    "reasoning": "fuzz test",
+    "intervention_action": "MIRROR",
+    "memory_update": None,
+})
+
+
+async def _mock_analyze_constant(p_impulse_fast, purchase_data):
+    return _MOCK_RESULT
+
+
+async def _mock_analyze_passthrough(p_impulse_fast, purchase_data):
+    """Echo the (clamped) Fast Brain score as the final impulse_score."""
+    return {**_PASSTHROUGH_RESULT, "impulse_score": min(max(p_impulse_fast, 0.0), 1.0)}
+
+
+def _override_engine(analyze):
+    """Inject a stand-in engine via dependency_overrides for one test function."""
+    app.dependency_overrides[get_memory_engine] = lambda: SimpleNamespace(analyze_purchase=analyze)
+    yield
+    app.dependency_overrides.pop(get_memory_engine, None)
+
+
+@pytest.fixture
+def constant_engine():
+    yield from _override_engine(_mock_analyze_constant)
+
+
+@pytest.fixture
+def passthrough_engine():
+    yield from _override_engine(_mock_analyze_passthrough)
+
+
+# The fuzz tests below use derandomize=True with no example database: every run
+# replays the same deterministic examples, so CI results are reproducible and
+# nothing is read from or written to .hypothesis/.
+
+
 # ── /pipeline-analyze: valid ranges always produce 200 with bounded score ──
 
 @given(
@@ -29,46 +81,31 @@ def client():
     scroll_vel=st.floats(min_value=0.0, max_value=100000.0, allow_nan=False, allow_infinity=False),
     hour=st.integers(min_value=0, max_value=23),
 )
-@settings(max_examples=50, suppress_health_check=[HealthCheck.function_scoped_fixture])
-def test_pipeline_valid_ranges_200(client, cost, ttc, time_on_site, click_count, scroll_vel, hour):
+@settings(derandomize=True, database=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+def test_pipeline_valid_ranges_200(client, passthrough_engine, cost, ttc, time_on_site, click_count, scroll_vel, hour):
     """Valid PipelineRequest ranges always produce 200 with bounded impulse_score."""
-    from app import memory_engine
-    orig = memory_engine.analyze_purchase
-
-    async def mock_analyze(p_impulse_fast, purchase_data):
-        return {
-            "impulse_score": min(max(p_impulse_fast, 0.0), 1.0),
-            "confidence": 0.7,
-            "reasoning": "fuzz test",
-            "intervention_action": "MIRROR",
-            "memory_update": None,
-        }
-
-    memory_engine.analyze_purchase = mock_analyze
-    try:
-        resp = client.post("/pipeline-analyze", json={
-            "product": "Fuzz Widget",
-            "cost": cost,
-            "website": "test.com",
-            "time_to_cart": ttc,
-            "time_on_site": time_on_site,
-            "click_count": click_count,
-            "peak_scroll_velocity": scroll_vel,
-            "system_hour": hour,
-        })
-        assert resp.status_code == 200
-        data = resp.json()
-        assert 0.0 <= data["p_impulse_fast"] <= 1.0
-        assert 0.0 <= data["impulse_score"] <= 1.0
-        assert math.isfinite(data["p_impulse_fast"])
-    finally:
-        memory_engine.analyze_purchase = orig
+    resp = client.post("/pipeline-analyze", json={
+        "product": "Fuzz Widget",
+        "cost": cost,
+        "website": "test.com",
+        "time_to_cart": ttc,
+        "time_on_site": time_on_site,
+        "click_count": click_count,
+        "peak_scroll_velocity": scroll_vel,
+        "system_hour": hour,
+    })
+    assert resp.status_code == 200
+    data = orjson.loads(resp.content)
+    assert 0.0 <= data["p_impulse_fast"] <= 1.0
+    assert 0.0 <= data["impulse_score"] <= 1.0
+    assert math.isfinite(data["p_impulse_fast"])
 
 
 # ── Invalid system_hour produces 422 ────────────────────────────────────
 
-@given(hour=st.integers(min_value=24, max_value=1000))
-@settings(max_examples=20, suppress_health_check=[HealthCheck.function_scoped_fixture])
+# The 422 is constant across the whole invalid range, so a handful of explicit
+# values covers it without paying for Hypothesis generation.
+@pytest.mark.parametrize("hour", [24, 25, 100, 999, -1, -100, -1000])
 def test_pipeline_invalid_hour_422(client, hour):
     resp = client.post("/pipeline-analyze", json={
         "product": "Test",
@@ -83,126 +120,62 @@ def test_pipeline_invalid_hour_422(client, hour):
     assert resp.status_code == 422
 
 
-@given(hour=st.integers(min_value=-1000, max_value=-1))
-@settings(max_examples=20, suppress_health_check=[HealthCheck.function_scoped_fixture])
-def test_pipeline_negative_hour_422(client, hour):
+# ── Unicode/emoji product names don't crash ─────────────────────────────
+
+@given(product=st.text(min_size=1, max_size=200))
+@settings(derandomize=True, database=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+def test_pipeline_unicode_product_names(client, constant_engine, product):
     resp = client.post("/pipeline-analyze", json={
-        "product": "Test",
+        "product": product,
         "cost": 10.0,
         "website": "test.com",
-        "time_to_cart": 10.0,
+        "time_to_cart": 30.0,
         "time_on_site": 60.0,
         "click_count": 1,
         "peak_scroll_velocity": 100.0,
-        "system_hour": hour,
+        "system_hour": 12,
     })
-    assert resp.status_code == 422
-
-
-# ── Unicode/emoji product names don't crash ─────────────────────────────
-
-@given(product=st.text(min_size=1, max_size=200))
-@settings(max_examples=50, suppress_health_check=[HealthCheck.function_scoped_fixture])
-def test_pipeline_unicode_product_names(client, product):
-    from app import memory_engine
-    orig = memory_engine.analyze_purchase
-
-    async def mock_analyze(p_impulse_fast, purchase_data):
-        return {
-            "impulse_score": 0.5,
-            "confidence": 0.7,
-            "reasoning": "ok",
-            "intervention_action": "NONE",
-            "memory_update": None,
-        }
-
-    memory_engine.analyze_purchase = mock_analyze
-    try:
-        resp = client.post("/pipeline-analyze", json={
-            "product": product,
-            "cost": 10.0,
-            "website": "test.com",
-            "time_to_cart": 30.0,
-            "time_on_site": 60.0,
-            "click_count": 1,
-            "peak_scroll_velocity": 100.0,
-            "system_hour": 12,
-        })
-        assert resp.status_code == 200
-    finally:
-        memory_engine.analyze_purchase = orig
+    assert resp.status_code == 200
 
 
 # ── Extreme cost values don't crash ─────────────────────────────────────
 
 @given(cost=st.floats(min_value=0.0, max_value=1e9, allow_nan=False, allow_infinity=False))
-@settings(max_examples=30, suppress_health_check=[HealthCheck.function_scoped_fixture])
-def test_pipeline_extreme_cost(client, cost):
-    from app import memory_engine
-    orig = memory_engine.analyze_purchase
-
-    async def mock_analyze(p_impulse_fast, purchase_data):
-        return {
-            "impulse_score": 0.5,
-            "confidence": 0.7,
-            "reasoning": "ok",
-            "intervention_action": "NONE",
-            "memory_update": None,
-        }
-
-    memory_engine.analyze_purchase = mock_analyze
-    try:
-        resp = client.post("/pipeline-analyze", json={
-            "product": "Expensive Item",
-            "cost": cost,
-            "website": "luxury.com",
-            "time_to_cart": 30.0,
-            "time_on_site": 60.0,
-            "click_count": 1,
-            "peak_scroll_velocity": 100.0,
-            "system_hour": 12,
-        })
-        assert resp.status_code == 200
-    finally:
-        memory_engine.analyze_purchase = orig
+@settings(derandomize=True, database=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+def test_pipeline_extreme_cost(client, constant_engine, cost):
+    resp = client.post("/pipeline-analyze", json={
+        "product": "Expensive Item",
+        "cost": cost,
+        "website": "luxury.com",
+        "time_to_cart": 30.0,
+        "time_on_site": 60.0,
+        "click_count": 1,
+        "peak_scroll_velocity": 100.0,
+        "system_hour": 12,
+    })
+    assert resp.status_code == 200
 
 
 # ── Response intervention_action is always one of 4 valid values ────────
 
 @given(hour=st.integers(min_value=0, max_value=23))
-@settings(max_examples=24, suppress_health_check=[HealthCheck.function_scoped_fixture])
-def test_pipeline_intervention_always_valid(client, hour):
-    from app import memory_engine
-    orig = memory_engine.analyze_purchase
-
-    async def mock_analyze(p_impulse_fast, purchase_data):
-        return {
-            "impulse_score": p_impulse_fast,
-            "confidence": 0.7,
-            "reasoning": "ok",
-            "intervention_action": "MIRROR",
-            "memory_update": None,
-        }
-
-    memory_engine.analyze_purchase = mock_analyze
-    try:
-        resp = client.post("/pipeline-analyze", json={
-            "product": "Test",
-            "cost": 50.0,
-            "website": "amazon.com",
-            "time_to_cart": 15.0,
-            "time_on_site": 60.0,
-            "click_count": 5,
-            "peak_scroll_velocity": 1000.0,
-            "system_hour": hour,
-        })
-        assert resp.status_code == 200
-        data = resp.json()
-        valid_actions = {"NONE", "MIRROR", "COOLDOWN", "PHRASE"}
-        assert data["fast_brain_intervention"] in valid_actions
-        assert data["intervention_action"] in valid_actions
-    finally:
-        memory_engine.analyze_purchase = orig
+@settings(max_examples=24, derandomize=True, database=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+def test_pipeline_intervention_always_valid(client, passthrough_engine, hour):
+    resp = client.post("/pipeline-analyze", json={
+        "product": "Test",
+        "cost": 50.0,
+        "website": "amazon.com",
+        "time_to_cart": 15.0,
+        "time_on_site": 60.0,
+        "click_count": 5,
+        "peak_scroll_velocity": 1000.0,
+        "system_hour": hour,
+    })
+    assert resp.status_code == 200
+    data = orjson.loads(resp.content)
+    valid_actions = {"NONE", "MIRROR", "COOLDOWN", "PHRASE"}
+    assert data["fast_brain_intervention"] in valid_actions
+    assert data["intervention_action"] in valid_actions
 
 
 # ── /analyze: valid score + data returns 200 ────────────────────────────
@@ -211,39 +184,23 @@ def test_pipeline_intervention_always_valid(client, hour):
     score=st.floats(min_value=0.0, max_value=1.0),
     cost=st.floats(min_value=0.0, max_value=100000.0, allow_nan=False, allow_infinity=False),
 )
-@settings(max_examples=30, suppress_health_check=[HealthCheck.function_scoped_fixture])
-def test_analyze_valid_inputs(client, score, cost):
-    from app import memory_engine
-    orig = memory_engine.analyze_purchase
-
-    async def mock_analyze(p_impulse_fast, purchase_data):
-        return {
-            "impulse_score": p_impulse_fast,
-            "confidence": 0.7,
-            "reasoning": "ok",
-            "intervention_action": "NONE",
-            "memory_update": None,
-        }
-
-    memory_engine.analyze_purchase = mock_analyze
-    try:
-        resp = client.post("/analyze", json={
-            "p_impulse_fast": score,
-            "product": "Test",
-            "cost": cost,
-            "website": "test.com",
-        })
-        assert resp.status_code == 200
-        data = resp.json()
-        assert 0.0 <= data["impulse_score"] <= 1.0
-    finally:
-        memory_engine.analyze_purchase = orig
+@settings(derandomize=True, database=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+def test_analyze_valid_inputs(client, passthrough_engine, score, cost):
+    resp = client.post("/analyze", json={
+        "p_impulse_fast": score,
+        "product": "Test",
+        "cost": cost,
+        "website": "test.com",
+    })
+    assert resp.status_code == 200
+    data = orjson.loads(resp.content)
+    assert 0.0 <= data["impulse_score"] <= 1.0
 
 
 # ── /analyze: invalid score rejected ────────────────────────────────────
 
 @given(score=st.floats(min_value=1.01, max_value=1000.0))
-@settings(max_examples=20, suppress_health_check=[HealthCheck.function_scoped_fixture])
+@settings(derandomize=True, database=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
 def test_analyze_score_above_one_rejected(client, score):
     resp = client.post("/analyze", json={
         "p_impulse_fast": score,
@@ -255,7 +212,7 @@ def test_analyze_score_above_one_rejected(client, score):
 
 
 @given(score=st.floats(max_value=-0.01, min_value=-1000.0))
-@settings(max_examples=20, suppress_health_check=[HealthCheck.function_scoped_fixture])
+@settings(derandomize=True, database=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
 def test_analyze_negative_score_rejected(client, score):
     resp = client.post("/analyze", json={
         "p_impulse_fast": score,
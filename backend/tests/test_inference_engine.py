@@ -3,16 +3,18 @@ Unit tests for the Fast Brain (ImpulseInferenceEngine).
 """
 
 import pytest
+from types import MappingProxyType
 from inference_engine import ImpulseInferenceEngine
 
 
-# Valid baseline that satisfies the engine's required keys
-VALID_BASELINE = {
+# Valid baseline that satisfies the engine's required keys. Read-only so
+# tests sharing it (and the module-scoped engine) cannot mutate it.
+VALID_BASELINE = MappingProxyType({
     "scroll_velocity": {"mean": 600.0, "std": 5500.0},
     "click_rate": {"mean": 0.15, "std": 1.0},
     "time_on_site": {"mean": 180.0, "std": 110.0},
     "time_to_cart": {"mean": 2.5, "std": 32.0},
-}
+})
 
 
 def _make_engine(baseline=None, prior_p=0.2):
@@ -21,11 +23,17 @@ def _make_engine(baseline=None, prior_p=0.2):
     )
 
 
+@pytest.fixture(scope="module")
+def engine():
+    """Engine shared by the read-only tests; construction is covered separately."""
+    return _make_engine()
+
+
 # ── Initialization ──────────────────────────────────────────────────────
 
 def test_init_with_valid_baselines():
     engine = _make_engine()
-    assert engine.prior_p == 0.2
+    assert engine.prior_p == pytest.approx(0.2)
     assert engine.baseline_data == VALID_BASELINE
 
 
@@ -47,9 +55,8 @@ def test_init_missing_mean_or_std():
 
 # ── calculate_p_impulse ────────────────────────────────────────────────
 
-def test_neutral_inputs_low_score():
+def test_neutral_inputs_low_score(engine):
     """Neutral telemetry (at baseline means) should produce a low score."""
-    engine = _make_engine()
     data = {
         "emotion_arousal": 0.5,
         "click_rate": 0.15,
@@ -59,12 +66,13 @@ def test_neutral_inputs_low_score():
         "website_name": "bestbuy",
     }
     score = engine.calculate_p_impulse(data)
+    # Currently ≈0.066 (weighted 0.22 before the prior-0.2 update); the bound
+    # is the MIRROR threshold, leaving wide margin for weight tweaks.
     assert score < 0.3, f"Neutral inputs should give <0.3, got {score}"
 
 
-def test_high_impulse_inputs():
+def test_high_impulse_inputs(engine):
     """Extreme telemetry should push the score above 0.5."""
-    engine = _make_engine()
     data = {
         "emotion_arousal": 0.95,
         "click_rate": 5.0,
@@ -74,12 +82,12 @@ def test_high_impulse_inputs():
         "website_name": "amazon",
     }
     score = engine.calculate_p_impulse(data)
+    # Currently 1.0 (multipliers saturate the clamp); 0.5 leaves wide margin.
     assert score > 0.5, f"High-impulse inputs should give >0.5, got {score}"
 
 
-def test_output_bounded_zero_one():
+def test_output_bounded_zero_one(engine):
     """Score must always be in [0, 1] regardless of inputs."""
-    engine = _make_engine()
     extreme_cases = [
         {"emotion_arousal": 0.0, "click_rate": 0.0, "scroll_velocity_peak": 0.0,
          "time_to_cart": 99999, "system_time": 12, "website_name": "educational"},
@@ -93,34 +101,26 @@ def test_output_bounded_zero_one():
 
 # ── Intervention thresholds ────────────────────────────────────────────
 
-def test_intervention_none():
-    engine = _make_engine()
-    assert engine.get_intervention_level(0.1) == "NONE"
-    assert engine.get_intervention_level(0.29) == "NONE"
-
-
-def test_intervention_mirror():
-    engine = _make_engine()
-    assert engine.get_intervention_level(0.3) == "MIRROR"
-    assert engine.get_intervention_level(0.59) == "MIRROR"
-
-
-def test_intervention_cooldown():
-    engine = _make_engine()
-    assert engine.get_intervention_level(0.6) == "COOLDOWN"
-    assert engine.get_intervention_level(0.84) == "COOLDOWN"
-
-
-def test_intervention_phrase():
-    engine = _make_engine()
-    assert engine.get_intervention_level(0.85) == "PHRASE"
-    assert engine.get_intervention_level(1.0) == "PHRASE"
+@pytest.mark.parametrize(
+    "score, level",
+    [
+        (0.1, "NONE"),
+        (0.29, "NONE"),
+        (0.3, "MIRROR"),
+        (0.59, "MIRROR"),
+        (0.6, "COOLDOWN"),
+        (0.84, "COOLDOWN"),
+        (0.85, "PHRASE"),
+        (1.0, "PHRASE"),
+    ],
+)
+def test_intervention_levels(engine, score, level):
+    assert engine.get_intervention_level(score) == level
 
 
 # ── Late-night multiplier ─────────────────────────────────────────────
 
-def test_late_night_higher_than_midday():
-    engine = _make_engine()
+def test_late_night_higher_than_midday(engine):
     base_data = {
         "emotion_arousal": 0.7,
         "click_rate": 1.0,
@@ -140,26 +140,22 @@ def test_late_night_higher_than_midday():
 
 # ── Website risk factors ──────────────────────────────────────────────
 
-def test_website_risk_amazon():
-    engine = _make_engine()
-    assert engine._get_website_risk_factor("amazon.com") == 1.5
+def test_website_risk_amazon(engine):
+    assert engine._get_website_risk_factor("amazon.com") == pytest.approx(1.5)
 
 
-def test_website_risk_gambling():
-    engine = _make_engine()
-    assert engine._get_website_risk_factor("online-casino.com") == 2.0
+def test_website_risk_gambling(engine):
+    assert engine._get_website_risk_factor("online-casino.com") == pytest.approx(2.0)
 
 
-def test_website_risk_educational():
-    engine = _make_engine()
-    assert engine._get_website_risk_factor("coursera.edu") == 0.5
+def test_website_risk_educational(engine):
+    assert engine._get_website_risk_factor("coursera.edu") == pytest.approx(0.5)
 
 
 # ── TTC inverse relationship ──────────────────────────────────────────
 
-def test_ttc_fast_cart_higher_score():
+def test_ttc_fast_cart_higher_score(engine):
     """Faster time-to-cart should produce a higher impulse score."""
-    engine = _make_engine()
     base = {
         "emotion_arousal": 0.5,
         "click_rate": 0.15,
@@ -177,45 +173,40 @@ def test_ttc_fast_cart_higher_score():
 # ── Z-score edge case ─────────────────────────────────────────────────
 
 def test_z_score_zero_std():
-    engine = _make_engine()
-    assert engine._calculate_z_score(100.0, 50.0, 0.0) == 0.0
+    engine = _make_engine({**VALID_BASELINE, "click_rate": {"mean": 50.0, "std": 0.0}})
+    scroll_z, click_z = engine._calculate_z_scores([6100.0, 100.0]).tolist()
+    assert click_z == pytest.approx(0.0)
+    assert scroll_z == pytest.approx(1.0)  # only the zero-std feature is zeroed
 
 
 # ── Structured output ─────────────────────────────────────────────────
 
-def test_structured_output_keys():
-    engine = _make_engine()
-    data = {
-        "emotion_arousal": 0.5,
+@pytest.fixture(scope="module")
+def structured_out(engine):
+    """Structured output for a high-arousal payload, computed once for the module."""
+    return engine.get_structured_output({
+        "emotion_arousal": 0.9,       # high arousal → should dominate
         "click_rate": 0.15,
         "scroll_velocity_peak": 600.0,
-        "time_to_cart": 60.0,
+        "time_to_cart": 300.0,
         "system_time": 12,
         "website_name": "bestbuy",
-    }
-    output = engine.get_structured_output(data)
-    assert "p_impulse" in output
-    assert "dominant_trigger" in output
-    assert "logic_summary" in output
-    assert "z_scores" in output["logic_summary"]
-    assert "likelihoods" in output["logic_summary"]
-    assert "weighted_contributions" in output["logic_summary"]
-    assert "context_factors" in output["logic_summary"]
+    })
+
+
+def test_structured_output_keys(structured_out):
+    assert "p_impulse" in structured_out
+    assert "dominant_trigger" in structured_out
+    assert "logic_summary" in structured_out
+    assert "z_scores" in structured_out["logic_summary"]
+    assert "likelihoods" in structured_out["logic_summary"]
+    assert "weighted_contributions" in structured_out["logic_summary"]
+    assert "context_factors" in structured_out["logic_summary"]
 
 
-def test_dominant_trigger_identification():
+def test_dominant_trigger_identification(structured_out):
     """Dominant trigger must be a known feature key and come from weighted contributions."""
-    engine = _make_engine()
-    data = {
-        "emotion_arousal": 0.9,       # high arousal → should dominate
-        "click_rate": 0.15,
-        "scroll_velocity_peak": 600.0,
-        "time_to_cart": 300.0,
-        "system_time": 12,
-        "website_name": "bestbuy",
-    }
-    output = engine.get_structured_output(data)
     valid_triggers = {"scroll_velocity", "emotion_arousal", "click_rate", "time_to_cart"}
-    assert output["dominant_trigger"] in valid_triggers
+    assert structured_out["dominant_trigger"] in valid_triggers
     # With arousal at 0.9 (weight 0.19 → contribution 0.171) it should dominate
-    assert output["dominant_trigger"] == "emotion_arousal"
+    assert structured_out["dominant_trigger"] == "emotion_arousal"
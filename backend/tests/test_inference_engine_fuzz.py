@@ -6,11 +6,14 @@ and never produce NaN/infinity regardless of input.
 """
 
 import math
+import numpy as np
 import pytest
-from hypothesis import given, settings, assume
+from types import MappingProxyType
+from hypothesis import given, settings, assume, Phase
 from hypothesis import strategies as st
+from hypothesis.extra.numpy import arrays
 
-from inference_engine import ImpulseInferenceEngine
+from inference_engine import ImpulseInferenceEngine, _LATE_NIGHT_MULTIPLIERS
 
 
 VALID_BASELINE = {
@@ -21,30 +24,40 @@ VALID_BASELINE = {
 }
 
 
-def _make_engine():
+@pytest.fixture(scope="session")
+def engine():
+    """One engine for every property test; it holds no per-call state."""
     return ImpulseInferenceEngine(baseline_data=VALID_BASELINE, prior_p=0.2)
 
 
-# ── calculate_p_impulse always in [0, 1] ────────────────────────────────
-
-@given(
-    arousal=st.floats(min_value=0.0, max_value=1.0),
-    click_rate=st.floats(min_value=0.0, max_value=100.0),
-    scroll_vel=st.floats(min_value=0.0, max_value=100000.0),
-    ttc=st.floats(min_value=0.01, max_value=10000.0),
-    hour=st.integers(min_value=0, max_value=23),
-)
-@settings(max_examples=200)
-def test_p_impulse_always_bounded(arousal, click_rate, scroll_vel, ttc, hour):
-    engine = _make_engine()
-    data = {
-        "emotion_arousal": arousal,
-        "click_rate": click_rate,
-        "scroll_velocity_peak": scroll_vel,
-        "time_to_cart": ttc,
-        "system_time": hour,
+@st.composite
+def valid_input(draw):
+    """Telemetry dict with every feature drawn from its valid range."""
+    return {
+        "emotion_arousal": draw(st.floats(min_value=0.0, max_value=1.0)),
+        "click_rate": draw(st.floats(min_value=0.0, max_value=100.0)),
+        "scroll_velocity_peak": draw(st.floats(min_value=0.0, max_value=100000.0)),
+        "time_to_cart": draw(st.floats(min_value=0.01, max_value=10000.0)),
+        "system_time": draw(st.integers(min_value=0, max_value=23)),
         "website_name": "amazon",
     }
+
+
+# ── calculate_p_impulse always in [0, 1] ────────────────────────────────
+
+# The vectorized-helper properties draw _BATCH distinct values per example
+# and check them in one NumPy call; scalar helpers take one input per example.
+_BATCH = 200
+
+# Pure-math properties: skip the example database and shrinking (a failing
+# input is easy to re-derive), and let batched examples run past the deadline.
+# max_examples comes from the active profile (see conftest.py).
+FAST = settings(deadline=None, database=None, phases=[Phase.generate])
+
+
+@given(data=valid_input())
+@FAST
+def test_p_impulse_always_bounded(engine, data):
     score = engine.calculate_p_impulse(data)
     assert 0.0 <= score <= 1.0
     assert math.isfinite(score)
@@ -53,24 +66,30 @@ def test_p_impulse_always_bounded(arousal, click_rate, scroll_vel, ttc, hour):
 # ── get_intervention_level returns valid string for any score in [0, 1] ──
 
 @given(score=st.floats(min_value=0.0, max_value=1.0))
-@settings(max_examples=200)
-def test_intervention_level_valid_for_any_score(score):
-    engine = _make_engine()
+@FAST
+def test_intervention_level_valid_for_any_score(engine, score):
     level = engine.get_intervention_level(score)
     assert level in {"NONE", "MIRROR", "COOLDOWN", "PHRASE"}
 
 
-# ── _calculate_z_score handles zero std safely ──────────────────────────
+# ── _calculate_z_scores handles zero std safely ─────────────────────────
+
+def _z_engine(mean, std):
+    """Engine whose z-scored baselines all share one mean and std."""
+    baseline = {**VALID_BASELINE}
+    for key in ImpulseInferenceEngine.Z_SCORE_FEATURES:
+        baseline[key] = {"mean": mean, "std": std}
+    return ImpulseInferenceEngine(baseline_data=baseline, prior_p=0.2)
+
 
 @given(
     value=st.floats(min_value=-1e6, max_value=1e6, allow_nan=False, allow_infinity=False),
     mean=st.floats(min_value=-1e6, max_value=1e6, allow_nan=False, allow_infinity=False),
 )
-@settings(max_examples=100)
+@FAST
 def test_z_score_zero_std_safe(value, mean):
-    engine = _make_engine()
-    z = engine._calculate_z_score(value, mean, 0.0)
-    assert z == 0.0
+    z = _z_engine(mean, 0.0)._calculate_z_scores([value, value])
+    assert np.all(z == 0.0)
 
 
 @given(
@@ -78,74 +97,102 @@ def test_z_score_zero_std_safe(value, mean):
     mean=st.floats(min_value=-1e6, max_value=1e6, allow_nan=False, allow_infinity=False),
     std=st.floats(min_value=0.001, max_value=1e6, allow_nan=False, allow_infinity=False),
 )
-@settings(max_examples=100)
+@FAST
 def test_z_score_always_finite(value, mean, std):
-    engine = _make_engine()
-    z = engine._calculate_z_score(value, mean, std)
-    assert math.isfinite(z)
+    z = _z_engine(mean, std)._calculate_z_scores([value, value])
+    assert np.all(np.isfinite(z))
+
+
+@given(
+    values=arrays(
+        np.float64,
+        (_BATCH, len(ImpulseInferenceEngine.Z_SCORE_FEATURES)),
+        elements=st.floats(min_value=-1e6, max_value=1e6),
+        unique=True,
+    )
+)
+@FAST
+def test_z_scores_batch_always_finite(engine, values):
+    z = engine._calculate_z_scores(values)
+    assert z.shape == values.shape
+    assert np.all(np.isfinite(z))
 
 
 # ── _sigmoid_likelihood bounded for extreme z-scores ────────────────────
 
-@given(z=st.floats(min_value=-100.0, max_value=100.0))
-@settings(max_examples=200)
-def test_sigmoid_bounded(z):
-    engine = _make_engine()
-    lik = engine._sigmoid_likelihood(z)
-    assert engine.LIKELIHOOD_MIN <= lik <= engine.LIKELIHOOD_MAX
-    assert math.isfinite(lik)
+@given(zs=arrays(
+    np.float64, _BATCH, elements=st.floats(min_value=-100.0, max_value=100.0), unique=True
+))
+@FAST
+def test_sigmoid_bounded(engine, zs):
+    liks = engine._sigmoid_likelihoods(zs)
+    assert np.all(np.isfinite(liks))
+    assert np.all((liks >= engine.LIKELIHOOD_MIN) & (liks <= engine.LIKELIHOOD_MAX))
 
 
 # ── _calculate_ttc_likelihood bounded for any positive float ────────────
 
 @given(ttc=st.floats(min_value=0.0, max_value=100000.0))
-@settings(max_examples=200)
-def test_ttc_likelihood_bounded(ttc):
-    engine = _make_engine()
+@FAST
+def test_ttc_likelihood_bounded(engine, ttc):
     lik = engine._calculate_ttc_likelihood(ttc)
     assert 0.0 <= lik <= 1.0
     assert math.isfinite(lik)
 
 
-def test_ttc_likelihood_zero():
-    engine = _make_engine()
-    assert engine._calculate_ttc_likelihood(0.0) == 1.0
-
-
-def test_ttc_likelihood_negative():
-    engine = _make_engine()
-    assert engine._calculate_ttc_likelihood(-10.0) == 1.0
+@pytest.mark.parametrize("ttc,expected", [(0.0, 1.0), (-10.0, 1.0)])
+def test_ttc_likelihood_special(engine, ttc, expected):
+    assert engine._calculate_ttc_likelihood(ttc) == expected
 
 
 # ── _get_late_night_multiplier bounded [1.0, 1.5] for hours [0, 23] ────
 
 @given(hour=st.integers(min_value=0, max_value=23))
-@settings(max_examples=24)
-def test_late_night_multiplier_bounded(hour):
-    engine = _make_engine()
+@settings(FAST, max_examples=24)
+def test_late_night_multiplier_bounded(engine, hour):
     mult = engine._get_late_night_multiplier(hour)
     assert 1.0 <= mult <= 1.5
+    assert mult is _LATE_NIGHT_MULTIPLIERS[hour]  # served from the precomputed table
 
 
-def test_late_night_peak_at_3am():
-    engine = _make_engine()
-    assert engine._get_late_night_multiplier(3) == 1.5
+@pytest.mark.parametrize("hour,expected", [(3, 1.5), (12, 1.0)])  # peak at 3am, none at noon
+def test_late_night_spot_checks(engine, hour, expected):
+    assert engine._get_late_night_multiplier(hour) == expected
 
 
-def test_late_night_no_effect_at_noon():
-    engine = _make_engine()
-    assert engine._get_late_night_multiplier(12) == 1.0
+# ── _get_website_risk_factor returns positive float for any string ──────
 
+# Domain-like names: letters, digits and punctuation rather than exotic codepoints
+_website_names = st.text(
+    alphabet=st.characters(whitelist_categories=("L", "N", "P")), max_size=64
+)
 
-# ── _get_website_risk_factor returns positive float for any string ──────
 
-@given(name=st.text(min_size=0, max_size=200))
-@settings(max_examples=200)
-def test_website_risk_positive_for_any_string(name):
-    engine = _make_engine()
+@given(name=_website_names)
+@FAST
+def test_website_risk_positive_for_any_string(engine, name):
     factor = engine._get_website_risk_factor(name)
-    assert factor > 0.0
-    assert math.isfinite(factor)
+    assert factor > 0.0 and math.isfinite(factor)
+    # A repeat lookup (served from the memo when cached) must agree
+    assert engine._get_website_risk_factor(name) == factor
+
+
+@given(name=st.text(max_size=200))
+@FAST
+def test_website_risk_positive_for_any_unicode(engine, name):
+    factor = engine._get_website_risk_factor(name)
+    assert factor > 0.0 and math.isfinite(factor)
+
+
+# Neutral telemetry the monotonicity tests vary one feature of
+BASE_MONOTONIC = MappingProxyType({
+    "emotion_arousal": 0.5,
+    "click_rate": 0.15,
+    "scroll_velocity_peak": 600.0,
+    "time_to_cart": 60.0,
+    "system_time": 12,
+    "website_name": "bestbuy",
+})
 
 
 # ── Monotonicity: higher scroll velocity → higher or equal score ────────
@@ -154,18 +201,13 @@ def test_website_risk_positive_for_any_string(name):
     low_scroll=st.floats(min_value=0.0, max_value=500.0),
     high_scroll=st.floats(min_value=5000.0, max_value=50000.0),
 )
-@settings(max_examples=100)
-def test_higher_scroll_higher_score(low_scroll, high_scroll):
-    engine = _make_engine()
-    base = {
-        "emotion_arousal": 0.5,
-        "click_rate": 0.15,
-        "time_to_cart": 60.0,
-        "system_time": 12,
-        "website_name": "bestbuy",
-    }
-    score_low = engine.calculate_p_impulse({**base, "scroll_velocity_peak": low_scroll})
-    score_high = engine.calculate_p_impulse({**base, "scroll_velocity_peak": high_scroll})
+@FAST
+def test_higher_scroll_higher_score(engine, low_scroll, high_scroll):
+    d = BASE_MONOTONIC.copy()
+    d["scroll_velocity_peak"] = low_scroll
+    score_low = engine.calculate_p_impulse(d)
+    d["scroll_velocity_peak"] = high_scroll
+    score_high = engine.calculate_p_impulse(d)
     assert score_high >= score_low
 
 
@@ -175,41 +217,21 @@ def test_higher_scroll_higher_score(low_scroll, high_scroll):
     fast_ttc=st.floats(min_value=0.01, max_value=10.0),
     slow_ttc=st.floats(min_value=200.0, max_value=1000.0),
 )
-@settings(max_examples=100)
-def test_lower_ttc_higher_score(fast_ttc, slow_ttc):
-    engine = _make_engine()
-    base = {
-        "emotion_arousal": 0.5,
-        "click_rate": 0.15,
-        "scroll_velocity_peak": 600.0,
-        "system_time": 12,
-        "website_name": "bestbuy",
-    }
-    score_fast = engine.calculate_p_impulse({**base, "time_to_cart": fast_ttc})
-    score_slow = engine.calculate_p_impulse({**base, "time_to_cart": slow_ttc})
+@FAST
+def test_lower_ttc_higher_score(engine, fast_ttc, slow_ttc):
+    d = BASE_MONOTONIC.copy()
+    d["time_to_cart"] = fast_ttc
+    score_fast = engine.calculate_p_impulse(d)
+    d["time_to_cart"] = slow_ttc
+    score_slow = engine.calculate_p_impulse(d)
     assert score_fast >= score_slow
 
 
 # ── get_structured_output returns all required keys ─────────────────────
 
-@given(
-    arousal=st.floats(min_value=0.0, max_value=1.0),
-    click_rate=st.floats(min_value=0.0, max_value=10.0),
-    scroll_vel=st.floats(min_value=0.0, max_value=50000.0),
-    ttc=st.floats(min_value=0.01, max_value=5000.0),
-    hour=st.integers(min_value=0, max_value=23),
-)
-@settings(max_examples=100)
-def test_structured_output_always_has_required_keys(arousal, click_rate, scroll_vel, ttc, hour):
-    engine = _make_engine()
-    data = {
-        "emotion_arousal": arousal,
-        "click_rate": click_rate,
-        "scroll_velocity_peak": scroll_vel,
-        "time_to_cart": ttc,
-        "system_time": hour,
-        "website_name": "amazon",
-    }
+@given(data=valid_input())
+@FAST
+def test_structured_output_always_has_required_keys(engine, data):
     output = engine.get_structured_output(data)
     assert "p_impulse" in output
     assert "dominant_trigger" in output
@@ -218,34 +240,37 @@ def test_structured_output_always_has_required_keys(arousal, click_rate, scroll_
     assert math.isfinite(output["p_impulse"])
 
 
+# ── get_structured_output_batch matches get_structured_output ───────────
+
+@given(batch=st.lists(valid_input(), min_size=0, max_size=_BATCH))
+@FAST
+def test_structured_output_batch_matches_single(engine, batch):
+    assert engine.get_structured_output_batch(batch) == [
+        engine.get_structured_output(data) for data in batch
+    ]
+
+
 # ── Extreme values never produce NaN/infinity ───────────────────────────
 
-def test_extreme_max_values_no_nan():
-    engine = _make_engine()
-    data = {
+@pytest.mark.parametrize("data", [
+    {
         "emotion_arousal": 1.0,
         "click_rate": 1e6,
         "scroll_velocity_peak": 1e8,
         "time_to_cart": 0.001,
         "system_time": 3,
         "website_name": "gambling",
-    }
-    score = engine.calculate_p_impulse(data)
-    assert math.isfinite(score)
-    output = engine.get_structured_output(data)
-    assert math.isfinite(output["p_impulse"])
-
-
-def test_extreme_min_values_no_nan():
-    engine = _make_engine()
-    data = {
+    },
+    {
         "emotion_arousal": 0.0,
         "click_rate": 0.0,
         "scroll_velocity_peak": 0.0,
         "time_to_cart": 1e8,
         "system_time": 12,
         "website_name": "educational",
-    }
+    },
+], ids=["max", "min"])
+def test_extreme_values_no_nan(engine, data):
     score = engine.calculate_p_impulse(data)
     assert math.isfinite(score)
     output = engine.get_structured_output(data)
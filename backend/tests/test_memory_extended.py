@@ -5,307 +5,355 @@ Covers: _chunk_markdown, _determine_target_file, _count_observations,
 _simple_append_update, retrieve_context, apply_memory_update, consolidate_memory.
 """
 
+import asyncio
 import os
 import json
 import tempfile
-import shutil
 import pytest
 from unittest.mock import patch, AsyncMock, Mock
 
+import memory
 from memory import MemoryEngine
 
-# Reuse the conftest mock service account path
-from conftest import MOCK_SERVICE_ACCOUNT_PATH
 
+@pytest.fixture
+def make_engine(service_account_path):
+    """Factory: create a MemoryEngine with temp dirs (on the conftest mock service account)."""
+    def make(memory_dir=None, chroma_dir=None):
+        md = memory_dir or tempfile.mkdtemp()
+        cd = chroma_dir or tempfile.mkdtemp()
+        os.makedirs(md, exist_ok=True)
+        return MemoryEngine(
+            memory_dir=md,
+            chroma_persist_dir=cd,
+            service_account_path=service_account_path,
+        )
+    return make
 
-def _make_engine(memory_dir=None, chroma_dir=None):
-    """Create a MemoryEngine with temp dirs."""
-    md = memory_dir or tempfile.mkdtemp()
-    cd = chroma_dir or tempfile.mkdtemp()
-    os.makedirs(md, exist_ok=True)
-    return MemoryEngine(
-        memory_dir=md,
-        chroma_persist_dir=cd,
-        service_account_path=MOCK_SERVICE_ACCOUNT_PATH,
-    )
+
+@pytest.fixture
+def engine_with_memdir(tmp_path, make_engine, chroma_client_stub):
+    """Factory: write {file_name: content} into a fresh memory dir and build an engine over it.
+
+    The engine gets a stub Chroma client unless ``real_chroma=True``; none of
+    these tests assert on what Chroma stores, so they skip its sqlite/HNSW setup.
+    """
+    def make(files=None, real_chroma=False):
+        memory_dir = tmp_path / "mem"
+        memory_dir.mkdir()
+        for fname, content in (files or {}).items():
+            (memory_dir / fname).write_text(content)
+        if real_chroma:
+            return make_engine(memory_dir=str(memory_dir), chroma_dir=str(tmp_path / "chroma"))
+        with patch("chromadb.PersistentClient", return_value=chroma_client_stub()):
+            return make_engine(memory_dir=str(memory_dir), chroma_dir=str(tmp_path / "chroma"))
+    return make
 
 
 # ── _chunk_markdown ─────────────────────────────────────────────────────
 
+# (content, file name, expected (section, content) chunks)
+_CHUNK_CASES = {
+    "empty_content": ("", "test.md", []),
+    "no_headers": (
+        "Just plain text\nAnother line", "test.md",
+        [("Introduction", "Just plain text\nAnother line")],
+    ),
+    "single_section": (
+        "# Title\nSome content here\n- bullet 1\n- bullet 2", "Goals.md",
+        [("Title", "Some content here\n- bullet 1\n- bullet 2")],
+    ),
+    "multiple_sections": (
+        "# Section A\nContent A\n## Section B\nContent B\n# Section C\nContent C", "test.md",
+        [("Section A", "Content A"), ("Section B", "Content B"), ("Section C", "Content C")],
+    ),
+    "file_metadata_preserved": ("# Goals\n- Save money", "Goals.md", [("Goals", "- Save money")]),
+    # Empty section between headers should be skipped
+    "whitespace_only_sections_skipped": (
+        "# Header\n\n\n\n# Another\nReal content", "test.md",
+        [("Another", "Real content")],
+    ),
+}
+
+
 class TestChunkMarkdown:
-    def test_empty_content(self):
-        engine = _make_engine()
-        chunks = engine._chunk_markdown("", "test.md")
-        assert chunks == []
-
-    def test_no_headers(self):
-        engine = _make_engine()
-        chunks = engine._chunk_markdown("Just plain text\nAnother line", "test.md")
-        assert len(chunks) == 1
-        assert chunks[0]["section"] == "Introduction"
-        assert chunks[0]["file"] == "test.md"
-
-    def test_single_section(self):
-        engine = _make_engine()
-        content = "# Title\nSome content here\n- bullet 1\n- bullet 2"
-        chunks = engine._chunk_markdown(content, "Goals.md")
-        assert len(chunks) == 1
-        assert chunks[0]["section"] == "Title"
-        assert "bullet 1" in chunks[0]["content"]
-
-    def test_multiple_sections(self):
-        engine = _make_engine()
-        content = "# Section A\nContent A\n## Section B\nContent B\n# Section C\nContent C"
-        chunks = engine._chunk_markdown(content, "test.md")
-        assert len(chunks) == 3
-
-    def test_large_section_gets_split(self):
-        engine = _make_engine()
+    @pytest.mark.parametrize(
+        "content,file_name,expected", _CHUNK_CASES.values(), ids=_CHUNK_CASES.keys()
+    )
+    def test_chunks(self, pure_engine, content, file_name, expected):
+        chunks = pure_engine._chunk_markdown(content, file_name)
+        assert [(c.section, c.content) for c in chunks] == expected
+        assert all(c.file == file_name for c in chunks)
+
+    def test_large_section_gets_split(self, pure_engine):
         # Create content larger than MAX_CHUNK_SIZE
         big_content = "# Big Section\n" + "\n".join(
             [f"- Observation line {i} with some extra detail" for i in range(50)]
         )
-        chunks = engine._chunk_markdown(big_content, "test.md")
+        chunks = pure_engine._chunk_markdown(big_content, "test.md")
         assert len(chunks) > 1
         for chunk in chunks:
-            assert len(chunk["content"]) <= engine.MAX_CHUNK_SIZE + 100  # some tolerance
-
-    def test_file_metadata_preserved(self):
-        engine = _make_engine()
-        content = "# Goals\n- Save money"
-        chunks = engine._chunk_markdown(content, "Goals.md")
-        assert all(c["file"] == "Goals.md" for c in chunks)
-
-    def test_whitespace_only_sections_skipped(self):
-        engine = _make_engine()
-        content = "# Header\n\n\n\n# Another\nReal content"
-        chunks = engine._chunk_markdown(content, "test.md")
-        # Empty section between headers should be skipped
-        assert all(c["content"].strip() for c in chunks)
+            assert len(chunk.content) <= pure_engine.MAX_CHUNK_SIZE + 100  # some tolerance
 
 
 # ── _determine_target_file ──────────────────────────────────────────────
 
 class TestDetermineTargetFile:
-    def test_goal_keywords(self):
-        engine = _make_engine()
-        assert engine._determine_target_file("User has a goal to save $5000") == "Goals.md"
-        assert engine._determine_target_file("aspiration to travel") == "Goals.md"
+    def test_goal_keywords(self, pure_engine):
+        assert pure_engine._determine_target_file("User has a goal to save $5000") == "Goals.md"
+        assert pure_engine._determine_target_file("aspiration to travel") == "Goals.md"
 
-    def test_budget_keywords(self):
-        engine = _make_engine()
-        assert engine._determine_target_file("monthly budget exceeded") == "Budget.md"
-        assert engine._determine_target_file("over budget on electronics") == "Budget.md"
+    def test_budget_keywords(self, pure_engine):
+        assert pure_engine._determine_target_file("monthly budget exceeded") == "Budget.md"
+        assert pure_engine._determine_target_file("over budget on electronics") == "Budget.md"
 
-    def test_state_keywords(self):
-        engine = _make_engine()
-        assert engine._determine_target_file("savings account balance is $1000") == "State.md"
-        assert engine._determine_target_file("current income level") == "State.md"
+    def test_state_keywords(self, pure_engine):
+        assert pure_engine._determine_target_file("savings account balance is $1000") == "State.md"
+        assert pure_engine._determine_target_file("current income level") == "State.md"
 
-    def test_default_to_behavior(self):
-        engine = _make_engine()
-        assert engine._determine_target_file("User tends to shop late at night") == "Behavior.md"
-        assert engine._determine_target_file("comfortable spending on shoes") == "Behavior.md"
+    def test_default_to_behavior(self, pure_engine):
+        assert pure_engine._determine_target_file("User tends to shop late at night") == "Behavior.md"
+        assert pure_engine._determine_target_file("comfortable spending on shoes") == "Behavior.md"
 
-    def test_empty_string(self):
-        engine = _make_engine()
-        assert engine._determine_target_file("") == "Behavior.md"
+    def test_empty_string(self, pure_engine):
+        assert pure_engine._determine_target_file("") == "Behavior.md"
 
 
 # ── _count_observations ─────────────────────────────────────────────────
 
 class TestCountObservations:
-    def test_empty_content(self):
-        engine = _make_engine()
-        assert engine._count_observations("") == 0
+    def test_empty_content(self, pure_engine):
+        assert pure_engine._count_observations("") == 0
 
-    def test_placeholder_lines_not_counted(self):
-        engine = _make_engine()
+    def test_placeholder_lines_not_counted(self, pure_engine):
         content = "## Section\n- [No patterns recorded yet]\n- [AMOUNT]\n- [ ] checkbox"
-        assert engine._count_observations(content) == 0
+        assert pure_engine._count_observations(content) == 0
 
-    def test_real_entries_counted(self):
-        engine = _make_engine()
+    def test_real_entries_counted(self, pure_engine):
         content = "## Observed\n- User buys shoes often\n- Late night shopping detected\n- High impulse on electronics"
-        assert engine._count_observations(content) == 3
+        assert pure_engine._count_observations(content) == 3
 
-    def test_mixed_content(self):
-        engine = _make_engine()
+    def test_mixed_content(self, pure_engine):
         content = "## Section\n- [No patterns recorded yet]\n- Real observation\n- Another real one"
-        assert engine._count_observations(content) == 2
+        assert pure_engine._count_observations(content) == 2
 
 
 # ── _simple_append_update ───────────────────────────────────────────────
 
 class TestSimpleAppendUpdate:
-    def test_replace_placeholder(self):
-        engine = _make_engine()
+    def test_replace_placeholder(self, pure_engine):
         content = "# Behavior\n\n## Observed Behaviors\n- [No patterns recorded yet]\n"
-        result = engine._simple_append_update(content, "User shops at night", "Behavior.md")
+        result = pure_engine._simple_append_update(content, "User shops at night", "Behavior.md")
         assert "User shops at night" in result
         assert "[No patterns recorded yet]" not in result
 
-    def test_append_to_section(self):
-        engine = _make_engine()
+    def test_append_to_section(self, pure_engine):
         content = "# Behavior\n\n## Observed Behaviors\n- Existing observation\n"
-        result = engine._simple_append_update(content, "New observation", "Behavior.md")
+        result = pure_engine._simple_append_update(content, "New observation", "Behavior.md")
         assert "Existing observation" in result
         assert "New observation" in result
 
-    def test_reject_when_full(self):
-        engine = _make_engine()
+    def test_reject_when_full(self, pure_engine):
         lines = ["# Behavior\n\n## Observed Behaviors"]
         for i in range(6):
             lines.append(f"- Observation {i}")
         content = "\n".join(lines)
-        result = engine._simple_append_update(content, "One more", "Behavior.md")
+        result = pure_engine._simple_append_update(content, "One more", "Behavior.md")
         assert "One more" not in result  # Should not add beyond 5
 
-    def test_create_section_if_missing(self):
-        engine = _make_engine()
+    def test_bullets_in_later_sections_not_counted(self, pure_engine):
+        content = "## Observed Behaviors\n- Existing\n## Notes\n" + "".join(
+            f"- Note {i}\n" for i in range(6)
+        )
+        result = pure_engine._simple_append_update(content, "New obs", "Behavior.md")
+        assert result.startswith("## Observed Behaviors\n- New obs\n- Existing\n## Notes\n")
+
+    def test_create_section_if_missing(self, pure_engine):
         content = "# Behavior\n\nSome content without Observed Behaviors section\n"
-        result = engine._simple_append_update(content, "New obs", "Behavior.md")
+        result = pure_engine._simple_append_update(content, "New obs", "Behavior.md")
         assert "## Observed Behaviors" in result
         assert "New obs" in result
 
 
+# ── shared embedding function ───────────────────────────────────────────
+
+class TestSharedEmbeddingFunction:
+    def test_onnx_model_built_once(self, monkeypatch):
+        built = []
+
+        class FakeOnnx:
+            def __init__(self):
+                built.append(self)
+
+            def __call__(self, input):
+                return [[0.0, 1.0] for _ in input]
+
+        monkeypatch.setattr(memory, "ONNXMiniLM_L6_V2", FakeOnnx)
+        memory._onnx_embedder.cache_clear()
+        try:
+            ef = memory._SharedDefaultEmbeddingFunction()
+            assert len(ef(["a"])) == 1
+            assert len(ef(["b", "c"])) == 2
+            assert len(built) == 1
+        finally:
+            memory._onnx_embedder.cache_clear()
+
+    def test_engines_share_embedding_function(self, engine_with_memdir, make_engine, tmp_path):
+        engine = engine_with_memdir(real_chroma=True)
+        other = make_engine(chroma_dir=str(tmp_path / "other-chroma"))
+        assert engine.collection._embedding_function is memory._EMBEDDING_FUNCTION
+        assert other.collection._embedding_function is memory._EMBEDDING_FUNCTION
+
+
+class TestServiceAccountCredentialCache:
+    def test_same_file_and_scopes_load_once(self, monkeypatch, tmp_path):
+        loads = []
+
+        def fake_load(path, scopes):
+            loads.append((path, scopes))
+            return Mock()
+
+        key = tmp_path / "sa.json"
+        key.write_text("{}")
+        monkeypatch.setattr(
+            "google.oauth2.service_account.Credentials.from_service_account_file", fake_load
+        )
+        # conftest empties the credentials cache around every test
+        scopes = ['https://www.googleapis.com/auth/generative-language']
+        first = memory.load_service_account_credentials(str(key), scopes)
+        assert memory.load_service_account_credentials(str(key), scopes) is first
+        assert len(loads) == 1
+
+        other = memory.load_service_account_credentials(
+            str(key), ['https://www.googleapis.com/auth/cloud-platform']
+        )
+        assert other is not first
+        assert len(loads) == 2
+
+
 # ── retrieve_context ────────────────────────────────────────────────────
 
 class TestRetrieveContext:
     @pytest.mark.asyncio
-    async def test_always_includes_goals_and_budget(self):
-        td = tempfile.mkdtemp()
-        try:
-            # Create all memory files
-            for fname, content in [
-                ("Goals.md", "# Goals\n- Save $5000"),
-                ("Budget.md", "# Budget\n- $500/month"),
-                ("State.md", "# State\n- Balance $1000"),
-                ("Behavior.md", "# Behavior\n- Shops at night"),
-            ]:
-                with open(os.path.join(td, fname), "w") as f:
-                    f.write(content)
-
-            engine = _make_engine(memory_dir=td)
-            snippets = await engine.retrieve_context("shoes $50 amazon")
-
-            files_in_snippets = [s["file"] for s in snippets]
-            assert "Goals.md" in files_in_snippets
-            assert "Budget.md" in files_in_snippets
-        finally:
-            shutil.rmtree(td, ignore_errors=True)
+    async def test_always_includes_goals_and_budget(self, engine_with_memdir):
+        # Create all memory files
+        engine = engine_with_memdir({
+            "Goals.md": "# Goals\n- Save $5000",
+            "Budget.md": "# Budget\n- $500/month",
+            "State.md": "# State\n- Balance $1000",
+            "Behavior.md": "# Behavior\n- Shops at night",
+        })
+        snippets = await engine.retrieve_context("shoes $50 amazon")
+
+        files_in_snippets = [s["file"] for s in snippets]
+        assert "Goals.md" in files_in_snippets
+        assert "Budget.md" in files_in_snippets
 
     @pytest.mark.asyncio
-    async def test_empty_memory_dir(self):
-        td = tempfile.mkdtemp()
-        try:
-            engine = _make_engine(memory_dir=td)
-            snippets = await engine.retrieve_context("test query")
-            # Should not crash, may return empty list
-            assert isinstance(snippets, list)
-        finally:
-            shutil.rmtree(td, ignore_errors=True)
+    async def test_empty_memory_dir(self, engine_with_memdir):
+        engine = engine_with_memdir()
+        snippets = await engine.retrieve_context("test query")
+        # Should not crash, may return empty list
+        assert isinstance(snippets, list)
 
 
 # ── apply_memory_update ─────────────────────────────────────────────────
 
 class TestApplyMemoryUpdate:
     @pytest.mark.asyncio
-    async def test_empty_string_returns_false(self):
-        engine = _make_engine()
-        result = await engine.apply_memory_update("")
+    async def test_empty_string_returns_false(self, pure_engine):
+        result = await pure_engine.apply_memory_update("")
         assert result is False
 
     @pytest.mark.asyncio
-    async def test_none_returns_false(self):
-        engine = _make_engine()
-        result = await engine.apply_memory_update(None)
+    async def test_none_returns_false(self, pure_engine):
+        result = await pure_engine.apply_memory_update(None)
         assert result is False
 
     @pytest.mark.asyncio
-    async def test_backup_created(self):
-        td = tempfile.mkdtemp()
-        try:
-            behavior_path = os.path.join(td, "Behavior.md")
-            with open(behavior_path, "w") as f:
-                f.write("# Behavior\n\n## Observed Behaviors\n- [No patterns recorded yet]\n")
-
-            engine = _make_engine(memory_dir=td)
-            # After successful update, backup should be removed
-            await engine.apply_memory_update("User shops frequently")
-            # If update succeeded, backup was removed. If failed, backup exists.
-            # Just verify the file still exists
-            assert os.path.exists(behavior_path)
-        finally:
-            shutil.rmtree(td, ignore_errors=True)
+    async def test_backup_created(self, engine_with_memdir):
+        engine = engine_with_memdir({
+            "Behavior.md": "# Behavior\n\n## Observed Behaviors\n- [No patterns recorded yet]\n",
+        })
+        behavior_path = os.path.join(engine.memory_dir, "Behavior.md")
+        # After successful update, backup should be removed
+        await engine.apply_memory_update("User shops frequently")
+        # If update succeeded, backup was removed. If failed, backup exists.
+        # Just verify the file still exists
+        assert os.path.exists(behavior_path)
 
     @pytest.mark.asyncio
-    async def test_successful_update_writes_content(self):
-        td = tempfile.mkdtemp()
-        try:
-            behavior_path = os.path.join(td, "Behavior.md")
-            with open(behavior_path, "w") as f:
-                f.write("# Behavior\n\n## Observed Behaviors\n- [No patterns recorded yet]\n")
-
-            engine = _make_engine(memory_dir=td)
-            result = await engine.apply_memory_update("User prefers quality over price")
-            assert result is True
+    async def test_successful_update_writes_content(self, engine_with_memdir):
+        engine = engine_with_memdir({
+            "Behavior.md": "# Behavior\n\n## Observed Behaviors\n- [No patterns recorded yet]\n",
+        })
+        behavior_path = os.path.join(engine.memory_dir, "Behavior.md")
+        result = await engine.apply_memory_update("User prefers quality over price")
+        assert result is True
+
+        with open(behavior_path, "r") as f:
+            content = f.read()
+        assert "User prefers quality over price" in content
 
-            with open(behavior_path, "r") as f:
-                content = f.read()
-            assert "User prefers quality over price" in content
-        finally:
-            shutil.rmtree(td, ignore_errors=True)
+    @pytest.mark.asyncio
+    async def test_concurrent_updates_to_one_file_both_land(self, engine_with_memdir):
+        # Enough observations that each update goes through (awaited) refinement
+        engine = engine_with_memdir({
+            "Behavior.md": "# Behavior\n\n## Observed Behaviors\n"
+            + "".join(f"- Observation {i}\n" for i in range(10)),
+        })
+        behavior_path = os.path.join(engine.memory_dir, "Behavior.md")
+
+        async def slow_refine(current_content, new_observation, file_name):
+            await asyncio.sleep(0.01)  # yields mid-update, like the Gemini call
+            header = "## Observed Behaviors\n"
+            return current_content.replace(header, f"{header}- {new_observation}\n")
+
+        engine._refine_memory_content = slow_refine
+        updates = ["User shops late at night", "User browses for hours before buying"]
+        assert engine._determine_target_file(updates[1]) == "Behavior.md"
+        results = await asyncio.gather(*(engine.apply_memory_update(u) for u in updates))
+
+        assert results == [True, True]
+        with open(behavior_path, "r") as f:
+            content = f.read()
+        assert all(update in content for update in updates)
+        assert not os.path.exists(f"{behavior_path}.backup")
 
 
 # ── consolidate_memory ──────────────────────────────────────────────────
 
-class TestConsolidateMemory:
-    @pytest.mark.asyncio
-    async def test_skips_small_files(self):
-        td = tempfile.mkdtemp()
-        try:
-            # Create small memory files (below threshold)
-            for fname in ["Goals.md", "Budget.md", "State.md", "Behavior.md"]:
-                with open(os.path.join(td, fname), "w") as f:
-                    f.write(f"# {fname}\n- Short content\n")
-
-            engine = _make_engine(memory_dir=td)
-            await engine.reindex_memory()
-            results = await engine.consolidate_memory()
+# Memory files below the consolidation thresholds
+_SMALL_MEMORY_FILES = {
+    fname: f"# {fname}\n- Short content\n"
+    for fname in ["Goals.md", "Budget.md", "State.md", "Behavior.md"]
+}
+# A Behavior.md that exceeds them
+_LARGE_BEHAVIOR = "# Behavior\n\n## Observed Behaviors\n" + "\n".join(
+    f"- User bought item {i} at price ${i * 10} on amazon.com repeatedly" for i in range(15)
+)
 
-            for fname, result in results.items():
-                assert result["status"] == "skipped"
-        finally:
-            shutil.rmtree(td, ignore_errors=True)
 
+class TestConsolidateMemory:
     @pytest.mark.asyncio
-    async def test_consolidates_large_files(self):
-        td = tempfile.mkdtemp()
-        try:
-            # Create a large Behavior.md that exceeds thresholds
-            lines = ["# Behavior\n\n## Observed Behaviors"]
-            for i in range(15):
-                lines.append(f"- User bought item {i} at price ${i * 10} on amazon.com repeatedly")
-            content = "\n".join(lines)
-
-            for fname in ["Goals.md", "Budget.md", "State.md"]:
-                with open(os.path.join(td, fname), "w") as f:
-                    f.write(f"# {fname}\n- Short\n")
+    async def test_skips_small_files(self, engine_with_memdir):
+        engine = engine_with_memdir(_SMALL_MEMORY_FILES)
+        await engine.reindex_memory()
+        results = await engine.consolidate_memory()
 
-            with open(os.path.join(td, "Behavior.md"), "w") as f:
-                f.write(content)
+        for fname, result in results.items():
+            assert result["status"] == "skipped"
 
-            engine = _make_engine(memory_dir=td)
-            await engine.reindex_memory()
+    @pytest.mark.asyncio
+    async def test_consolidates_large_files(self, engine_with_memdir):
+        engine = engine_with_memdir(_SMALL_MEMORY_FILES | {"Behavior.md": _LARGE_BEHAVIOR})
+        await engine.reindex_memory()
 
-            # Mock the Gemini API call for consolidation
-            async def mock_gemini(*args, **kwargs):
-                return {"refined_content": "# Behavior\n\n## Observed Behaviors\n- User shops frequently on amazon.com\n"}
+        # Mock the Gemini API call for consolidation
+        async def mock_gemini(*args, **kwargs):
+            return {"refined_content": "# Behavior\n\n## Observed Behaviors\n- User shops frequently on amazon.com\n"}
 
-            engine._call_gemini_api = mock_gemini
-            results = await engine.consolidate_memory()
+        engine._call_gemini_api = mock_gemini
+        results = await engine.consolidate_memory()
 
-            assert results["Behavior.md"]["status"] == "consolidated"
-        finally:
-            shutil.rmtree(td, ignore_errors=True)
+        assert results["Behavior.md"]["status"] == "consolidated"
@@ -17,8 +17,10 @@ Usage:
 """
 
 import os
-import json
 import sys
+import time
+import asyncio
+from pathlib import Path
 
 # Check for required dependencies
 try:
@@ -54,6 +56,22 @@ except ImportError:
     print("  pip install -r requirements.txt")
     sys.exit(1)
 
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx (pip install 'httpx[http2]')
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import orjson
+except ImportError:
+    print("❌ Error: orjson module not found.")
+    print("\nPlease install dependencies:")
+    print("  cd backend")
+    print("  source venv/bin/activate")
+    print("  pip install -r requirements.txt")
+    sys.exit(1)
+
 # Load environment variables
 env_path = os.path.join(os.path.dirname(__file__), '.env')
 load_dotenv(dotenv_path=env_path)
@@ -121,156 +139,195 @@ except Exception as e:
 # Vertex AI base URL
 VERTEX_AI_BASE = "https://generativelanguage.googleapis.com/v1beta"
 
-# First, list available models
-print("\n3. Listing available models...")
-try:
-    async def list_models():
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            list_url = f"{VERTEX_AI_BASE}/models"
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
-            response = await client.get(list_url, headers=headers)
-            response.raise_for_status()
-            return response.json()
-    
-    import asyncio
-    models_result = asyncio.run(list_models())
+headers = {
+    'Authorization': f'Bearer {access_token}',
+    'Content-Type': 'application/json'
+}
+
+# The model picked from the list is remembered per service account so later
+# runs can skip the list-models round trip
+MODEL_CACHE_DIR = Path.home() / ".cache" / "vertex_ai_test"
+MODEL_CACHE_MAX_AGE = 24 * 60 * 60  # seconds
+
+# Models to use, in order of preference, when the key has access to them
+PREFERRED_MODELS = ('gemini-2.5-pro', 'gemini-1.5-flash', 'gemini-1.5-pro', 'gemini-pro', 'gemini-1.5-flash-latest')
+
+
+def _model_cache_path():
+    account = getattr(credentials, 'service_account_email', None) or 'default'
+    return MODEL_CACHE_DIR / f"{account}.model.txt"
+
+
+def read_cached_model():
+    """Return the model chosen on a recent run, or None if there isn't a fresh one."""
+    cache_path = _model_cache_path()
+    try:
+        if time.time() - cache_path.stat().st_mtime >= MODEL_CACHE_MAX_AGE:
+            return None
+        return cache_path.read_text().strip() or None
+    except OSError:
+        return None
+
+
+def cache_model(selected_model):
+    """Remember the selected model for later runs (best effort)."""
+    try:
+        MODEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _model_cache_path().write_text(selected_model)
+    except OSError as e:
+        print(f"   ⚠️  Could not cache model choice: {e}")
+
+
+async def select_model(client):
+    """List the models available to this key and pick one that supports generateContent."""
+    try:
+        list_url = f"{VERTEX_AI_BASE}/models"
+        response = await client.get(list_url, headers=headers)
+        response.raise_for_status()
+        models_result = orjson.loads(response.content)
     
-    # Extract model names
-    available_models = []
-    if 'models' in models_result:
-        for model in models_result['models']:
-            model_name = model.get('name', '').replace('models/', '')
-            if 'generateContent' in model.get('supportedGenerationMethods', []):
-                available_models.append(model_name)
+        # Extract model names
+        available_models = [
+            model.get('name', '').removeprefix('models/')
+            for model in models_result.get('models', ())
+            if 'generateContent' in model.get('supportedGenerationMethods', ())
+        ]
     
-    if available_models:
-        print(f"   ✓ Found {len(available_models)} available model(s):")
-        for model in available_models[:5]:  # Show first 5
-            print(f"     - {model}")
-        if len(available_models) > 5:
-            print(f"     ... and {len(available_models) - 5} more")
+        if available_models:
+            print(f"   ✓ Found {len(available_models)} available model(s):")
+            for model in available_models[:5]:  # Show first 5
+                print(f"     - {model}")
+            if len(available_models) > 5:
+                print(f"     ... and {len(available_models) - 5} more")
         
-        # Try to use gemini-1.5-flash or gemini-pro, or use first available
-        preferred_models = ['gemini-2.5-pro', 'gemini-1.5-flash', 'gemini-1.5-pro', 'gemini-pro', 'gemini-1.5-flash-latest']
-        selected_model = None
-        for pref in preferred_models:
-            if pref in available_models:
-                selected_model = pref
-                break
+            # Use the first preferred model that's available, or else the first listed
+            available = set(available_models)
+            selected_model = next(
+                (pref for pref in PREFERRED_MODELS if pref in available),
+                available_models[0]
+            )
         
-        if not selected_model:
-            selected_model = available_models[0]
+            print(f"\n   Using model: {selected_model}")
+            cache_model(selected_model)
+        else:
+            print("   ⚠️  No models found, using default: gemini-1.5-flash")
+            selected_model = "gemini-1.5-flash"
         
-        print(f"\n   Using model: {selected_model}")
-    else:
-        print("   ⚠️  No models found, using default: gemini-1.5-flash")
+    except Exception as e:
+        print(f"   ⚠️  Could not list models: {e}")
+        print("   Using default model: gemini-1.5-flash")
         selected_model = "gemini-1.5-flash"
-        
-except Exception as e:
-    print(f"   ⚠️  Could not list models: {e}")
-    print("   Using default model: gemini-1.5-flash")
-    selected_model = "gemini-1.5-flash"
-
-# Prepare request
-print("\n4. Preparing Vertex AI request...")
-VERTEX_AI_URL = f"{VERTEX_AI_BASE}/models/{selected_model}:generateContent"
-
-payload = {
-    "contents": [{
-        "parts": [{
-            "text": "list the capital city of eveyr country in asia. "
-        }]
-    }],
-    "generationConfig": {
-        "responseMimeType": "application/json"
-    }
-}
 
-print(f"   Endpoint: {VERTEX_AI_URL}")
-print(f"   Model: {selected_model}")
+    return selected_model
 
-# Make request
-print("\n5. Making request to Vertex AI...")
-try:
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
+
+async def generate(client, selected_model):
+    """Send a small generateContent request and print the response."""
+    # Prepare request
+    print("\n4. Preparing Vertex AI request...")
+    VERTEX_AI_URL = f"{VERTEX_AI_BASE}/models/{selected_model}:generateContent"
+
+    payload = {
+        "contents": [{
+            "parts": [{
+                "text": "list the capital city of eveyr country in asia. "
+            }]
+        }],
+        "generationConfig": {
+            "responseMimeType": "application/json"
+        }
     }
+
+    print(f"   Endpoint: {VERTEX_AI_URL}")
+    print(f"   Model: {selected_model}")
+
+    # Make request
+    print("\n5. Making request to Vertex AI...")
+    try:
+        response = await client.post(
+            VERTEX_AI_URL,
+            json=payload,
+            headers=headers
+        )
+        response.raise_for_status()
+        result = orjson.loads(response.content)
     
-    async def make_request():
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                VERTEX_AI_URL,
-                json=payload,
-                headers=headers
-            )
-            response.raise_for_status()
-            return response.json()
-    
-    import asyncio
-    result = asyncio.run(make_request())
-    
-    print("   ✓ Request successful!")
+        print("   ✓ Request successful!")
     
-    # Extract and display response
-    print("\n6. Response from Vertex AI:")
-    print("   " + "-" * 76)
+        # Extract and display response
+        print("\n6. Response from Vertex AI:")
+        print("   " + "-" * 76)
     
-    if 'candidates' in result and len(result['candidates']) > 0:
-        candidate = result['candidates'][0]
-        if 'content' in candidate and 'parts' in candidate['content']:
-            text = candidate['content']['parts'][0].get('text', '')
-            print(f"   Raw response: {text[:200]}...")
+        if 'candidates' in result and len(result['candidates']) > 0:
+            candidate = result['candidates'][0]
+            if 'content' in candidate and 'parts' in candidate['content']:
+                text = candidate['content']['parts'][0].get('text', '')
+                print(f"   Raw response: {text[:200]}...")
             
-            # Try to parse JSON
-            try:
-                parsed = json.loads(text)
-                print("\n   Parsed JSON:")
-                print(json.dumps(parsed, indent=2))
-            except json.JSONDecodeError:
-                print(f"\n   Full text response:\n{text}")
+                # Try to parse JSON
+                try:
+                    parsed = orjson.loads(text)
+                    print("\n   Parsed JSON:")
+                    print(orjson.dumps(parsed, option=orjson.OPT_INDENT_2).decode())
+                except orjson.JSONDecodeError:
+                    print(f"\n   Full text response:\n{text}")
     
-    print("\n" + "=" * 80)
-    print("✅ Vertex AI connection test PASSED!")
-    print("=" * 80)
+        print("\n" + "=" * 80)
+        print("✅ Vertex AI connection test PASSED!")
+        print("=" * 80)
     
-except httpx.HTTPStatusError as e:
-    print(f"   ❌ HTTP Error: {e.response.status_code}")
-    response_data = e.response.json() if e.response.headers.get('content-type', '').startswith('application/json') else {}
+    except httpx.HTTPStatusError as e:
+        print(f"   ❌ HTTP Error: {e.response.status_code}")
+        response_data = orjson.loads(e.response.content) if e.response.headers.get('content-type', '').startswith('application/json') else {}
     
-    if e.response.status_code == 403:
-        error_info = response_data.get('error', {})
-        if error_info.get('status') == 'PERMISSION_DENIED':
-            details = error_info.get('details', [])
-            for detail in details:
-                if detail.get('@type') == 'type.googleapis.com/google.rpc.ErrorInfo':
-                    if detail.get('reason') == 'SERVICE_DISABLED':
-                        activation_url = detail.get('metadata', {}).get('activationUrl', '')
-                        print(f"\n   ⚠️  Generative Language API is not enabled in your project.")
-                        print(f"   Please enable it by visiting:")
-                        print(f"   {activation_url}")
-                        print(f"\n   Or enable it manually:")
-                        print(f"   1. Go to https://console.cloud.google.com/apis/library")
-                        print(f"   2. Search for 'Generative Language API'")
-                        print(f"   3. Click 'Enable'")
-                        print(f"   4. Wait a few minutes for the change to propagate")
-                        sys.exit(1)
-                    elif detail.get('reason') == 'ACCESS_TOKEN_SCOPE_INSUFFICIENT':
-                        print(f"\n   ⚠️  Service account has insufficient permissions.")
-                        print(f"   Please ensure the service account has 'Vertex AI User' role")
-                        print(f"   or 'Generative Language API User' role in IAM.")
-                        sys.exit(1)
+        if e.response.status_code == 403:
+            error_info = response_data.get('error', {})
+            if error_info.get('status') == 'PERMISSION_DENIED':
+                details = error_info.get('details', [])
+                for detail in details:
+                    if detail.get('@type') == 'type.googleapis.com/google.rpc.ErrorInfo':
+                        if detail.get('reason') == 'SERVICE_DISABLED':
+                            activation_url = detail.get('metadata', {}).get('activationUrl', '')
+                            print(f"\n   ⚠️  Generative Language API is not enabled in your project.")
+                            print(f"   Please enable it by visiting:")
+                            print(f"   {activation_url}")
+                            print(f"\n   Or enable it manually:")
+                            print(f"   1. Go to https://console.cloud.google.com/apis/library")
+                            print(f"   2. Search for 'Generative Language API'")
+                            print(f"   3. Click 'Enable'")
+                            print(f"   4. Wait a few minutes for the change to propagate")
+                            sys.exit(1)
+                        elif detail.get('reason') == 'ACCESS_TOKEN_SCOPE_INSUFFICIENT':
+                            print(f"\n   ⚠️  Service account has insufficient permissions.")
+                            print(f"   Please ensure the service account has 'Vertex AI User' role")
+                            print(f"   or 'Generative Language API User' role in IAM.")
+                            sys.exit(1)
     
-    print(f"   Response: {e.response.text}")
-    sys.exit(1)
-except httpx.RequestError as e:
-    print(f"   ❌ Request Error: {e}")
-    sys.exit(1)
-except Exception as e:
-    print(f"   ❌ Unexpected error: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+        print(f"   Response: {e.response.text}")
+        sys.exit(1)
+    except httpx.RequestError as e:
+        print(f"   ❌ Request Error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"   ❌ Unexpected error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+async def main():
+    # One client (and one connection pool / TLS session) for both requests,
+    # speaking HTTP/2 when h2 is installed
+    async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, timeout=30.0) as client:
+        # First, list available models (unless a recent run already picked one)
+        selected_model = read_cached_model()
+        if selected_model:
+            print(f"\n3. Using cached model: {selected_model}")
+            print(f"   (delete {_model_cache_path()} to list models again)")
+        else:
+            print("\n3. Listing available models...")
+            selected_model = await select_model(client)
+        await generate(client, selected_model)
+
+
+asyncio.run(main())
@@ -20,22 +20,60 @@ Usage:
     cd backend
     source venv/bin/activate
     python validate_model.py
+
+    # Reuse cached Slow Brain responses across runs (delete the file to reset)
+    VALIDATION_SLOW_BRAIN_CACHE=.slow_brain_cache.sqlite python validate_model.py
 """
 
 import asyncio
-import json
+import bisect
+import hashlib
+import logging
+import logging.handlers
+import queue
+import re
+import sqlite3
 import sys
 import os
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+import time
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Callable, Tuple
+from collections import Counter
+from datetime import datetime, timedelta
 import httpx
+import orjson
 
-# Check dependencies
 try:
-    from inference_engine import ImpulseInferenceEngine
+    import uvloop  # ships with uvicorn[standard]; unavailable on Windows
 except ImportError:
-    print("❌ Error: inference_engine module not found.")
-    sys.exit(1)
+    uvloop = None
+
+# inference_engine (and NumPy behind it) is imported in _run_suite, only
+# once a suite actually runs
+if TYPE_CHECKING:
+    from inference_engine import ImpulseInferenceEngine
+
+# Progress output; handled off the event loop once start_log_listener() runs
+logger = logging.getLogger("validate_model")
+
+
+def start_log_listener() -> logging.handlers.QueueListener:
+    """
+    Send validator output through a queue to a background stdout writer.
+    
+    Formatting and terminal I/O then happen on the listener's thread, so
+    slow stdout never stalls the concurrent scenarios. Call stop() on the
+    returned listener to flush remaining lines.
+    """
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    
+    logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener.start()
+    return listener
 
 
 class ModelValidator:
@@ -43,25 +81,140 @@ class ModelValidator:
     Validates the Fast Brain + Slow Brain architecture end-to-end.
     """
     
-    def __init__(self, api_base_url: str = "http://localhost:8000"):
+    # Reasoning keywords, matched against the lowercased reasoning text.
+    # Context that justifies leaving an extreme Fast Brain score unchanged
+    _EXTREME_JUSTIFICATION_RE = re.compile(
+        r"within budget|aligns with|violates|exceeds|conflicts|budget|goal|limit|supports|appropriate"
+    )
+    # Context that justifies a large (>0.3) score adjustment
+    _LARGE_ADJUSTMENT_RE = re.compile(r"budget|goal|savings|limit|exceeded|aligns|conflicts")
+    # Mentions of each memory file, in report order
+    _MEMORY_CITATION_RES = (
+        ("Goals", re.compile(r"goals\.md|goal")),
+        ("Budget", re.compile(r"budget\.md|budget|spending limit")),
+        ("State", re.compile(r"state\.md|balance|financial state")),
+        ("Behavior", re.compile(r"behavior\.md|pattern|behavior")),
+    )
+    # Specific values or constraints
+    _SPECIFICS_RE = re.compile(r"\$|limit|spent|remaining|save|vacation|emergency fund")
+    
+    # Acceptable intervention actions per impulse-score band; a score equal to
+    # a threshold falls in the band above it
+    _INTERVENTION_THRESHOLDS = (0.3, 0.6, 0.8)
+    _EXPECTED_ACTIONS = (
+        ("NONE",),
+        ("NONE", "MIRROR"),
+        ("MIRROR", "COOLDOWN", "PHRASE"),
+        ("COOLDOWN", "PHRASE"),
+    )
+    _EXPECTED_ACTION_SETS = tuple(frozenset(actions) for actions in _EXPECTED_ACTIONS)
+    
+    # Fixed memory-update check outcomes, shared between results (read-only)
+    _MEMORY_UPDATE_TOO_SHORT = {"passed": False, "reason": "Memory update too short to be meaningful"}
+    _MEMORY_UPDATE_MISSING_OK = {"passed": True, "has_update": False, "reason": "No memory update (acceptable)"}
+    _MEMORY_UPDATE_OPTIONAL = {
+        has_update: {"passed": True, "has_update": has_update, "reason": "Memory update optional for this score"}
+        for has_update in (False, True)
+    }
+    
+    # Request bodies are pre-encoded JSON
+    _JSON_HEADERS = {"Content-Type": "application/json"}
+    
+    # Retries for a rate-limited (429) or overloaded (503) call, with exponential backoff
+    RETRY_STATUS_CODES = (429, 503)
+    MAX_RATE_LIMIT_RETRIES = 4
+    RATE_LIMIT_BACKOFF = 0.5  # seconds before the first retry
+    # Pacing shared by all requests: grows on each 429/503, halves on each success
+    MAX_RATE_DELAY = 8.0  # seconds
+    MIN_RATE_DELAY = 0.05  # below this, pacing is switched off
+    
+    # Slow Brain requests from concurrent scenarios are collected for this
+    # long, then sent together to /analyze-batch (at most MAX_BATCH per call)
+    BATCH_WINDOW = 0.05  # seconds
+    MAX_BATCH = 32  # matches the server's MAX_ANALYZE_BATCH
+    
+    # Part of every Slow Brain cache key; bump when the model or prompt changes
+    # so responses cached for the old one are never reused
+    SLOW_BRAIN_CACHE_VERSION = "1"
+    # Reasoning of the server's Fast-Brain-only fallback responses, never cached
+    _FALLBACK_REASONING_PREFIXES = ("Fast Brain analysis only", "Memory engine not available")
+    
+    def __init__(self, api_base_url: str = "http://localhost:8000", max_parallel: int = 4,
+                 fail_fast: bool = False, batch: bool = True,
+                 slow_brain_cache_path: Optional[str] = None):
         """
         Initialize the validator.
         
         Args:
             api_base_url: Base URL for the FastAPI backend
+            max_parallel: Maximum number of scenarios validated at once
+            fail_fast: Stop a scenario's checks at its first failure (smoke-test mode)
+            batch: Send concurrent Slow Brain requests through /analyze-batch
+            slow_brain_cache_path: SQLite file caching Slow Brain responses by
+                request content, so re-runs skip the LLM (None to disable)
         """
         self.api_base_url = api_base_url
+        self.max_parallel = max_parallel
+        self.fail_fast = fail_fast
+        self.batch = batch
+        # False once the server turns out not to have /analyze-batch
+        self._batch_supported: Optional[bool] = None
+        # Slow Brain requests waiting for the next batch, with their result futures
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._slow_brain_cache: Optional[sqlite3.Connection] = None
+        if slow_brain_cache_path:
+            self._slow_brain_cache = sqlite3.connect(slow_brain_cache_path)
+            self._slow_brain_cache.execute(
+                "CREATE TABLE IF NOT EXISTS slow_brain "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, inserted_at REAL NOT NULL)"
+            )
+        # Shared by every request in run_validation_suite (keep-alive across scenarios)
+        self._client: Optional[httpx.AsyncClient] = None
+        # Seconds to wait before each new POST; 0 until the server pushes back
+        self._rate_delay = 0.0
+        # Fast Brain for the loaded baseline, built once per suite run
+        self.engine: Optional["ImpulseInferenceEngine"] = None
+        # Fast Brain results for self.engine, keyed by canonical biometric JSON
+        self._fast_cache: Dict[bytes, Dict[str, Any]] = {}
+        # JSON Lines file each scenario result is appended to as it finishes
+        self._results_stream_path: Optional[str] = None
+        self._results_stream = None
+        # Wall-clock anchor; result timestamps are offsets on the monotonic clock
+        self._wall0 = datetime.now()
+        self._mono0 = time.monotonic()
         self.results = []
-        self.validation_summary = {
-            "total_scenarios": 0,
-            "passed": 0,
-            "failed": 0,
-            "warnings": 0,
-            "consistency_checks": {"passed": 0, "failed": 0},
-            "reasoning_checks": {"passed": 0, "failed": 0},
-            "intervention_checks": {"passed": 0, "failed": 0},
-            "memory_checks": {"passed": 0, "failed": 0}
+    
+    # Check categories, in report order
+    CHECK_CATEGORIES = ("consistency", "reasoning", "intervention", "memory")
+    
+    @property
+    def validation_summary(self) -> Dict[str, Any]:
+        """
+        Summary statistics over the scenarios validated so far.
+        
+        Reduced from self.results on demand, so concurrent scenarios never
+        share mutable counters. Scenarios whose Slow Brain call failed, and
+        checks skipped by fail_fast, are not counted.
+        """
+        validations = [
+            r["validation"] for r in self.results if "error" not in r["validation"]
+        ]
+        passed = sum(v["overall_passed"] for v in validations)
+        summary = {
+            "total_scenarios": len(validations),
+            "passed": passed,
+            "failed": len(validations) - passed,
+            "warnings": 0
         }
+        for category in self.CHECK_CATEGORIES:
+            outcomes = Counter(v[category]["passed"] for v in validations if category in v)
+            summary[f"{category}_checks"] = {"passed": outcomes[True], "failed": outcomes[False]}
+        return summary
+    
+    def _now_iso(self) -> str:
+        """Current time as ISO 8601, monotonic within a run (immune to clock changes)."""
+        return (self._wall0 + timedelta(seconds=time.monotonic() - self._mono0)).isoformat()
     
     def load_scenarios(self, scenarios_file: str = "test_scenarios.json") -> Dict[str, Any]:
         """
@@ -74,47 +227,54 @@ class ModelValidator:
             Dictionary containing baseline data and scenarios
         """
         try:
-            with open(scenarios_file, 'r') as f:
-                data = json.load(f)
-            print(f"✓ Loaded {len(data['scenarios'])} test scenarios")
+            with open(scenarios_file, 'rb') as f:
+                data = orjson.loads(f.read())
+            logger.info(f"✓ Loaded {len(data['scenarios'])} test scenarios")
             return data
         except FileNotFoundError:
-            print(f"❌ Error: Scenarios file not found: {scenarios_file}")
+            logger.error(f"❌ Error: Scenarios file not found: {scenarios_file}")
             sys.exit(1)
-        except json.JSONDecodeError as e:
-            print(f"❌ Error: Invalid JSON in scenarios file: {e}")
+        except orjson.JSONDecodeError as e:
+            logger.error(f"❌ Error: Invalid JSON in scenarios file: {e}")
             sys.exit(1)
     
-    async def run_fast_brain(self, 
-                            baseline_data: Dict[str, Any],
-                            biometric_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _fast_brain(self, biometric_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Synchronous Fast Brain evaluation behind run_fast_brain."""
+        engine = self.engine
+        p_impulse_fast = engine.calculate_p_impulse(biometric_data)
+        intervention_level = engine.get_intervention_level(p_impulse_fast)
+        structured_output = engine.get_structured_output(biometric_data)
+        
+        return {
+            "p_impulse_fast": p_impulse_fast,
+            "intervention_level": intervention_level,
+            "dominant_trigger": structured_output.get("dominant_trigger"),
+            "contributions": structured_output.get("contributions"),
+            "validation": engine.validate_logic(biometric_data, p_impulse_fast)
+        }
+    
+    async def run_fast_brain(self, biometric_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Run Fast Brain (Bayesian Inference Engine).
+        Run Fast Brain (Bayesian Inference Engine) with the suite's engine.
         
         Args:
-            baseline_data: User baseline statistics
             biometric_data: Current biometric and telemetry data
             
         Returns:
             Fast Brain results including p_impulse and structured output
         """
         try:
-            engine = ImpulseInferenceEngine(
-                baseline_data=baseline_data,
-                prior_p=0.2
-            )
-            
-            p_impulse_fast = engine.calculate_p_impulse(biometric_data)
-            intervention_level = engine.get_intervention_level(p_impulse_fast)
-            structured_output = engine.get_structured_output(biometric_data)
-            
-            return {
-                "p_impulse_fast": p_impulse_fast,
-                "intervention_level": intervention_level,
-                "dominant_trigger": structured_output.get("dominant_trigger"),
-                "contributions": structured_output.get("contributions"),
-                "validation": engine.validate_logic(biometric_data, p_impulse_fast)
-            }
+            # The engine is deterministic for a given baseline, so scenarios
+            # that share biometrics reuse the first result
+            key = orjson.dumps(biometric_data, option=orjson.OPT_SORT_KEYS)
+            cached = self._fast_cache.get(key)
+            if cached is not None:
+                return cached
+            # The engine is synchronous; run it on a worker thread so other
+            # scenarios' Slow Brain requests keep moving meanwhile
+            result = await asyncio.to_thread(self._fast_brain, biometric_data)
+            self._fast_cache[key] = result
+            return result
         except Exception as e:
             return {
                 "error": str(e),
@@ -142,30 +302,131 @@ class ModelValidator:
             "website": purchase_data["website"]
         }
         
-        try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.api_base_url}/analyze",
-                    json=request_data
+        if self._slow_brain_cache is None:
+            return await self._request_slow_brain(request_data)
+        
+        key = self._slow_brain_cache_key(request_data)
+        row = self._slow_brain_cache.execute(
+            "SELECT value FROM slow_brain WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            return orjson.loads(row[0])
+        
+        result = await self._request_slow_brain(request_data)
+        if result is not None and not str(result.get("reasoning", "")).startswith(
+                self._FALLBACK_REASONING_PREFIXES):
+            with self._slow_brain_cache:
+                self._slow_brain_cache.execute(
+                    "INSERT OR REPLACE INTO slow_brain VALUES (?, ?, ?)",
+                    (key, orjson.dumps(result), time.time())
                 )
-                response.raise_for_status()
-                return response.json()
+        return result
+    
+    def _slow_brain_cache_key(self, request_data: Dict[str, Any]) -> str:
+        """Content hash of a Slow Brain request (score rounded to 3 places)."""
+        return hashlib.blake2b(orjson.dumps([
+            self.SLOW_BRAIN_CACHE_VERSION,
+            round(request_data["p_impulse_fast"], 3),
+            request_data["product"],
+            request_data["cost"],
+            request_data["website"],
+        ]), digest_size=16).hexdigest()
+    
+    async def _request_slow_brain(self, request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Send one Slow Brain request, batched with concurrent ones when enabled."""
+        if not self.batch or self._batch_supported is False:
+            return await self._analyze_one(request_data)
+        
+        # Queue for the next batch; the first request in a window schedules the flush
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((request_data, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+        return await future
+    
+    async def _post_json(self, path: str, payload: Any) -> httpx.Response:
+        """POST to the API, backing off only when it answers 429 or 503."""
+        if self._rate_delay:
+            await asyncio.sleep(self._rate_delay)
+        # Encode once with orjson (the Fast Brain score may be a NumPy scalar),
+        # rather than through httpx's stdlib json on every attempt
+        content = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+        delay = self.RATE_LIMIT_BACKOFF
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+            response = await self._client.post(path, content=content, headers=self._JSON_HEADERS)
+            if response.status_code not in self.RETRY_STATUS_CODES:
+                # Server is keeping up: let the pacing decay back towards none
+                self._rate_delay /= 2
+                if self._rate_delay < self.MIN_RATE_DELAY:
+                    self._rate_delay = 0.0
+                break
+            # Pushed back: slow every request down, not just this one
+            self._rate_delay = min(
+                max(self._rate_delay * 2, self.RATE_LIMIT_BACKOFF), self.MAX_RATE_DELAY
+            )
+            if attempt == self.MAX_RATE_LIMIT_RETRIES:
+                break
+            # Wait (Retry-After if the server sent one) and retry
+            retry_after = response.headers.get("retry-after", "")
+            await asyncio.sleep(float(retry_after) if retry_after.isdigit() else delay)
+            delay *= 2
+        return response
+    
+    async def _analyze_one(self, request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run one Slow Brain request through /analyze."""
+        try:
+            response = await self._post_json("/analyze", request_data)
+            response.raise_for_status()
+            return orjson.loads(response.content)
         except httpx.HTTPError as e:
-            print(f"\n⚠️  Slow Brain API error: {e}")
+            logger.warning(f"\n⚠️  Slow Brain API error: {e}")
             return None
         except Exception as e:
-            print(f"\n⚠️  Unexpected error calling Slow Brain: {e}")
+            logger.warning(f"\n⚠️  Unexpected error calling Slow Brain: {e}")
             return None
     
+    async def _analyze_batch(self, items: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Run Slow Brain requests through /analyze-batch, falling back to /analyze."""
+        if len(items) == 1:
+            return [await self._analyze_one(items[0])]
+        try:
+            response = await self._post_json("/analyze-batch", {"requests": items})
+            if response.status_code in (404, 405):
+                # Server predates /analyze-batch: remember, and send these one by one
+                self._batch_supported = False
+                return list(await asyncio.gather(*(self._analyze_one(item) for item in items)))
+            response.raise_for_status()
+            self._batch_supported = True
+            return orjson.loads(response.content)["results"]
+        except httpx.HTTPError as e:
+            logger.warning(f"\n⚠️  Slow Brain batch API error: {e}")
+        except Exception as e:
+            logger.warning(f"\n⚠️  Unexpected error calling Slow Brain batch: {e}")
+        return [None] * len(items)
+    
+    async def _flush_after_window(self):
+        """Wait BATCH_WINDOW, then send everything queued and resolve its futures."""
+        await asyncio.sleep(self.BATCH_WINDOW)
+        pending, self._pending, self._flush_task = self._pending, [], None
+        chunks = [pending[i:i + self.MAX_BATCH] for i in range(0, len(pending), self.MAX_BATCH)]
+        batch_results = await asyncio.gather(
+            *(self._analyze_batch([data for data, _ in chunk]) for chunk in chunks)
+        )
+        for chunk, results in zip(chunks, batch_results):
+            for (_, future), result in zip(chunk, results):
+                future.set_result(result)
+    
     def validate_consistency(self,
                             fast_brain_result: Dict[str, Any],
-                            slow_brain_result: Dict[str, Any]) -> Dict[str, Any]:
+                            slow_brain_result: Dict[str, Any],
+                            reasoning: Optional[str] = None) -> Dict[str, Any]:
         """
         Validate consistency: Slow Brain should contextually adjust Fast Brain score.
         
         Args:
             fast_brain_result: Fast Brain analysis
             slow_brain_result: Slow Brain analysis
+            reasoning: Lowercased reasoning, if the caller already has it
             
         Returns:
             Validation result with passed/failed status and details
@@ -187,11 +448,9 @@ class ModelValidator:
             # and context supports it, this is acceptable
             if p_fast <= 0.05 or p_fast >= 0.95:
                 # Check if reasoning justifies the extreme score
-                reasoning = slow_brain_result.get("reasoning", "")
-                has_context_justification = any(kw in reasoning.lower() for kw in 
-                    ["within budget", "aligns with", "violates", "exceeds", "conflicts", 
-                     "budget", "goal", "limit", "supports", "appropriate"])
-                if has_context_justification:
+                if reasoning is None:
+                    reasoning = slow_brain_result.get("reasoning", "").lower()
+                if self._EXTREME_JUSTIFICATION_RE.search(reasoning):
                     return {
                         "passed": True,
                         "score_adjustment": p_slow - p_fast,
@@ -206,10 +465,9 @@ class ModelValidator:
         score_diff = p_slow - p_fast
         if abs(score_diff) > 0.3:
             # Large adjustment - should be justified in reasoning
-            reasoning = slow_brain_result.get("reasoning", "")
-            has_justification = any(keyword in reasoning.lower() for keyword in 
-                                   ["budget", "goal", "savings", "limit", "exceeded", "aligns", "conflicts"])
-            if not has_justification:
+            if reasoning is None:
+                reasoning = slow_brain_result.get("reasoning", "").lower()
+            if not self._LARGE_ADJUSTMENT_RE.search(reasoning):
                 return {
                     "passed": False,
                     "reason": f"Large score adjustment ({score_diff:+.3f}) not justified in reasoning"
@@ -221,17 +479,21 @@ class ModelValidator:
             "reason": "Contextual adjustment appropriate"
         }
     
-    def validate_reasoning_quality(self, slow_brain_result: Dict[str, Any]) -> Dict[str, Any]:
+    def validate_reasoning_quality(self,
+                                   slow_brain_result: Dict[str, Any],
+                                   reasoning: Optional[str] = None) -> Dict[str, Any]:
         """
         Validate reasoning quality: Should cite specific user goals/budget.
         
         Args:
             slow_brain_result: Slow Brain analysis
+            reasoning: Lowercased reasoning, if the caller already has it
             
         Returns:
             Validation result with passed/failed status and details
         """
-        reasoning = slow_brain_result.get("reasoning", "").lower()
+        if reasoning is None:
+            reasoning = slow_brain_result.get("reasoning", "").lower()
         
         if not reasoning or len(reasoning) < 20:
             return {
@@ -240,19 +502,13 @@ class ModelValidator:
             }
         
         # Check for specific citations from memory
-        memory_citations = []
-        if "goals.md" in reasoning or "goal" in reasoning:
-            memory_citations.append("Goals")
-        if "budget.md" in reasoning or "budget" in reasoning or "spending limit" in reasoning:
-            memory_citations.append("Budget")
-        if "state.md" in reasoning or "balance" in reasoning or "financial state" in reasoning:
-            memory_citations.append("State")
-        if "behavior.md" in reasoning or "pattern" in reasoning or "behavior" in reasoning:
-            memory_citations.append("Behavior")
+        memory_citations = [
+            name for name, pattern in self._MEMORY_CITATION_RES
+            if pattern.search(reasoning)
+        ]
         
         # Check for specific values/amounts
-        has_specifics = any(indicator in reasoning for indicator in 
-                          ["$", "limit", "spent", "remaining", "save", "vacation", "emergency fund"])
+        has_specifics = self._SPECIFICS_RE.search(reasoning) is not None
         
         if not memory_citations:
             return {
@@ -287,17 +543,11 @@ class ModelValidator:
         score = slow_brain_result.get("impulse_score", 0.5)
         action = slow_brain_result.get("intervention_action", "NONE")
         
-        # Define expected actions based on thresholds
-        if score < 0.3:
-            expected = ["NONE"]
-        elif score < 0.6:
-            expected = ["NONE", "MIRROR"]
-        elif score < 0.8:
-            expected = ["MIRROR", "COOLDOWN", "PHRASE"]
-        else:
-            expected = ["COOLDOWN", "PHRASE"]
+        # Expected actions for the score's threshold band
+        band = bisect.bisect_right(self._INTERVENTION_THRESHOLDS, score)
         
-        if action not in expected:
+        if action not in self._EXPECTED_ACTION_SETS[band]:
+            expected = list(self._EXPECTED_ACTIONS[band])
             return {
                 "passed": False,
                 "score": score,
@@ -327,76 +577,62 @@ class ModelValidator:
             Validation result with passed/failed status and details
         """
         memory_update = slow_brain_result.get("memory_update")
-        score = slow_brain_result.get("impulse_score", 0.5)
         
-        # High impulse scenarios should often (but not always) generate memory updates
-        if score > 0.7:
-            if memory_update:
-                # Validate update is meaningful
-                if len(memory_update) < 10:
-                    return {
-                        "passed": False,
-                        "reason": "Memory update too short to be meaningful"
-                    }
-                return {
-                    "passed": True,
-                    "has_update": True,
-                    "update_length": len(memory_update),
-                    "reason": "Appropriate memory update generated"
-                }
-            else:
-                # No update is acceptable, just note it
-                return {
-                    "passed": True,
-                    "has_update": False,
-                    "reason": "No memory update (acceptable)"
-                }
-        else:
-            # Low/medium scores - update optional
-            return {
-                "passed": True,
-                "has_update": bool(memory_update),
-                "reason": "Memory update optional for this score"
-            }
+        # Low/medium scores - update optional
+        if not slow_brain_result.get("impulse_score", 0.5) > 0.7:
+            return self._MEMORY_UPDATE_OPTIONAL[bool(memory_update)]
+        
+        # High impulse scenarios should often (but not always) generate memory updates;
+        # no update is acceptable, just note it
+        if not memory_update:
+            return self._MEMORY_UPDATE_MISSING_OK
+        
+        # Validate update is meaningful
+        update_length = len(memory_update)
+        if update_length < 10:
+            return self._MEMORY_UPDATE_TOO_SHORT
+        return {
+            "passed": True,
+            "has_update": True,
+            "update_length": update_length,
+            "reason": "Appropriate memory update generated"
+        }
     
     async def validate_scenario(self,
                                scenario: Dict[str, Any],
-                               baseline_data: Dict[str, Any]) -> Dict[str, Any]:
+                               log: Callable[[str], None] = logger.info) -> Dict[str, Any]:
         """
         Run complete validation for a single scenario.
         
         Args:
             scenario: Test scenario data
-            baseline_data: User baseline statistics
+            log: Where progress lines go (the suite buffers them per scenario)
             
         Returns:
             Complete validation results for the scenario
         """
-        print(f"\n{'='*80}")
-        print(f"Scenario: {scenario['name']}")
-        print(f"ID: {scenario['id']}")
-        print(f"{'='*80}")
+        log(f"\n{'='*80}")
+        log(f"Scenario: {scenario['name']}")
+        log(f"ID: {scenario['id']}")
+        log(f"{'='*80}")
         
         result = {
             "scenario_id": scenario["id"],
             "scenario_name": scenario["name"],
             "description": scenario["description"],
             "expected_outcome": scenario["expected_outcome"],
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now_iso()
         }
         
         # Step 1: Run Fast Brain
-        print("\n[1/4] Running Fast Brain...")
-        fast_brain_result = await self.run_fast_brain(
-            baseline_data,
-            scenario["biometric_data"]
-        )
+        log("\n[1/4] Running Fast Brain...")
+        fast_brain_result = await self.run_fast_brain(scenario["biometric_data"])
         result["fast_brain"] = fast_brain_result
-        print(f"      p_impulse_fast: {fast_brain_result.get('p_impulse_fast', 'N/A'):.3f}")
-        print(f"      Intervention: {fast_brain_result.get('intervention_level', 'N/A')}")
+        log(f"      p_impulse_fast: {fast_brain_result.get('p_impulse_fast', 'N/A'):.3f}")
+        log(f"      Intervention: {fast_brain_result.get('intervention_level', 'N/A')}")
         
         # Step 2: Run Slow Brain
-        print("\n[2/4] Running Slow Brain...")
+        log("\n[2/4] Running Slow Brain...")
         slow_brain_result = await self.run_slow_brain(
             fast_brain_result["p_impulse_fast"],
             scenario["purchase_data"]
@@ -411,84 +647,100 @@ class ModelValidator:
             return result
         
         result["slow_brain"] = slow_brain_result
-        print(f"      impulse_score: {slow_brain_result.get('impulse_score', 'N/A'):.3f}")
-        print(f"      Confidence: {slow_brain_result.get('confidence', 'N/A'):.3f}")
-        print(f"      Intervention: {slow_brain_result.get('intervention_action', 'N/A')}")
+        log(f"      impulse_score: {slow_brain_result.get('impulse_score', 'N/A'):.3f}")
+        log(f"      Confidence: {slow_brain_result.get('confidence', 'N/A'):.3f}")
+        log(f"      Intervention: {slow_brain_result.get('intervention_action', 'N/A')}")
         
         # Step 3: Run validation checks
-        print("\n[3/4] Running validation checks...")
-        
-        consistency = self.validate_consistency(fast_brain_result, slow_brain_result)
-        print(f"      Consistency: {'✓ PASS' if consistency['passed'] else '✗ FAIL'} - {consistency['reason']}")
+        log("\n[3/4] Running validation checks...")
         
-        reasoning = self.validate_reasoning_quality(slow_brain_result)
-        print(f"      Reasoning: {'✓ PASS' if reasoning['passed'] else '✗ FAIL'} - {reasoning['reason']}")
-        
-        intervention = self.validate_intervention_logic(slow_brain_result)
-        print(f"      Intervention: {'✓ PASS' if intervention['passed'] else '✗ FAIL'} - {intervention['reason']}")
-        
-        memory = self.validate_memory_updates(scenario, slow_brain_result)
-        print(f"      Memory: {'✓ PASS' if memory['passed'] else '✗ FAIL'} - {memory['reason']}")
+        # Lowercase the reasoning once for both checks that scan it
+        reasoning = slow_brain_result.get("reasoning", "").lower()
+        validators = (
+            ("consistency", lambda: self.validate_consistency(fast_brain_result, slow_brain_result, reasoning)),
+            ("reasoning", lambda: self.validate_reasoning_quality(slow_brain_result, reasoning)),
+            ("intervention", lambda: self.validate_intervention_logic(slow_brain_result)),
+            ("memory", lambda: self.validate_memory_updates(scenario, slow_brain_result)),
+        )
+        checks = {}
+        for category, validate in validators:
+            check = checks[category] = validate()
+            log(f"      {category.title()}: {'✓ PASS' if check['passed'] else '✗ FAIL'} - {check['reason']}")
+            if self.fail_fast and not check["passed"]:
+                break
         
         # Step 4: Overall assessment
-        all_checks = [consistency, reasoning, intervention, memory]
-        overall_passed = all(check["passed"] for check in all_checks)
+        overall_passed = len(checks) == len(validators) and all(
+            check["passed"] for check in checks.values()
+        )
         
         result["validation"] = {
             "overall_passed": overall_passed,
-            "consistency": consistency,
-            "reasoning": reasoning,
-            "intervention": intervention,
-            "memory": memory
+            **checks
         }
         
-        print(f"\n[4/4] Overall: {'✓ PASSED' if overall_passed else '✗ FAILED'}")
-        
-        # Update summary statistics
-        self.validation_summary["total_scenarios"] += 1
-        if overall_passed:
-            self.validation_summary["passed"] += 1
-        else:
-            self.validation_summary["failed"] += 1
-        
-        # Update category statistics
-        for category, check in [("consistency", consistency), ("reasoning", reasoning),
-                               ("intervention", intervention), ("memory", memory)]:
-            key = f"{category}_checks"
-            if check["passed"]:
-                self.validation_summary[key]["passed"] += 1
-            else:
-                self.validation_summary[key]["failed"] += 1
+        log(f"\n[4/4] Overall: {'✓ PASSED' if overall_passed else '✗ FAILED'}")
         
         return result
     
-    async def run_validation_suite(self, scenarios_file: str = "test_scenarios.json") -> List[Dict[str, Any]]:
+    async def run_validation_suite(self, scenarios_file: str = "test_scenarios.json",
+                                   results_stream_file: Optional[str] = "validation_results.jsonl"
+                                   ) -> List[Dict[str, Any]]:
         """
         Run the complete validation suite.
         
         Args:
             scenarios_file: Path to scenarios JSON file
+            results_stream_file: JSON Lines file that gets each scenario's result
+                as soon as it finishes (None to disable)
             
         Returns:
             List of validation results for all scenarios
         """
-        print("\n" + "="*80)
-        print("ImpulseGuard Model Validation Suite")
-        print("="*80)
-        print(f"Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"API Base URL: {self.api_base_url}")
-        
+        logger.info("\n" + "="*80)
+        logger.info("ImpulseGuard Model Validation Suite")
+        logger.info("="*80)
+        logger.info(f"Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info(f"API Base URL: {self.api_base_url}")
+        
+        # One client for the health check and every scenario, so requests
+        # reuse a pooled connection instead of reconnecting each time
+        async with httpx.AsyncClient(base_url=self.api_base_url, timeout=60.0) as client:
+            self._client = client
+            self._results_stream_path = results_stream_file
+            try:
+                return await self._run_suite(scenarios_file)
+            finally:
+                self._client = None
+                self._results_stream_path = None
+                if self._results_stream is not None:
+                    self._results_stream.close()
+                    self._results_stream = None
+    
+    def _stream_result(self, result: Dict[str, Any]):
+        """Append one scenario result to the JSON Lines stream, opening it on first use."""
+        if self._results_stream_path is None:
+            return
+        if self._results_stream is None:
+            self._results_stream = open(self._results_stream_path, 'wb')
+        self._results_stream.write(orjson.dumps(
+            result, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        ))
+        # Flushed per scenario so finished results are on disk even if the run dies
+        self._results_stream.flush()
+    
+    async def _run_suite(self, scenarios_file: str) -> List[Dict[str, Any]]:
+        """Health-check the API, then validate every scenario (needs self._client)."""
         # Check API health
-        print("\nChecking API availability...")
+        logger.info("\nChecking API availability...")
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.api_base_url}/health")
-                response.raise_for_status()
-            print("✓ API is available")
+            response = await self._client.get("/health", timeout=5.0)
+            response.raise_for_status()
+            logger.info("✓ API is available")
         except Exception as e:
-            print(f"✗ API is not available: {e}")
-            print("\nPlease start the FastAPI server:")
-            print("  cd backend && uvicorn app:app --reload")
+            logger.error(f"✗ API is not available: {e}")
+            logger.info("\nPlease start the FastAPI server:")
+            logger.info("  cd backend && uvicorn app:app --reload")
             sys.exit(1)
         
         # Load scenarios
@@ -496,20 +748,46 @@ class ModelValidator:
         baseline_data = data["baseline_data"]
         scenarios = data["scenarios"]
         
-        print(f"\nBaseline Data: {json.dumps(baseline_data, indent=2)}")
-        print(f"\nRunning {len(scenarios)} scenarios...")
+        logger.info(f"\nBaseline Data: {orjson.dumps(baseline_data, option=orjson.OPT_INDENT_2).decode()}")
         
-        # Run each scenario
-        for i, scenario in enumerate(scenarios, 1):
-            print(f"\n\n{'#'*80}")
-            print(f"# Scenario {i}/{len(scenarios)}")
-            print(f"{'#'*80}")
-            
-            result = await self.validate_scenario(scenario, baseline_data)
-            self.results.append(result)
-            
-            # Longer delay between scenarios to avoid rate limiting (429 errors)
-            await asyncio.sleep(3)
+        # Check dependencies
+        try:
+            from inference_engine import ImpulseInferenceEngine
+        except ImportError:
+            logger.error("❌ Error: inference_engine module not found.")
+            sys.exit(1)
+        
+        # The baseline is the same for every scenario, so build the Fast Brain once
+        try:
+            self.engine = ImpulseInferenceEngine(
+                baseline_data=baseline_data,
+                prior_p=0.2
+            )
+            self._fast_cache.clear()
+        except Exception as e:
+            logger.error(f"❌ Error: Invalid baseline data in scenarios file: {e}")
+            sys.exit(1)
+        logger.info(f"\nRunning {len(scenarios)} scenarios ({self.max_parallel} at a time)...")
+        
+        # Scenarios are independent, so overlap their requests; the semaphore
+        # bounds the load and _post_json backs off on 429/503s
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        
+        async def run_one(i: int, scenario: Dict[str, Any]) -> Dict[str, Any]:
+            # Buffer each scenario's output so concurrent runs don't interleave
+            lines = [f"\n\n{'#'*80}", f"# Scenario {i}/{len(scenarios)}", f"{'#'*80}"]
+            async with semaphore:
+                result = await self.validate_scenario(scenario, log=lines.append)
+            logger.info("\n".join(lines))
+            self.results.append(result)  # kept as soon as done, for partial saves
+            self._stream_result(result)
+            return result
+        
+        start = len(self.results)
+        ordered = await asyncio.gather(
+            *(run_one(i, scenario) for i, scenario in enumerate(scenarios, 1))
+        )
+        self.results[start:] = ordered  # back in scenario order
         
         # Print summary
         self.print_summary()
@@ -518,9 +796,9 @@ class ModelValidator:
     
     def print_summary(self):
         """Print validation summary statistics."""
-        print("\n\n" + "="*80)
-        print("VALIDATION SUMMARY")
-        print("="*80)
+        logger.info("\n\n" + "="*80)
+        logger.info("VALIDATION SUMMARY")
+        logger.info("="*80)
         
         summary = self.validation_summary
         total = summary["total_scenarios"]
@@ -528,21 +806,21 @@ class ModelValidator:
         failed = summary["failed"]
         pass_rate = (passed / total * 100) if total > 0 else 0
         
-        print(f"\nOverall Results:")
-        print(f"  Total Scenarios: {total}")
-        print(f"  Passed: {passed} ({pass_rate:.1f}%)")
-        print(f"  Failed: {failed}")
+        logger.info(f"\nOverall Results:")
+        logger.info(f"  Total Scenarios: {total}")
+        logger.info(f"  Passed: {passed} ({pass_rate:.1f}%)")
+        logger.info(f"  Failed: {failed}")
         
-        print(f"\nValidation Criteria Breakdown:")
-        for category in ["consistency", "reasoning", "intervention", "memory"]:
+        logger.info(f"\nValidation Criteria Breakdown:")
+        for category in self.CHECK_CATEGORIES:
             key = f"{category}_checks"
             cat_passed = summary[key]["passed"]
             cat_failed = summary[key]["failed"]
             cat_total = cat_passed + cat_failed
             cat_rate = (cat_passed / cat_total * 100) if cat_total > 0 else 0
-            print(f"  {category.title()}: {cat_passed}/{cat_total} ({cat_rate:.1f}%)")
+            logger.info(f"  {category.title()}: {cat_passed}/{cat_total} ({cat_rate:.1f}%)")
         
-        print(f"\n{'='*80}")
+        logger.info(f"\n{'='*80}")
     
     def save_results(self, output_file: str = "validation_results.json"):
         """
@@ -551,25 +829,32 @@ class ModelValidator:
         Args:
             output_file: Output file path
         """
+        summary = self.validation_summary
         output_data = {
             "metadata": {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": self._now_iso(),
                 "api_base_url": self.api_base_url,
-                "total_scenarios": self.validation_summary["total_scenarios"]
+                "total_scenarios": summary["total_scenarios"]
             },
-            "summary": self.validation_summary,
+            "summary": summary,
             "results": self.results
         }
         
-        with open(output_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
+        # Fast Brain results can carry NumPy scalars; orjson serializes them directly
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(
+                output_data,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ))
         
-        print(f"\n✓ Results saved to: {output_file}")
+        logger.info(f"\n✓ Results saved to: {output_file}")
 
 
 async def main():
     """Main execution function."""
-    validator = ModelValidator()
+    # Opt-in response cache for fast re-runs while iterating on the validator
+    validator = ModelValidator(slow_brain_cache_path=os.getenv("VALIDATION_SLOW_BRAIN_CACHE"))
+    listener = start_log_listener()
     
     try:
         results = await validator.run_validation_suite()
@@ -582,15 +867,20 @@ async def main():
             sys.exit(0)
             
     except KeyboardInterrupt:
-        print("\n\n⚠️  Validation interrupted by user")
+        logger.warning("\n\n⚠️  Validation interrupted by user")
         validator.save_results("validation_results_partial.json")
         sys.exit(130)
     except Exception as e:
-        print(f"\n\n❌ Validation failed with error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n\n❌ Validation failed with error: {e}")
         sys.exit(1)
+    finally:
+        # Drain queued log lines before the process exits
+        listener.stop()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop's libuv event loop where available; the stock loop otherwise
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
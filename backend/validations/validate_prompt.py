@@ -10,20 +10,61 @@ Usage:
     cd backend
     source venv/bin/activate
     python validate_prompt.py
+
+    # Ignore (and don't write) cached pipeline responses
+    python validate_prompt.py --no-cache
+
+    # Only run scenarios whose name contains the given text
+    python validate_prompt.py --filter "2 AM"
 """
 
-import asyncio
-import httpx
+import hashlib
 import json
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+import orjson
+import os
+import tempfile
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
+# httpx, asyncio and datetime are imported where a suite actually runs, so
+# importing this module for its scenarios or checks stays cheap
+if TYPE_CHECKING:
+    import httpx
+
 # Backend API URL
 BACKEND_URL = "http://localhost:8000"
 
+# Scenarios in flight at once (also the connection pool size)
+MAX_PARALLEL = 8
+
+# Request bodies are pre-encoded JSON
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Retries for a rate-limited (429) or overloaded (503) request, honoring
+# Retry-After and otherwise backing off exponentially
+RETRY_STATUS_CODES = (429, 503)
+MAX_RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF = 1.0  # seconds before the first retry
+
+# One JSON line per scenario, appended as each finishes; counts go to the summary
+RESULTS_FILE = "prompt_validation_results.jsonl"
+SUMMARY_FILE = "prompt_validation_summary.json"
+
+# Pipeline responses cached on disk, keyed by request body. Keys also cover
+# CACHE_VERSION and the backend inputs a response depends on (the prompt in
+# memory.py, the Fast Brain weights, the pipeline in app.py and the memory
+# Markdown files), so editing any of them never serves stale responses.
+CACHE_DIR = Path.home() / ".cache" / "impulseguard" / "prompt_validation"
+CACHE_VERSION = "1"  # bump to drop every cached response
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BACKEND_MODULES = ("memory.py", "inference_engine.py", "app.py")
+# Same default and override as app.MEMORY_DIR
+MEMORY_STORE_DIR = Path(os.getenv("MEMORY_STORE_DIR") or BACKEND_DIR / "memory_store")
 
-@dataclass
+
+@dataclass(frozen=True)
 class TestScenario:
     """A test scenario for validating prompt behavior."""
     name: str
@@ -38,260 +79,129 @@ class TestScenario:
     # Expected outcomes
     expected_score_max: float  # Score should be <= this
     expected_score_min: float  # Score should be >= this  
-    expected_interventions: List[str]  # Acceptable interventions
-    reasoning_must_contain: List[str]  # Keywords that must appear in reasoning
+    expected_interventions: Tuple[str, ...]  # Acceptable interventions
+    reasoning_must_contain: Tuple[str, ...]  # Keywords that must appear in reasoning
     description: str  # Why this scenario should behave this way
-
-
-# Define test scenarios
-TEST_SCENARIOS = [
-    # === LOW RISK ESSENTIALS ===
-    TestScenario(
-        name="Spoon at 2 AM",
-        product="Stainless Steel Spoon Set",
-        cost=5.99,
-        website="amazon.com",
-        system_hour=2,
-        time_on_site=120,
-        click_count=5,
-        peak_scroll_velocity=200,
-        expected_score_max=0.45,
-        expected_score_min=0.0,
-        expected_interventions=["NONE"],
-        reasoning_must_contain=[],  # Just needs to be low
-        description="Essential household item - late night should NOT increase score"
-    ),
-    TestScenario(
-        name="Kitchen Utensils at Midnight",
-        product="Kitchen Utensil Set - Spatula Fork Spoon",
-        cost=12.99,
-        website="amazon.com",
-        system_hour=0,
-        time_on_site=180,
-        click_count=8,
-        peak_scroll_velocity=150,
-        expected_score_max=0.45,
-        expected_score_min=0.0,
-        expected_interventions=["NONE"],
-        reasoning_must_contain=[],
-        description="Kitchen essentials are low risk even at midnight"
-    ),
-    TestScenario(
-        name="Groceries Morning",
-        product="Organic Milk 1 Gallon",
-        cost=6.99,
-        website="amazon.com",
-        system_hour=10,
-        time_on_site=60,
-        click_count=3,
-        peak_scroll_velocity=100,
-        expected_score_max=0.35,
-        expected_score_min=0.0,
-        expected_interventions=["NONE"],
-        reasoning_must_contain=[],
-        description="Basic grocery item during normal hours"
-    ),
-    TestScenario(
-        name="Toilet Paper Bulk",
-        product="Toilet Paper 24 Pack",
-        cost=24.99,
-        website="amazon.com",
-        system_hour=23,
-        time_on_site=45,
-        click_count=2,
-        peak_scroll_velocity=50,
-        expected_score_max=0.40,
-        expected_score_min=0.0,
-        expected_interventions=["NONE"],
-        reasoning_must_contain=[],
-        description="Essential supplies - even late night should be fine"
-    ),
-    
-    # === HIGH RISK LUXURY ===
-    TestScenario(
-        name="Gaming Console at 2 AM",
-        product="PlayStation 5 Console",
-        cost=499.99,
-        website="amazon.com",
-        system_hour=2,
-        time_on_site=300,
-        click_count=15,
-        peak_scroll_velocity=400,
-        expected_score_max=1.0,
-        expected_score_min=0.70,
-        expected_interventions=["COOLDOWN", "PHRASE"],
-        reasoning_must_contain=["budget", "late"],
-        description="Expensive luxury item at 2 AM - should trigger strong intervention"
-    ),
-    TestScenario(
-        name="Flash Sale TV at Midnight",
-        product="65 inch 4K TV - FLASH SALE LIMITED TIME",
-        cost=799.99,
-        website="amazon.com",
-        system_hour=0,
-        time_on_site=120,
-        click_count=20,
-        peak_scroll_velocity=500,
-        expected_score_max=1.0,
-        expected_score_min=0.75,
-        expected_interventions=["COOLDOWN", "PHRASE"],
-        reasoning_must_contain=["budget"],
-        description="Flash sale language + expensive + late night = high risk"
-    ),
-    TestScenario(
-        name="Designer Shoes Afternoon",
-        product="Gucci Leather Sneakers",
-        cost=650.00,
-        website="gucci.com",
-        system_hour=14,
-        time_on_site=600,
-        click_count=25,
-        peak_scroll_velocity=200,
-        expected_score_max=1.0,
-        expected_score_min=0.60,
-        expected_interventions=["MIRROR", "COOLDOWN", "PHRASE"],
-        reasoning_must_contain=["budget"],
-        description="Luxury item way over budget - even during day should flag"
-    ),
     
-    # === GAMBLING (ALWAYS HIGH RISK) ===
-    TestScenario(
-        name="Poker Chips Gambling Site",
-        product="Poker Chips Bundle $100",
-        cost=100.00,
-        website="pokerstars.com",
-        system_hour=22,
-        time_on_site=180,
-        click_count=10,
-        peak_scroll_velocity=300,
-        expected_score_max=1.0,
-        expected_score_min=0.80,
-        expected_interventions=["COOLDOWN", "PHRASE"],
-        reasoning_must_contain=[],
-        description="Gambling site = always high risk"
-    ),
+    @cached_property
+    def reasoning_keywords_lower(self) -> Tuple[str, ...]:
+        """reasoning_must_contain lowercased once, for matching against lowercased reasoning."""
+        return tuple(keyword.lower() for keyword in self.reasoning_must_contain)
     
-    # === GOAL-ALIGNED PURCHASES ===
-    TestScenario(
-        name="Japanese Phrasebook (Goal Aligned)",
-        product="Japanese Language Phrasebook for Travel",
-        cost=19.99,
-        website="amazon.com",
-        system_hour=15,
-        time_on_site=300,
-        click_count=8,
-        peak_scroll_velocity=150,
-        expected_score_max=0.45,
-        expected_score_min=0.0,
-        expected_interventions=["NONE"],
-        reasoning_must_contain=["japan", "goal"],
-        description="Aligns with stated goal to save for Japan trip"
-    ),
-    TestScenario(
-        name="Travel Luggage (Goal Aligned)",
-        product="Carry-On Luggage for Travel",
-        cost=89.99,
-        website="amazon.com",
-        system_hour=12,
-        time_on_site=400,
-        click_count=12,
-        peak_scroll_velocity=180,
-        expected_score_max=0.55,
-        expected_score_min=0.0,
-        expected_interventions=["NONE", "MIRROR"],
-        reasoning_must_contain=["travel", "goal"],
-        description="Travel gear for planned Japan trip"
-    ),
+    @cached_property
+    def request_body(self) -> Dict[str, Any]:
+        """The /pipeline-analyze request for this scenario."""
+        return {
+            "product": self.product,
+            "cost": self.cost,
+            "website": self.website,
+            "time_to_cart": self.time_on_site * 0.8,  # Assume 80% of time before cart
+            "time_on_site": self.time_on_site,
+            "click_count": self.click_count,
+            "peak_scroll_velocity": self.peak_scroll_velocity,
+            "system_hour": self.system_hour
+        }
     
-    # === BUDGET VIOLATIONS ===
-    TestScenario(
-        name="Expensive Headphones Over Electronics Budget",
-        product="Sony WH-1000XM5 Headphones",
-        cost=349.99,
-        website="amazon.com",
-        system_hour=16,
-        time_on_site=500,
-        click_count=15,
-        peak_scroll_velocity=200,
-        expected_score_max=1.0,  # Budget violations can be high
-        expected_score_min=0.55,
-        expected_interventions=["MIRROR", "COOLDOWN", "PHRASE"],  # Allow PHRASE for significant overages
-        reasoning_must_contain=["budget"],
-        description="Exceeds $300/month electronics budget"
-    ),
-    TestScenario(
-        name="Clothing Over Budget",
-        product="Winter Jacket Premium",
-        cost=280.00,
-        website="amazon.com",
-        system_hour=19,
-        time_on_site=350,
-        click_count=10,
-        peak_scroll_velocity=175,
-        expected_score_max=1.0,  # Budget violations can be high
-        expected_score_min=0.50,
-        expected_interventions=["MIRROR", "COOLDOWN", "PHRASE"],  # Allow PHRASE for significant overages
-        reasoning_must_contain=["budget"],
-        description="Exceeds $200/month clothing budget"
-    ),
+    @cached_property
+    def request_body_bytes(self) -> bytes:
+        """request_body encoded once with orjson, for reuse across requests and re-runs."""
+        return orjson.dumps(self.request_body)
+
+
+# Test scenarios live in a JSON asset, read the first time they're needed
+SCENARIOS_FILE = Path(__file__).resolve().parent / "test_scenarios_prompt.json"
+
+
+@lru_cache(maxsize=1)
+def get_scenarios() -> Tuple[TestScenario, ...]:
+    """Load the test scenarios from SCENARIOS_FILE (list fields become tuples, so scenarios hash)."""
+    data = orjson.loads(SCENARIOS_FILE.read_bytes())
+    return tuple(
+        TestScenario(**{
+            **scenario,
+            "expected_interventions": tuple(scenario["expected_interventions"]),
+            "reasoning_must_contain": tuple(scenario["reasoning_must_contain"]),
+        })
+        for scenario in data["scenarios"]
+    )
+
+
+@lru_cache(maxsize=1)
+def _backend_fingerprint() -> str:
+    """Hash of the backend modules and memory files, so cached responses are tied to them."""
+    digest = hashlib.sha256()
+    paths = [BACKEND_DIR / name for name in BACKEND_MODULES]
+    paths += sorted(MEMORY_STORE_DIR.glob("*.md"))
+    for path in paths:
+        digest.update(path.name.encode())
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            pass  # Missing file: hashed by name only
+    return digest.hexdigest()
+
+
+def _cache_path(request_body: Dict[str, Any]) -> Path:
+    """Cache file for a pipeline request."""
+    key = json.dumps(
+        {"version": CACHE_VERSION, "backend": _backend_fingerprint(), "request": request_body},
+        sort_keys=True
+    )
+    return CACHE_DIR / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+
+def _write_cache(path: Path, response: Dict[str, Any]) -> None:
+    """Write a cached response atomically (temp file, then rename)."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(response, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # Caching is best-effort
+
+
+async def run_scenario(client: "httpx.AsyncClient", scenario: TestScenario,
+                       use_cache: bool = True) -> Dict[str, Any]:
+    """Run a single test scenario through the pipeline API (or the response cache)."""
+    import asyncio
+    import httpx
     
-    # === MEDIUM RISK NORMAL ===
-    TestScenario(
-        name="Book During Day",
-        product="Python Programming Book",
-        cost=35.00,
-        website="amazon.com",
-        system_hour=11,
-        time_on_site=200,
-        click_count=6,
-        peak_scroll_velocity=120,
-        expected_score_max=0.50,
-        expected_score_min=0.0,
-        expected_interventions=["NONE", "MIRROR"],
-        reasoning_must_contain=[],
-        description="Reasonable discretionary purchase during normal hours"
-    ),
-    TestScenario(
-        name="Moderate Electronics",
-        product="Wireless Mouse",
-        cost=29.99,
-        website="amazon.com",
-        system_hour=14,
-        time_on_site=150,
-        click_count=5,
-        peak_scroll_velocity=100,
-        expected_score_max=0.45,
-        expected_score_min=0.0,
-        expected_interventions=["NONE"],
-        reasoning_must_contain=[],
-        description="Low cost electronics within budget"
-    ),
-]
-
-
-async def run_scenario(client: httpx.AsyncClient, scenario: TestScenario) -> Dict[str, Any]:
-    """Run a single test scenario through the pipeline API."""
-    request_body = {
-        "product": scenario.product,
-        "cost": scenario.cost,
-        "website": scenario.website,
-        "time_to_cart": scenario.time_on_site * 0.8,  # Assume 80% of time before cart
-        "time_on_site": scenario.time_on_site,
-        "click_count": scenario.click_count,
-        "peak_scroll_velocity": scenario.peak_scroll_velocity,
-        "system_hour": scenario.system_hour
-    }
+    cache_path = _cache_path(scenario.request_body) if use_cache else None
+    if cache_path is not None:
+        try:
+            return json.loads(cache_path.read_text())
+        except (OSError, ValueError):
+            pass  # Miss (or unreadable entry): ask the backend
     
+    # Pre-encoded on the scenario, rather than through httpx's stdlib json per attempt
+    payload = scenario.request_body_bytes
     try:
-        response = await client.post(
-            f"{BACKEND_URL}/pipeline-analyze",
-            json=request_body,
-            timeout=60.0
-        )
+        delay = RATE_LIMIT_BACKOFF
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            response = await client.post(
+                f"{BACKEND_URL}/pipeline-analyze",
+                content=payload,
+                headers=JSON_HEADERS
+            )
+            if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+            # Backend pushed back: wait as long as it asks (if it says) and retry
+            retry_after = response.headers.get("retry-after", "")
+            await asyncio.sleep(float(retry_after) if retry_after.isdigit() else delay)
+            delay *= 2
         response.raise_for_status()
-        return response.json()
+        result = orjson.loads(response.content)
+    except (httpx.ConnectError, httpx.ConnectTimeout):
+        raise  # Backend unreachable: run_validation_suite stops the whole run
     except Exception as e:
         return {"error": str(e)}
+    
+    # Only successful responses are cached
+    if cache_path is not None:
+        _write_cache(cache_path, result)
+    return result
 
 
 def validate_scenario(scenario: TestScenario, result: Dict[str, Any]) -> Dict[str, Any]:
@@ -322,7 +232,7 @@ def validate_scenario(scenario: TestScenario, result: Dict[str, Any]) -> Dict[st
     intervention_ok = intervention in scenario.expected_interventions
     checks["intervention"] = {
         "passed": intervention_ok,
-        "expected": scenario.expected_interventions,
+        "expected": list(scenario.expected_interventions),
         "actual": intervention
     }
     if not intervention_ok:
@@ -330,15 +240,16 @@ def validate_scenario(scenario: TestScenario, result: Dict[str, Any]) -> Dict[st
     
     # Check 3: Reasoning contains required keywords
     reasoning = result.get("reasoning", "").lower()
-    missing_keywords = []
-    for keyword in scenario.reasoning_must_contain:
-        if keyword.lower() not in reasoning:
-            missing_keywords.append(keyword)
+    missing_keywords = [
+        keyword
+        for keyword, keyword_lower in zip(scenario.reasoning_must_contain, scenario.reasoning_keywords_lower)
+        if keyword_lower not in reasoning
+    ]
     
     keywords_ok = len(missing_keywords) == 0
     checks["reasoning_keywords"] = {
         "passed": keywords_ok,
-        "expected": scenario.reasoning_must_contain,
+        "expected": list(scenario.reasoning_must_contain),
         "missing": missing_keywords
     }
     if not keywords_ok:
@@ -353,47 +264,66 @@ def validate_scenario(scenario: TestScenario, result: Dict[str, Any]) -> Dict[st
     }
 
 
-async def run_validation_suite() -> Dict[str, Any]:
-    """Run all test scenarios and return results."""
+async def run_validation_suite(use_cache: bool = True,
+                               name_filter: Optional[str] = None) -> Dict[str, Any]:
+    """Run the test scenarios (those whose name contains name_filter, if given) and return results."""
+    import asyncio
+    import httpx
+    from datetime import datetime
+    
+    scenarios = get_scenarios()
+    if name_filter:
+        scenarios = tuple(s for s in scenarios if name_filter.lower() in s.name.lower())
+        if not scenarios:
+            print(f"ERROR: No test scenario name contains '{name_filter}'")
+            return {"error": "No matching scenarios"}
+    
     print("=" * 70)
     print("IMPULSE GUARD PROMPT VALIDATION SUITE")
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Response cache: {CACHE_DIR if use_cache else 'disabled'}")
     print("=" * 70)
     print()
     
-    results = []
-    passed_count = 0
-    failed_count = 0
-    
-    async with httpx.AsyncClient() as client:
-        # Check if backend is running
-        try:
-            health = await client.get(f"{BACKEND_URL}/health", timeout=5.0)
-            if health.status_code != 200:
-                print("ERROR: Backend is not healthy. Please start the server first.")
-                return {"error": "Backend not running"}
-        except Exception as e:
-            print(f"ERROR: Cannot connect to backend at {BACKEND_URL}")
-            print(f"Please run: cd backend && source venv/bin/activate && uvicorn app:app --reload")
-            return {"error": str(e)}
+    # No separate health check: if the backend is down, the first request's
+    # connection error stops the run. The transport retries failed connects.
+    transport = httpx.AsyncHTTPTransport(
+        retries=2,
+        limits=httpx.Limits(max_connections=MAX_PARALLEL, max_keepalive_connections=MAX_PARALLEL)
+    )
+    async with httpx.AsyncClient(transport=transport, timeout=60.0) as client:
+        print(f"Running {len(scenarios)} test scenarios ({MAX_PARALLEL} at a time)...\n")
         
-        print(f"Running {len(TEST_SCENARIOS)} test scenarios...\n")
+        # Scenarios are independent; the semaphore bounds the load on the backend
+        semaphore = asyncio.Semaphore(MAX_PARALLEL)
         
-        for i, scenario in enumerate(TEST_SCENARIOS, 1):
-            print(f"[{i}/{len(TEST_SCENARIOS)}] {scenario.name}")
-            print(f"    Product: {scenario.product} (${scenario.cost:.2f})")
-            print(f"    Time: {scenario.system_hour}:00, Site: {scenario.website}")
-            print(f"    Expected: score {scenario.expected_score_min:.2f}-{scenario.expected_score_max:.2f}, intervention {scenario.expected_interventions}")
+        async def run_one(i: int, scenario: TestScenario) -> Dict[str, Any]:
+            # Buffer this scenario's lines and print them together once it
+            # finishes, so concurrent scenarios don't interleave
+            lines = [
+                f"[{i}/{len(scenarios)}] {scenario.name}",
+                f"    Product: {scenario.product} (${scenario.cost:.2f})",
+                f"    Time: {scenario.system_hour}:00, Site: {scenario.website}",
+                f"    Expected: score {scenario.expected_score_min:.2f}-{scenario.expected_score_max:.2f}, intervention {list(scenario.expected_interventions)}"
+            ]
             
             # Run the scenario
-            api_result = await run_scenario(client, scenario)
-            
-            # Add delay to avoid rate limiting
-            await asyncio.sleep(2)
+            async with semaphore:
+                api_result = await run_scenario(client, scenario, use_cache)
             
             # Validate
             validation = validate_scenario(scenario, api_result)
             
+            if validation["passed"]:
+                lines.append(f"    ✅ PASSED - Score: {api_result.get('impulse_score', 'N/A'):.3f}, Action: {api_result.get('intervention_action', 'N/A')}")
+            else:
+                lines.append(f"    ❌ FAILED - Score: {api_result.get('impulse_score', 'N/A'):.3f}, Action: {api_result.get('intervention_action', 'N/A')}")
+                for check_name, check_result in validation["checks"].items():
+                    if not check_result["passed"]:
+                        lines.append(f"       - {check_name}: expected {check_result.get('expected')}, got {check_result.get('actual', check_result.get('missing'))}")
+            
+            print("\n".join(lines) + "\n")
+            
             # Record result
             result = {
                 "scenario": scenario.name,
@@ -401,27 +331,36 @@ async def run_validation_suite() -> Dict[str, Any]:
                 "api_result": api_result,
                 "validation": validation
             }
-            results.append(result)
-            
-            if validation["passed"]:
-                passed_count += 1
-                print(f"    ✅ PASSED - Score: {api_result.get('impulse_score', 'N/A'):.3f}, Action: {api_result.get('intervention_action', 'N/A')}")
-            else:
-                failed_count += 1
-                print(f"    ❌ FAILED - Score: {api_result.get('impulse_score', 'N/A'):.3f}, Action: {api_result.get('intervention_action', 'N/A')}")
-                for check_name, check_result in validation["checks"].items():
-                    if not check_result["passed"]:
-                        print(f"       - {check_name}: expected {check_result.get('expected')}, got {check_result.get('actual', check_result.get('missing'))}")
-            
-            print()
+            results_stream.write(orjson.dumps(result, option=orjson.OPT_APPEND_NEWLINE))
+            results_stream.flush()
+            return result
+        
+        # gather keeps results in scenario order, whatever order they finish in
+        with open(RESULTS_FILE, "wb") as results_stream:
+            tasks = [
+                asyncio.ensure_future(run_one(i, scenario))
+                for i, scenario in enumerate(scenarios, 1)
+            ]
+            try:
+                results = await asyncio.gather(*tasks)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                print(f"ERROR: Cannot connect to backend at {BACKEND_URL}")
+                print(f"Please run: cd backend && source venv/bin/activate && uvicorn app:app --reload")
+                return {"error": str(e)}
+    
+    passed_count = sum(1 for result in results if result["validation"]["passed"])
+    failed_count = len(results) - passed_count
     
     # Summary
     print("=" * 70)
     print("VALIDATION SUMMARY")
     print("=" * 70)
-    print(f"Total Scenarios: {len(TEST_SCENARIOS)}")
-    print(f"Passed: {passed_count} ({100*passed_count/len(TEST_SCENARIOS):.1f}%)")
-    print(f"Failed: {failed_count} ({100*failed_count/len(TEST_SCENARIOS):.1f}%)")
+    print(f"Total Scenarios: {len(scenarios)}")
+    print(f"Passed: {passed_count} ({100*passed_count/len(scenarios):.1f}%)")
+    print(f"Failed: {failed_count} ({100*failed_count/len(scenarios):.1f}%)")
     print()
     
     if failed_count > 0:
@@ -435,29 +374,45 @@ async def run_validation_suite() -> Dict[str, Any]:
     else:
         print("🎉 ALL SCENARIOS PASSED! Prompt is working as expected.")
     
-    # Save results to file
-    output_file = "prompt_validation_results.json"
-    with open(output_file, "w") as f:
-        json.dump({
-            "timestamp": datetime.now().isoformat(),
+    # Per-scenario results were streamed as they finished; save the counts
+    with open(SUMMARY_FILE, "wb") as f:
+        f.write(orjson.dumps({
+            "timestamp": datetime.now(),
             "summary": {
-                "total": len(TEST_SCENARIOS),
+                "total": len(scenarios),
                 "passed": passed_count,
                 "failed": failed_count,
-                "pass_rate": passed_count / len(TEST_SCENARIOS)
-            },
-            "results": results
-        }, f, indent=2, default=str)
+                "pass_rate": passed_count / len(scenarios)
+            }
+        }, option=orjson.OPT_INDENT_2))
     
-    print(f"\nDetailed results saved to: {output_file}")
+    print(f"\nDetailed results saved to: {RESULTS_FILE} (summary: {SUMMARY_FILE})")
     
     return {
         "passed": passed_count,
         "failed": failed_count,
-        "total": len(TEST_SCENARIOS),
+        "total": len(scenarios),
         "results": results
     }
 
 
 if __name__ == "__main__":
-    asyncio.run(run_validation_suite())
+    import argparse
+    import asyncio
+    try:
+        import uvloop  # ships with uvicorn[standard]; unavailable on Windows
+    except ImportError:
+        uvloop = None
+    
+    parser = argparse.ArgumentParser(description="Validate the Slow Brain prompt against test scenarios")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always call the backend and don't write the response cache")
+    parser.add_argument("--filter", metavar="NAME",
+                        help="only run scenarios whose name contains NAME (case-insensitive)")
+    args = parser.parse_args()
+    suite = run_validation_suite(use_cache=not args.no_cache, name_filter=args.filter)
+    # uvloop's libuv event loop where available; the stock loop otherwise
+    if uvloop is not None:
+        uvloop.run(suite)
+    else:
+        asyncio.run(suite)
@@ -16,8 +16,11 @@ Run: python validate_weights.py
 """
 
 import json
+import re
 import sys
-from typing import Dict, Any, List, Tuple
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 from inference_engine import ImpulseInferenceEngine
 
 # Behavior-only baselines (matching app.py)
@@ -37,6 +40,17 @@ DEFAULT_BIOMETRICS = {
 }
 
 
+@lru_cache(maxsize=1)
+def get_default_engine() -> ImpulseInferenceEngine:
+    """
+    Fast Brain for DEFAULT_BASELINE, built once per process.
+    
+    The engine precomputes its baseline statistics and holds no per-call
+    state, so every validation run can share it.
+    """
+    return ImpulseInferenceEngine(baseline_data=DEFAULT_BASELINE, prior_p=0.2)
+
+
 def load_scenarios(filepath: str = "test_scenarios.json") -> List[Dict[str, Any]]:
     """Load test scenarios from JSON file."""
     with open(filepath, 'r') as f:
@@ -44,26 +58,38 @@ def load_scenarios(filepath: str = "test_scenarios.json") -> List[Dict[str, Any]
     return data.get("scenarios", [])
 
 
-def run_fast_brain_analysis(
-    engine: ImpulseInferenceEngine,
-    biometric_data: Dict[str, Any]
-) -> Dict[str, Any]:
-    """Run Fast Brain analysis on a single scenario."""
-    # Convert biometric_data to current_data format
-    # Map time_on_website to time_on_site for compatibility
+def convert_click_rates(biometrics: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Engine click rates (clicks/second) for each scenario's biometric_data.
     
-    # The test scenarios have click_rate as total clicks or old-style values
-    # We need to convert to clicks/second matching the pipeline calculation
-    time_on_site = biometric_data.get("time_on_website", 180)
-    raw_click_rate = biometric_data.get("click_rate", 0.1)
+    The test scenarios have click_rate as total clicks or old-style values;
+    convert to clicks/second matching the pipeline calculation.
+    """
+    time_on_site = np.array([b.get("time_on_website", 180) for b in biometrics], dtype=float)
+    raw_click_rate = np.array([b.get("click_rate", 0.1) for b in biometrics], dtype=float)
     
     # If click_rate > 1, assume it's total clicks and convert to clicks/second
     # If click_rate <= 1, assume it's already clicks/second
-    if raw_click_rate > 1:
-        # Treat as total clicks, convert to clicks/second
-        click_rate = raw_click_rate / max(time_on_site, 1)
-    else:
-        click_rate = raw_click_rate
+    with np.errstate(invalid="ignore"):
+        return np.where(
+            raw_click_rate > 1, raw_click_rate / np.maximum(time_on_site, 1), raw_click_rate
+        )
+
+
+def build_current_data(
+    biometric_data: Dict[str, Any],
+    click_rate: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Convert a scenario's biometric_data to the engine's current_data format.
+    
+    click_rate is the scenario's entry from convert_click_rates(); it is
+    computed here when not supplied.
+    """
+    # Map time_on_website to time_on_site for compatibility
+    time_on_site = biometric_data.get("time_on_website", 180)
+    if click_rate is None:
+        click_rate = convert_click_rates([biometric_data]).item()
     
     current_data = {
         "heart_rate": biometric_data.get("heart_rate", DEFAULT_BIOMETRICS["heart_rate"]),
@@ -76,20 +102,42 @@ def run_fast_brain_analysis(
         "system_time": biometric_data.get("system_time", 12),
         "website_name": biometric_data.get("website_name", "")
     }
-    
-    # Get structured output with all details
-    result = engine.get_structured_output(current_data)
+    return current_data
+
+
+def _summarize_output(engine: ImpulseInferenceEngine, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a structured engine output to what the validator reports."""
     p_impulse = result["p_impulse"]
-    intervention = engine.get_intervention_level(p_impulse)
-    
     return {
         "p_impulse": p_impulse,
-        "intervention": intervention,
+        "intervention": engine.get_intervention_level(p_impulse),
         "dominant_trigger": result["dominant_trigger"],
         "logic_summary": result["logic_summary"]
     }
 
 
+def run_fast_brain_batch(
+    engine: ImpulseInferenceEngine,
+    biometrics: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Run Fast Brain analysis on every scenario in one vectorized engine call.
+    
+    Preferred over spreading the scenarios across threads: the
+    per-scenario work is small NumPy and dict operations that hold the GIL,
+    so threads would add overhead without running in parallel.
+    """
+    click_rates = convert_click_rates(biometrics).tolist()
+    current_datas = [
+        build_current_data(biometric_data, click_rate)
+        for biometric_data, click_rate in zip(biometrics, click_rates)
+    ]
+    return [
+        _summarize_output(engine, result)
+        for result in engine.get_structured_output_batch(current_datas)
+    ]
+
+
 def classify_expected_outcome(outcome_text: str) -> str:
     """Classify expected outcome into LOW, MEDIUM, or HIGH."""
     outcome_lower = outcome_text.lower()
@@ -101,10 +149,39 @@ def classify_expected_outcome(outcome_text: str) -> str:
         return "MEDIUM"
 
 
+# Sites whose name alone counts as a behavioral risk factor. ASCII-only case
+# folding matches exactly what searching website_name.lower() would.
+HIGH_RISK_SITE_RE = re.compile(r"gambling|casino|bet|temu|shein", re.IGNORECASE | re.ASCII)
+
+
+def behavioral_risk_factors(biometrics: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Count behavioral impulse indicators for each scenario's biometric data.
+    
+    Each indicator (rapid TTC, high arousal, late night, high-risk site) is
+    evaluated as one array over all scenarios, then the arrays are summed.
+    """
+    ttc = np.array([b.get("time_to_cart", 180) for b in biometrics], dtype=float)
+    arousal = np.array([b.get("emotion_arousal", 0.5) for b in biometrics], dtype=float)
+    system_time = np.array([b.get("system_time", 12) for b in biometrics], dtype=float)
+    is_high_risk_site = np.array(
+        [HIGH_RISK_SITE_RE.search(b.get("website_name", "")) is not None for b in biometrics],
+        dtype=bool
+    )
+    
+    is_rapid_ttc = ttc < 60  # Fast cart addition
+    is_high_arousal = arousal > 0.7
+    is_late_night = (system_time >= 1) & (system_time <= 5)
+    return (
+        is_rapid_ttc.astype(int) + is_high_arousal + is_late_night + is_high_risk_site
+    )
+
+
 def validate_scenario(
     scenario: Dict[str, Any],
     result: Dict[str, Any],
-    biometric_data: Dict[str, Any]
+    biometric_data: Dict[str, Any],
+    risk_factors: Optional[int] = None
 ) -> Tuple[bool, str, str]:
     """
     Validate a single scenario result based on BEHAVIORAL signals only.
@@ -112,6 +189,9 @@ def validate_scenario(
     The Fast Brain only sees behavioral telemetry (TTC, clicks, scroll),
     NOT budget/cost/goals. Those are handled by the Slow Brain.
     
+    risk_factors is this scenario's entry from behavioral_risk_factors();
+    it is computed here when not supplied.
+    
     Returns:
         Tuple of (passed: bool, reason: str, note: str)
     """
@@ -122,22 +202,17 @@ def validate_scenario(
     ttc = biometric_data.get("time_to_cart", 180)
     arousal = biometric_data.get("emotion_arousal", 0.5)
     system_time = biometric_data.get("system_time", 12)
-    website_name = biometric_data.get("website_name", "").lower()
     
     # Behavioral impulse indicators
-    is_rapid_ttc = ttc < 60  # Fast cart addition
-    is_high_arousal = arousal > 0.7
-    is_late_night = 1 <= system_time <= 5
-    is_high_risk_site = any(x in website_name for x in ["gambling", "casino", "bet", "temu", "shein"])
-    
-    behavioral_risk_factors = sum([is_rapid_ttc, is_high_arousal, is_late_night, is_high_risk_site])
+    if risk_factors is None:
+        risk_factors = int(behavioral_risk_factors([biometric_data])[0])
     
     # Expected behavioral score based on behavioral factors
-    if behavioral_risk_factors >= 2:
+    if risk_factors >= 2:
         expected_behavioral = "HIGH"
         passed = p_impulse > 0.35
         expected_range = "> 0.35"
-    elif behavioral_risk_factors == 0 and ttc > 200:
+    elif risk_factors == 0 and ttc > 200:
         expected_behavioral = "LOW"
         passed = p_impulse < 0.30
         expected_range = "< 0.30"
@@ -146,7 +221,7 @@ def validate_scenario(
         passed = True  # Accept any score in moderate range
         expected_range = "any"
     
-    note = f"Behavioral factors: TTC={ttc:.0f}s, arousal={arousal:.2f}, hour={system_time}, risk_factors={behavioral_risk_factors}"
+    note = f"Behavioral factors: TTC={ttc:.0f}s, arousal={arousal:.2f}, hour={system_time}, risk_factors={risk_factors}"
     reason = f"Expected behavioral {expected_behavioral} ({expected_range}), got {p_impulse:.3f}"
     
     return passed, reason, note
@@ -164,7 +239,7 @@ def run_validation():
     print()
     
     # Initialize engine
-    engine = ImpulseInferenceEngine(baseline_data=DEFAULT_BASELINE, prior_p=0.2)
+    engine = get_default_engine()
     
     # Load scenarios
     try:
@@ -182,17 +257,19 @@ def run_validation():
     failed_count = 0
     trigger_counts = {}
     
-    for scenario in scenarios:
+    # Fast Brain results and behavioral risk for every scenario at once
+    biometrics = [s.get("biometric_data", {}) for s in scenarios]
+    analyses = run_fast_brain_batch(engine, biometrics)
+    risk_factors = behavioral_risk_factors(biometrics)
+    
+    for scenario, result, scenario_risk in zip(scenarios, analyses, risk_factors.tolist()):
         scenario_id = scenario.get("id", "unknown")
         scenario_name = scenario.get("name", "Unknown")
         biometric_data = scenario.get("biometric_data", {})
         expected_outcome = scenario.get("expected_outcome", "")
         
-        # Run analysis
-        result = run_fast_brain_analysis(engine, biometric_data)
-        
         # Validate based on behavioral signals
-        passed, reason, note = validate_scenario(scenario, result, biometric_data)
+        passed, reason, note = validate_scenario(scenario, result, biometric_data, scenario_risk)
         
         if passed:
             passed_count += 1